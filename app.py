@@ -1,56 +1,156 @@
-from flask import Flask, request, jsonify, render_template, send_from_directory
+from flask import Flask, Response, g, request, jsonify, render_template, send_file, send_from_directory, url_for
 import numpy as np
-import pickle
-import pandas as pd
-from sklearn.metrics import accuracy_score
-import xgboost as xgb
-from sklearn.ensemble import AdaBoostClassifier  # Add this import
+import hmac
+import io
+from collections import OrderedDict
 import os
+import threading
+import time
 import warnings
-from knowledge_base import create_fraud_detection_system  # Knowledge Base System
+from datetime import datetime
+from knowledge_base import RuleCompilationError, create_fraud_detection_system  # Knowledge Base System
+from model_metrics import ModelMetrics
+from dataset_analytics import SECTIONS, AnalyticsCache
+from cascade import DEFAULT_CASCADE, Cascade, CascadeStage, parse_stages
+from ensemble import STRATEGIES, EnsembleScorer
+from inference import InferenceCore
+from jobs import DONE, JobRunner, JobStore, UploadTooLarge
+from metrics import Metrics
+from batch_score import DEFAULT_CHUNKSIZE
+from model_registry import MODEL_FILES, ModelNotAvailable, ModelRegistry
+from prediction_cache import PredictionCache, features_digest
+from transaction_features import AMOUNT_INDEX, features_dict, to_matrix
+from velocity_store import VelocityStore
 
 warnings.filterwarnings("ignore", category=UserWarning)
 
 app = Flask(__name__)
 
-# Load models
-with open('ml model/logreg_model.pkl', 'rb') as f:
-    logreg_model = pickle.load(f)
-with open('ml model/svm_model.pkl', 'rb') as f:
-    svm_model = pickle.load(f)
-with open('ml model/knn_model.pkl', 'rb') as f:
-    knn_model = pickle.load(f)
-with open('ml model/rf_model.pkl', 'rb') as f:
-    rf_model = pickle.load(f)
-with open('ml model/dt_model.pkl', 'rb') as f:
-    dt_model = pickle.load(f)
-with open('ml model/gb_model.pkl', 'rb') as f:
-    gb_model = pickle.load(f)
-xgb_model = xgb.XGBClassifier()
-xgb_model.load_model('ml model/xgb_model.json')
-with open('ml model/adaboost_model.pkl', 'rb') as f:  # Add this line
-    adaboost_model = pickle.load(f)
-
-
-# Load your dataset
-df = pd.read_csv('dataset/test-2.csv')
-X = df.drop('Class', axis=1)
-y = df['Class']
-
-# Calculate accuracy for each model using the entire dataset
-model_accuracies = {
-    'logreg': accuracy_score(y, logreg_model.predict(X)),
-    'svm': accuracy_score(y, svm_model.predict(X)),
-    'knn': accuracy_score(y, knn_model.predict(X)),
-    'rf': accuracy_score(y, rf_model.predict(X)),
-    'dt': accuracy_score(y, dt_model.predict(X)),
-    'gb': accuracy_score(y, gb_model.predict(X)),
-    'xgb': accuracy_score(y, xgb_model.predict(X)),
-    'adaboost': accuracy_score(y, adaboost_model.predict(X)),
-}
+# Models are loaded on first use and kept in a bounded LRU cache
+model_registry = ModelRegistry()
+
+NPY_CONTENT_TYPES = ('application/x-npy', 'application/octet-stream')
+
+# Accuracies come from the persisted metrics table (ml model/model_metrics.json);
+# a model is only re-scored when its file hash no longer matches
+model_metrics = ModelMetrics(model_registry)
+
+# Repeated payloads (client retries, the PWA offline queue) are served from
+# LRU/TTL caches keyed on the feature hash plus model / rule-set version
+prediction_cache = PredictionCache()
+kb_cache = PredictionCache()
+
+# Per-stage timers and per-model / per-rule counters, exported on /metrics
+# (METRICS_ENABLED=1; every call is a no-op while disabled)
+metrics = Metrics()
+
+# Shared inference path: one predict_proba per model, models fanned out to a thread pool
+inference_core = InferenceCore(model_registry, cache=prediction_cache, metrics=metrics)
+
+# N-model ensembles; weight vectors and stackers are cached per model set
+ensemble_scorer = EnsembleScorer(inference_core, model_metrics)
+
+# Cascades keep cumulative per-stage exit counters, one instance per stage config
+MAX_CASCADES = 32
+_cascades = OrderedDict()
+_cascades_lock = threading.Lock()
+
+def get_cascade(stages):
+    """Cascade instance for a stage configuration (bounded LRU)"""
+    key = tuple(stages)
+    with _cascades_lock:
+        cascade = _cascades.get(key)
+        if cascade is not None:
+            _cascades.move_to_end(key)
+        else:
+            cascade = _cascades[key] = Cascade(inference_core, stages)
+            while len(_cascades) > MAX_CASCADES:
+                _cascades.popitem(last=False)
+    return cascade
+
+# Dataset analytics computed server-side, cached by content hash (ANALYTICS_DIR)
+analytics_cache = AnalyticsCache()
+
+# Background scoring jobs; the store (JOBS_DIR) is created on first use, and
+# jobs left queued/running by a dead server are recovered at that point
+_job_runner = None
+
+def get_job_runner():
+    global _job_runner
+    if _job_runner is None:
+        _job_runner = JobRunner(JobStore())
+    return _job_runner
+
+def resolve_model(model_name, default):
+    """Unknown model names fall back to the endpoint's default model"""
+    return model_name if isinstance(model_name, str) and model_name in MODEL_FILES else default
+
+def json_object():
+    """JSON request body as a dict ({} when absent or unparsable)"""
+    data = request.get_json(silent=True)
+    if data is None:
+        return {}
+    if not isinstance(data, dict):
+        raise ValueError('Request body must be a JSON object')
+    return data
+
+def model_list(model_names):
+    """Validate a requested list of registered model names"""
+    if not isinstance(model_names, list) or not all(isinstance(name, str) for name in model_names):
+        raise ValueError('models must be a list of model names')
+    unknown = [name for name in model_names if name not in MODEL_FILES]
+    if unknown:
+        raise ValueError(f"Unknown model(s): {', '.join(unknown)}")
+    return model_names
+
+def request_features():
+    """JSON body and (n_rows >= 1, n_features) matrix of a prediction request"""
+    data = json_object()
+    if 'features' not in data:
+        raise ValueError('features is required')
+    features = to_matrix(data['features'])
+    if features.shape[0] == 0:
+        raise ValueError('features is empty')
+    return data, features
+
+def get_accuracy(model_name):
+    """Accuracy of a model on the evaluation dataset"""
+    return model_metrics.accuracy(model_name)
 
 # Initialize Knowledge Base System
-kb_system = create_fraud_detection_system()
+kb_system = create_fraud_detection_system(metrics)
+
+# Per-card sliding windows feeding the velocity_* rule variables (optional card_id)
+velocity_store = VelocityStore(micro_threshold=kb_system.kb.get_fact('micro_transaction_threshold'))
+
+def cache_metrics():
+    """Cache and velocity store statistics as /metrics samples"""
+    for name, cache in (('models', prediction_cache), ('kb', kb_cache)):
+        stats = cache.stats()
+        labels = {'cache': name}
+        yield 'fraud_cache_hits_total', 'counter', 'Prediction cache hits', labels, stats['hits']
+        yield 'fraud_cache_misses_total', 'counter', 'Prediction cache misses', labels, stats['misses']
+        yield 'fraud_cache_entries', 'gauge', 'Entries held by the prediction cache', labels, stats['entries']
+    yield 'fraud_velocity_cards', 'gauge', 'Cards tracked by the velocity store', {}, velocity_store.stats()['cards']
+
+metrics.add_collector(cache_metrics)
+
+@app.before_request
+def start_request_timer():
+    if metrics.enabled:
+        g.request_started = time.perf_counter()
+
+@app.after_request
+def record_request_latency(response):
+    started = g.get('request_started')
+    if started is not None:
+        metrics.observe('fraud_request_seconds', time.perf_counter() - started,
+                        endpoint=request.endpoint or 'unmatched', status=response.status_code)
+    return response
+
+@app.errorhandler(ModelNotAvailable)
+def model_not_available(e):
+    return jsonify({'error': str(e)}), 404
 
 @app.route('/')
 def home():
@@ -90,69 +190,47 @@ def model():
 
 @app.route('/predict', methods=['POST'])
 def predict():
-    data = request.json
-    features = np.array(data['features']).reshape(1, -1)
-    features_df = prepare_features(features)
+    stopwatch = metrics.stopwatch('fraud_stage_seconds', 'stage', endpoint='predict')
+    try:
+        data, features = request_features()
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    stopwatch.lap('parse_json')
     model_name = data.get('model', 'logreg')
+    stopwatch.lap('features')
     
-    # Convert to DataFrame with proper column names
-    feature_names = ['id'] + [f'V{i}' for i in range(1, 29)] + ['Amount']
-    features_df = pd.DataFrame(features, columns=feature_names)
-    
-    # Get model
-    if model_name == 'svm':
-        model = svm_model
-    elif model_name == 'knn':
-        model = knn_model
-    elif model_name == 'rf':
-        model = rf_model
-    elif model_name == 'dt':
-        model = dt_model
-    elif model_name == 'gb':
-        model = gb_model
-    elif model_name == 'xgb':
-        model = xgb_model
-    elif model_name == 'adaboost':
-        model = adaboost_model
-    else:
-        model = logreg_model
-
-    # Use DataFrame for prediction
-    pred = model.predict(features_df)[0]  # Use features_df instead of features
-    if hasattr(model, "predict_proba"):
-        prob = model.predict_proba(features_df)[0, 1]  # Use features_df
-    else:
-        prob = float(model.decision_function(features_df)[0])  # Use features_df
+    model_name = resolve_model(model_name, 'logreg')
+    scores = inference_core.score(model_name, features)
+    pred = scores.predictions[0]
+    prob = scores.probabilities[0]
+    stopwatch.lap('model')
     
-    acc = model_accuracies.get(model_name, model_accuracies['logreg'])
-    return jsonify({'prediction': int(pred), 'probability': float(prob), 'accuracy': float(acc)})
+    acc = get_accuracy(model_name)
+    response = jsonify({'prediction': int(pred), 'probability': float(prob), 'accuracy': float(acc)})
+    stopwatch.lap('serialize')
+    return response
 
 @app.route('/predict_weighted', methods=['POST'])
 def predict_weighted():
-    data = request.json
-    features = np.array(data['features']).reshape(1, -1)
+    try:
+        data, features = request_features()
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
     model1_name = data.get('model1', 'rf')
     model2_name = data.get('model2', 'xgb')
     
-    models = {
-        'logreg': logreg_model, 'svm': svm_model, 'knn': knn_model,
-        'rf': rf_model, 'dt': dt_model, 'gb': gb_model,
-        'xgb': xgb_model, 'adaboost': adaboost_model
-    }
+    model1_name = resolve_model(model1_name, 'rf')
+    model2_name = resolve_model(model2_name, 'xgb')
     
-    model1 = models.get(model1_name, rf_model)
-    model2 = models.get(model2_name, xgb_model)
+    # Get accuracies as weights (normalized vector is cached per model pair)
+    acc1 = get_accuracy(model1_name)
+    acc2 = get_accuracy(model2_name)
+    weight1, weight2 = ensemble_scorer.weights([model1_name, model2_name], 'accuracy_weighted')
     
-    # Get accuracies as weights
-    acc1 = model_accuracies.get(model1_name, 0.99)
-    acc2 = model_accuracies.get(model2_name, 0.99)
-    total_acc = acc1 + acc2
-    weight1 = acc1 / total_acc
-    weight2 = acc2 / total_acc
-    
-    # Get predictions
-    prob1 = model1.predict_proba(features)[0, 1] if hasattr(model1, "predict_proba") else 0.5
-    prob2 = model2.predict_proba(features)[0, 1] if hasattr(model2, "predict_proba") else 0.5
+    # Get predictions (both models run concurrently)
+    scores = inference_core.score_many([model1_name, model2_name], features)
+    prob1 = scores[model1_name].probabilities[0]
+    prob2 = scores[model2_name].probabilities[0]
     
     # Weighted average
     weighted_prob = (prob1 * weight1) + (prob2 * weight2)
@@ -170,72 +248,91 @@ def predict_weighted():
 
 @app.route('/predict_sequential', methods=['POST'])
 def predict_sequential():
-    data = request.json
-    features = np.array(data['features']).reshape(1, -1)
+    try:
+        data, features = request_features()
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
     model1_name = data.get('model1', 'rf')
     model2_name = data.get('model2', 'xgb')
-    threshold = data.get('threshold', 0.7)
-    
-    models = {
-        'logreg': logreg_model, 'svm': svm_model, 'knn': knn_model,
-        'rf': rf_model, 'dt': dt_model, 'gb': gb_model,
-        'xgb': xgb_model, 'adaboost': adaboost_model
-    }
-    
-    model1 = models.get(model1_name, rf_model)
-    model2 = models.get(model2_name, xgb_model)
+    try:
+        threshold = float(data.get('threshold', 0.7))
+    except (TypeError, ValueError):
+        threshold = None
+    if threshold is None or not 0 <= threshold <= 1:
+        return jsonify({'error': 'threshold must be a number between 0 and 1'}), 400
     
-    # First model prediction
-    prob1 = model1.predict_proba(features)[0, 1] if hasattr(model1, "predict_proba") else 0.5
-    pred1 = int(prob1 > 0.5)
+    model1_name = resolve_model(model1_name, 'rf')
+    model2_name = resolve_model(model2_name, 'xgb')
     
-    # If first model is uncertain, use second model
-    if prob1 < threshold and prob1 > (1 - threshold):
-        prob2 = model2.predict_proba(features)[0, 1] if hasattr(model2, "predict_proba") else 0.5
-        final_prob = prob2
-        final_pred = int(prob2 > 0.5)
-        model_used = model2_name
-    else:
-        final_prob = prob1
-        final_pred = pred1
-        model_used = model1_name
+    # Two-stage cascade: model2 only runs when model1 is uncertain,
+    # i.e. when (1 - threshold) < prob1 < threshold
+    cascade = get_cascade([
+        CascadeStage(model1_name, 1 - threshold, threshold),
+        CascadeStage(model2_name, 0.5, 0.5)
+    ])
+    result = cascade.run(features)
+    model_used = cascade.stages[result['exit_stage'][0]].model
     
     return jsonify({
-        'final_prediction': final_pred,
-        'final_probability': float(final_prob),
+        'final_prediction': int(result['predictions'][0]),
+        'final_probability': float(result['probabilities'][0]),
         'model_used': model_used,
-        'first_model_prob': float(prob1),
+        'first_model_prob': float(result['stage_probabilities'][0, 0]),
         'threshold': threshold
     })
 
+@app.route('/predict_cascade', methods=['POST'])
+def predict_cascade():
+    """
+    Multi-stage early-exit inference over one or many rows.
+
+    Body: {"features": row or [rows],
+           "stages": [{"model": "logreg", "low": 0.01, "high": 0.99}, ...]}
+    Rows whose probability is <= low or >= high exit at that stage; only the
+    uncertain rows are forwarded to the next model. The last stage decides
+    all remaining rows. Defaults to logreg -> dt -> xgb -> svm.
+    """
+    try:
+        data, features = request_features()
+        if 'stages' in data:
+            stages = parse_stages(data['stages'], known=MODEL_FILES)
+        else:
+            stages = list(DEFAULT_CASCADE)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+    result = get_cascade(stages).run(features)
+    return jsonify({
+        'predictions': result['predictions'].tolist(),
+        'probabilities': result['probabilities'].tolist(),
+        'models_used': [stages[index].model for index in result['exit_stage']],
+        'stage_stats': result['stage_stats']
+    })
+
+@app.route('/cascade_stats', methods=['GET'])
+def cascade_stats():
+    """Cumulative fraction of traffic exiting at each stage, per cascade config"""
+    with _cascades_lock:
+        cascades = list(_cascades.values())
+    return jsonify([cascade.stats() for cascade in cascades])
+
 @app.route('/predict_ensemble', methods=['POST'])
 def predict_ensemble():
-    data = request.json
-    features = np.array(data['features']).reshape(1, -1)
+    try:
+        data, features = request_features()
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
     model1_name = data.get('model1', 'rf')
     model2_name = data.get('model2', 'xgb')
     
-    # Convert to DataFrame with proper column names
-    feature_names = ['id'] + [f'V{i}' for i in range(1, 29)] + ['Amount']
-    features_df = pd.DataFrame(features, columns=feature_names)
-    
     # Get models
-    models = {
-        'logreg': logreg_model, 'svm': svm_model, 'knn': knn_model,
-        'rf': rf_model, 'dt': dt_model, 'gb': gb_model,
-        'xgb': xgb_model, 'adaboost': adaboost_model
-    }
-    
-    model1 = models.get(model1_name, rf_model)
-    model2 = models.get(model2_name, xgb_model)
-    
-    # Get predictions from both models using DataFrame
-    pred1 = model1.predict(features_df)[0]
-    pred2 = model2.predict(features_df)[0]
+    model1_name = resolve_model(model1_name, 'rf')
+    model2_name = resolve_model(model2_name, 'xgb')
     
-    # Get probabilities using DataFrame
-    prob1 = model1.predict_proba(features_df)[0, 1] if hasattr(model1, "predict_proba") else 0.5
-    prob2 = model2.predict_proba(features_df)[0, 1] if hasattr(model2, "predict_proba") else 0.5
+    # Probabilities from both models (run concurrently); labels derive from them
+    scores = inference_core.score_many([model1_name, model2_name], features)
+    pred1, prob1 = scores[model1_name].predictions[0], scores[model1_name].probabilities[0]
+    pred2, prob2 = scores[model2_name].predictions[0], scores[model2_name].probabilities[0]
     
     # Ensemble methods
     voting_pred = int((pred1 + pred2) >= 1)  # Majority vote
@@ -243,8 +340,8 @@ def predict_ensemble():
     max_prob = max(prob1, prob2)  # Maximum probability
     
     # Get accuracies
-    acc1 = model_accuracies.get(model1_name, 0.99)
-    acc2 = model_accuracies.get(model2_name, 0.99)
+    acc1 = get_accuracy(model1_name)
+    acc2 = get_accuracy(model2_name)
     avg_acc = (acc1 + acc2) / 2
     
     return jsonify({
@@ -256,6 +353,190 @@ def predict_ensemble():
         'ensemble_accuracy': float(avg_acc)
     })
 
+@app.route('/predict_batch', methods=['POST'])
+def predict_batch():
+    """
+    Score a block of transactions in one call.
+
+    Accepts either a JSON body {"features": [[...], ...], "models": [...]}
+    or a raw .npy matrix (Content-Type application/x-npy) with the models
+    given in the query string (?model=xgb&model=dt or ?models=xgb,dt).
+    Each selected model runs once over the whole block.
+    """
+    try:
+        features, model_names = parse_batch_request()
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+    results = {}
+    for model_name, scores in inference_core.score_many(model_names, features).items():
+        results[model_name] = {
+            'predictions': scores.predictions.tolist(),
+            'probabilities': scores.probabilities.tolist(),
+            'accuracy': float(get_accuracy(model_name))
+        }
+
+    return jsonify({'n_rows': int(features.shape[0]), 'results': results})
+
+@app.route('/predict_ensemble_n', methods=['POST'])
+def predict_ensemble_n():
+    """
+    Ensemble of any subset of the registered models.
+
+    Body: {"features": row or [rows], "models": [...],
+           "strategy": "soft_vote" | "accuracy_weighted" | "max" | "stacking"}
+    All rows are scored in one pass: the per-model probabilities form one
+    (n_rows, n_models) matrix that is combined with a single matrix product.
+    """
+    try:
+        data = json_object()
+        model_names = model_list(data.get('models') or ['rf', 'xgb'])
+        strategy = data.get('strategy', 'soft_vote')
+        features = to_matrix(data['features'])
+        result = ensemble_scorer.score(model_names, strategy, features)
+    except KeyError:
+        return jsonify({'error': 'features is required'}), 400
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+    return jsonify({
+        'models': result['models'],
+        'strategy': result['strategy'],
+        'weights': result.get('weights'),
+        'predictions': result['predictions'].tolist(),
+        'probabilities': result['probabilities'].tolist(),
+        'model_probabilities': {
+            name: probs.tolist() for name, probs in result['model_probabilities'].items()
+        },
+        'ensemble_accuracy': float(np.mean([get_accuracy(name) for name in result['models']])),
+        # Stacking only: out-of-fold accuracy/AUC of the stacker on the evaluation set
+        'stacker_cv': result.get('stacker_cv'),
+        'strategies': list(STRATEGIES)
+    })
+
+@app.route('/models', methods=['GET'])
+def list_models():
+    """Registered models, which of them are resident and their accuracies"""
+    stats = model_registry.stats()
+    stats['metrics'] = model_metrics.cached()
+    return jsonify(stats)
+
+@app.route('/cache_stats', methods=['GET'])
+def cache_stats():
+    """Hit/miss counters of the model and Knowledge Base prediction caches"""
+    return jsonify({
+        'models': prediction_cache.stats(),
+        'kb': kb_cache.stats(),
+        'velocity': velocity_store.stats(),
+        'kb_rules_version': kb_system.kb.rules_version
+    })
+
+@app.route('/metrics', methods=['GET'])
+def metrics_endpoint():
+    """Prometheus text exposition of the runtime metrics (per process)"""
+    if not metrics.enabled:
+        return jsonify({'error': 'metrics are disabled (set METRICS_ENABLED=1)'}), 404
+    return Response(metrics.render(), mimetype='text/plain; version=0.0.4')
+
+@app.route('/jobs', methods=['POST'])
+def submit_job():
+    """
+    Queue a CSV for background scoring and return immediately.
+
+    Upload the CSV as multipart field "file" (or as a raw text/csv body).
+    Options come from form fields or the query string:
+    models=xgb,logreg  kb=true|false  chunksize=50000
+    """
+    runner = get_job_runner()
+    # Checked before request.files parses (and spools) the body
+    if request.content_length is not None and request.content_length > runner.max_upload_bytes:
+        return jsonify({'error': f'Upload exceeds {runner.max_upload_bytes} bytes'}), 413
+    options = request.form if request.files else request.args
+    model_names = [name for name in options.get('models', 'xgb').split(',') if name]
+    unknown = [name for name in model_names if name not in MODEL_FILES]
+    if not model_names or unknown:
+        return jsonify({'error': f"Unknown model(s): {', '.join(unknown) or '(none)'}"}), 400
+    use_kb = options.get('kb', 'true').lower() not in ('0', 'false', 'no')
+    try:
+        chunksize = max(1, int(options.get('chunksize', DEFAULT_CHUNKSIZE)))
+    except ValueError:
+        return jsonify({'error': 'chunksize must be an integer'}), 400
+
+    upload = request.files.get('file') or (request.stream if request.mimetype == 'text/csv' else None)
+    if upload is None:
+        return jsonify({'error': 'Upload a CSV as multipart field "file" or a text/csv body'}), 400
+
+    try:
+        job_id = runner.submit(model_names, use_kb, upload, chunksize)
+    except UploadTooLarge as e:
+        return jsonify({'error': str(e)}), 413
+    status_url = url_for('job_status', job_id=job_id)
+    return jsonify({'job_id': job_id, 'status_url': status_url}), 202, {'Location': status_url}
+
+@app.route('/jobs/<job_id>', methods=['GET'])
+def job_status(job_id):
+    """Status and progress of a scoring job"""
+    job = get_job_runner().store.get(job_id)
+    if job is None:
+        return jsonify({'error': f'Unknown job {job_id}'}), 404
+    if job['status'] == DONE:
+        job['result_url'] = url_for('job_result', job_id=job_id)
+    return jsonify(job)
+
+@app.route('/jobs/<job_id>/result', methods=['GET'])
+def job_result(job_id):
+    """Stream the scored CSV of a finished job"""
+    store = get_job_runner().store
+    job = store.get(job_id)
+    if job is None:
+        return jsonify({'error': f'Unknown job {job_id}'}), 404
+    if job['status'] != DONE:
+        return jsonify({'error': f"Job is {job['status']}", 'progress': job['progress']}), 409
+    return send_file(os.path.abspath(store.result_path(job_id)), mimetype='text/csv',
+                     as_attachment=True, download_name=f'{job_id}.csv')
+
+@app.route('/analytics', methods=['POST'])
+def upload_analytics():
+    """
+    Ingest a dataset CSV once and compute all dashboard aggregates.
+
+    Upload as multipart field "file" or a raw text/csv body. Returns the
+    dataset_id (SHA-256 of the file) to fetch sections with, plus the summary.
+    Re-uploading the same file is served from the cache.
+    """
+    # Checked before request.files parses (and spools) the body
+    if request.content_length is not None and request.content_length > analytics_cache.max_upload_bytes:
+        return jsonify({'error': f'Upload exceeds {analytics_cache.max_upload_bytes} bytes'}), 413
+    upload = request.files.get('file') or (request.stream if request.mimetype == 'text/csv' else None)
+    if upload is None:
+        return jsonify({'error': 'Upload a CSV as multipart field "file" or a text/csv body'}), 400
+    try:
+        result = analytics_cache.ingest(upload)
+    except UploadTooLarge as e:
+        return jsonify({'error': str(e)}), 413
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    return jsonify({
+        'dataset_id': result['dataset_id'],
+        'cached': result['cached'],
+        'summary': result['analytics']['summary'],
+        'sections': list(SECTIONS)
+    })
+
+@app.route('/analytics/<dataset_id>', methods=['GET'])
+def get_analytics(dataset_id):
+    """Pre-binned analytics of an uploaded dataset (?sections=summary,hourly,...)"""
+    analytics = analytics_cache.get(dataset_id)
+    if analytics is None:
+        return jsonify({'error': f'Unknown dataset {dataset_id}, upload it to /analytics first'}), 404
+    requested = [name for name in request.args.get('sections', '').split(',') if name]
+    unknown = [name for name in requested if name not in SECTIONS]
+    if unknown:
+        return jsonify({'error': f"Unknown section(s): {', '.join(unknown)}"}), 400
+    if requested:
+        analytics = {name: analytics[name] for name in requested}
+    return jsonify(dict(analytics, dataset_id=dataset_id))
+
 # Add route for service worker
 @app.route('/sw.js')
 def service_worker():
@@ -285,41 +566,34 @@ def predict_with_kb():
     Endpoint prediksi dengan Knowledge Base System
     Menggabungkan ML prediction dengan rule-based reasoning
     """
+    stopwatch = metrics.stopwatch('fraud_stage_seconds', 'stage', endpoint='predict_with_kb')
+    try:
+        data, features = request_features()
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    stopwatch.lap('parse_json')
+    model_name = data.get('model', 'xgb')  # Default XGBoost (best performer)
+    card_id = data.get('card_id')
+    # bool is an int subclass; True/False must not get their own velocity windows
+    if card_id is not None and (isinstance(card_id, bool) or not (
+            isinstance(card_id, (str, int)) and 0 < len(str(card_id)) <= 128)):
+        return jsonify({'error': 'card_id must be a string or integer of 1-128 characters'}), 400
+    # A replayed request (client retry, offline queue) must not count as a new
+    # transaction: observations are deduplicated per Idempotency-Key, or per payload
+    idempotency_key = request.headers.get('Idempotency-Key')
+    if idempotency_key is not None and not 0 < len(idempotency_key) <= 128:
+        return jsonify({'error': 'Idempotency-Key must be 1-128 characters'}), 400
+    stopwatch.lap('features')
+    
     try:
-        data = request.json
-        features = np.array(data['features']).reshape(1, -1)
-        model_name = data.get('model', 'xgb')  # Default XGBoost (best performer)
-        
-        # Convert to DataFrame
-        feature_names = ['id'] + [f'V{i}' for i in range(1, 29)] + ['Amount']
-        features_df = pd.DataFrame(features, columns=feature_names)
-        
-        # Get model
-        models = {
-            'logreg': logreg_model, 'svm': svm_model, 'knn': knn_model,
-            'rf': rf_model, 'dt': dt_model, 'gb': gb_model,
-            'xgb': xgb_model, 'adaboost': adaboost_model
-        }
-        model = models.get(model_name, xgb_model)
-        
         # ML Prediction
-        ml_pred = model.predict(features_df)[0]
+        model_name = resolve_model(model_name, 'xgb')
+        scores = inference_core.score(model_name, features)
+        ml_pred = scores.predictions[0]
+        ml_prob = scores.probabilities[0]
+        stopwatch.lap('model')
         
-        # Get probability with error handling
-        try:
-            if model_name == 'xgb':
-                # XGBoost might have issues with predict_proba if not properly loaded
-                # Use predict to get raw prediction score
-                ml_prob = float(ml_pred)
-            elif hasattr(model, "predict_proba"):
-                ml_prob = model.predict_proba(features_df)[0, 1]
-            else:
-                ml_prob = float(model.decision_function(features_df)[0])
-        except Exception as e:
-            # Fallback: use prediction value as probability
-            ml_prob = float(ml_pred)
-        
-        ml_acc = model_accuracies.get(model_name, 0.99)
+        ml_acc = get_accuracy(model_name)
         
         ml_prediction = {
             'prediction': int(ml_pred),
@@ -327,18 +601,34 @@ def predict_with_kb():
             'accuracy': float(ml_acc)
         }
         
-        # Prepare features dictionary for KB
-        # features[0][0] adalah kolom 'id' yang sebenarnya adalah Time
-        features_dict = {
-            'Time': float(features[0][0]),  # Kolom pertama (id) = Time
-            'Amount': float(features[0][-1])  # Kolom terakhir = Amount
-        }
-        # V1-V28 ada di indeks 1-28
-        for i in range(1, 29):
-            features_dict[f'V{i}'] = float(features[0][i])
+        # Prepare features dictionary for KB (kolom 'id' dipakai sebagai Time)
+        kb_features = features_dict(features[0])
         
-        # Knowledge Base Inference
-        kb_result = kb_system.infer(features_dict, ml_prediction)
+        # Card history before this transaction; the transaction itself is recorded
+        velocity = None
+        if card_id is not None:
+            event_id = idempotency_key or features_digest(features[:1])
+            velocity = velocity_store.observe(card_id, float(features[0, AMOUNT_INDEX]), event_id=event_id)
+        stopwatch.lap('velocity')
+        
+        # Knowledge Base Inference (cached per rule-set version, features, velocity and
+        # ML result); refresh first so an edited rules file is never masked by a cache hit
+        cache_key = (
+            kb_system.kb.refresh().version, features_digest(features[:1]),
+            tuple(sorted(velocity.items())) if velocity else None,
+            ml_prediction['prediction'], ml_prediction['probability'], ml_prediction['accuracy']
+        )
+        computed = []
+        kb_result = kb_cache.get_or_compute(
+            cache_key, lambda: computed.append(True) or kb_system.infer(kb_features, ml_prediction, velocity)
+        )
+        if not computed:
+            # Served from the cache: still count the evaluation and the rules it fired
+            kb_system.rule_engine.record(kb_result)
+        kb_result = dict(kb_result, timestamp=datetime.now().isoformat())
+        stopwatch.lap('kb')
+    except ModelNotAvailable:
+        raise
     except Exception as e:
         return jsonify({
             'error': str(e),
@@ -346,10 +636,11 @@ def predict_with_kb():
         }), 500
     
     # Return comprehensive result
-    return jsonify({
+    response = jsonify({
         'ml_prediction': ml_prediction,
         'kb_result': kb_result,
         'model_used': model_name,
+        'velocity': velocity,
         'hybrid_decision': {
             'prediction': kb_result['final_prediction'],
             'risk_score': kb_result['final_risk_score'],
@@ -357,6 +648,8 @@ def predict_with_kb():
             'recommendation': kb_result['recommendation']
         }
     })
+    stopwatch.lap('serialize')
+    return response
 
 @app.route('/explain_kb', methods=['POST'])
 def explain_kb():
@@ -369,7 +662,8 @@ def explain_kb():
     if not kb_result:
         return jsonify({'error': 'kb_result diperlukan'}), 400
     
-    explanation = kb_system.explain(kb_result)
+    with metrics.timer('fraud_stage_seconds', endpoint='explain_kb', stage='explain'):
+        explanation = kb_system.explain(kb_result)
     
     return jsonify({
         'explanation': explanation,
@@ -381,12 +675,15 @@ def get_kb_rules():
     """
     Endpoint untuk mendapatkan semua aturan dalam Knowledge Base
     """
-    rules = kb_system.kb.get_rules()
+    ruleset = kb_system.kb.refresh()
+    rules = list(ruleset.rules)
     patterns = kb_system.kb.get_fraud_patterns()
     facts = kb_system.kb.facts
     
     return jsonify({
         'rules': rules,
+        'rules_version': ruleset.version,
+        'rules_loaded_at': ruleset.loaded_at,
         'fraud_patterns': patterns,
         'facts': {
             'high_risk_hours': facts['high_risk_hours'],
@@ -400,10 +697,74 @@ def get_kb_rules():
         'total_rules': len(rules)
     })
 
-def prepare_features(features_array):
-    """Convert numpy array to DataFrame with proper feature names"""
-    feature_names = ['id'] + [f'V{i}' for i in range(1, 29)] + ['Amount']
-    return pd.DataFrame(features_array, columns=feature_names)
+def admin_authorized():
+    """Admin endpoints require X-Admin-Token to match ADMIN_TOKEN; disabled when unset"""
+    token = os.environ.get('ADMIN_TOKEN')
+    supplied = request.headers.get('X-Admin-Token', '')
+    return bool(token) and hmac.compare_digest(token.encode(), supplied.encode())
+
+def ruleset_status(ruleset):
+    return {
+        'rules_version': ruleset.version,
+        'rules_loaded_at': ruleset.loaded_at,
+        'total_rules': len(ruleset.rules),
+        'distinct_predicates': len(ruleset.network.predicates),
+        'last_reload_error': kb_system.kb.last_reload_error
+    }
+
+@app.route('/admin/rules', methods=['GET', 'PUT'])
+def admin_rules():
+    """
+    GET: active rule-set version. PUT: validate, persist to fraud_rules.json and
+    activate a new rule list; other workers pick the file up on their next check
+    """
+    if not admin_authorized():
+        return jsonify({'error': 'Forbidden'}), 403
+    if request.method == 'GET':
+        return jsonify(ruleset_status(kb_system.kb.snapshot()))
+
+    rules = request.get_json(silent=True)
+    if isinstance(rules, dict):
+        rules = rules.get('rules')
+    try:
+        ruleset = kb_system.kb.replace_rules(rules)
+    except RuleCompilationError as e:
+        return jsonify({'error': str(e)}), 400
+    return jsonify(ruleset_status(ruleset))
+
+@app.route('/admin/rules/reload', methods=['POST'])
+def admin_reload_rules():
+    """Re-read fraud_rules.json in this worker immediately"""
+    if not admin_authorized():
+        return jsonify({'error': 'Forbidden'}), 403
+    try:
+        ruleset = kb_system.kb.reload()
+    except ValueError as e:
+        return jsonify({'error': str(e), **ruleset_status(kb_system.kb.snapshot())}), 400
+    return jsonify(ruleset_status(ruleset))
+
+def parse_batch_request():
+    """Read the (n_rows, n_features) matrix and model list of a batch request"""
+    if request.mimetype in NPY_CONTENT_TYPES:
+        try:
+            features = np.load(io.BytesIO(request.get_data()), allow_pickle=False)
+        except Exception as e:
+            raise ValueError(f'Invalid .npy body: {e}')
+        model_names = request.args.getlist('model')
+        if 'models' in request.args:
+            model_names += request.args['models'].split(',')
+    else:
+        data = json_object()
+        if 'features' not in data:
+            raise ValueError('features is required')
+        features = data['features']
+        model_names = data.get('models') or [data.get('model', 'logreg')]
+
+    model_names = model_list(model_names or ['logreg'])
+    features = to_matrix(features)
+    if features.shape[0] == 0:
+        raise ValueError('features is empty')
+    return features, model_names
 
 if __name__ == '__main__':
     port = int(os.environ.get('PORT', 5000))
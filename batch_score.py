@@ -0,0 +1,228 @@
+"""
+Batch Scoring Offline
+=====================
+Menskor file CSV besar (dataset/*.csv atau creditcard_2023.csv berukuran
+beberapa GB) dari command line tanpa browser. File dibaca per chunk
+berukuran tetap, setiap chunk diskor dengan model yang dipilih dan Knowledge
+Base (evaluate_batch), lalu hasilnya langsung ditulis ke CSV/Parquet.
+Memori tetap konstan berapa pun ukuran file.
+
+Dengan --workers > 1 chunk diskor paralel di beberapa proses; jumlah chunk
+yang sedang diproses dibatasi (2 x workers) dan hasil tetap ditulis sesuai
+urutan input.
+
+Penggunaan (dari root repository):
+    python batch_score.py dataset/test-2.csv -o scored.csv --models xgb logreg
+    python batch_score.py creditcard_2023.csv -o scored.parquet --workers 4 --chunksize 100000
+
+Output per baris: id, Class (jika ada di input), prob_<model> dan
+pred_<model> untuk setiap model, ml_probability (rata-rata probabilitas
+model) dan, kecuali --no-kb, final_prediction, final_risk_score,
+risk_adjustment, confidence_level serta rules_fired (dipisah ';').
+Output Parquet membutuhkan pyarrow.
+"""
+
+import argparse
+import os
+import sys
+import time
+import warnings
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Iterator, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from inference import DECISION_THRESHOLD, InferenceCore
+from knowledge_base import create_fraud_detection_system
+from model_registry import MODEL_FILES, ModelRegistry
+from transaction_features import FEATURE_NAMES
+
+
+DEFAULT_CHUNKSIZE = 50_000
+LABEL_COLUMN = 'Class'
+
+
+class ChunkScorer:
+    """
+    Skor satu chunk DataFrame dengan model terpilih dan Knowledge Base
+    """
+
+    def __init__(self, models: List[str], use_kb: bool = True, registry: Optional[ModelRegistry] = None):
+        self.models = list(dict.fromkeys(models))
+        self.use_kb = use_kb
+        self.core = InferenceCore(registry or ModelRegistry(), max_workers=1)
+        self.kb_system = create_fraud_detection_system() if use_kb else None
+
+    def score(self, chunk: pd.DataFrame) -> pd.DataFrame:
+        """
+        Raises:
+            ValueError: kolom fitur tidak lengkap
+        """
+        missing = [name for name in FEATURE_NAMES if name not in chunk.columns]
+        if missing:
+            raise ValueError(f"Input is missing feature columns: {', '.join(missing)}")
+        features = np.ascontiguousarray(chunk[list(FEATURE_NAMES)].to_numpy(dtype=np.float64))
+
+        out = {'id': chunk['id'].to_numpy()}
+        if LABEL_COLUMN in chunk.columns:
+            out[LABEL_COLUMN] = chunk[LABEL_COLUMN].to_numpy()
+
+        scores = self.core.score_many(self.models, features)
+        for name in self.models:
+            out[f'prob_{name}'] = scores[name].probabilities
+            out[f'pred_{name}'] = scores[name].predictions
+        ml_probs = np.mean([scores[name].probabilities for name in self.models], axis=0)
+        out['ml_probability'] = ml_probs
+
+        if self.use_kb:
+            kb_result = self.kb_system.infer_batch(
+                features, ml_probs, (ml_probs > DECISION_THRESHOLD).astype(int)
+            )
+            out['final_prediction'] = kb_result['final_prediction']
+            out['final_risk_score'] = kb_result['final_risk_score']
+            out['risk_adjustment'] = kb_result['risk_adjustment']
+            out['confidence_level'] = kb_result['confidence_level']
+            out['rules_fired'] = [';'.join(ids) for ids in kb_result['rules_fired']]
+
+        return pd.DataFrame(out, index=chunk.index)
+
+
+# Per-process scorer for --workers > 1; models are loaded once per worker
+_worker_scorer = None
+
+
+def _init_worker(models: List[str], use_kb: bool):
+    global _worker_scorer
+    warnings.filterwarnings('ignore', category=UserWarning)
+    _worker_scorer = ChunkScorer(models, use_kb)
+
+
+def _score_in_worker(chunk: pd.DataFrame) -> pd.DataFrame:
+    return _worker_scorer.score(chunk)
+
+
+def score_chunks(chunks: Iterator[pd.DataFrame], models: List[str], use_kb: bool = True,
+                 workers: int = 1, registry: Optional[ModelRegistry] = None) -> Iterator[pd.DataFrame]:
+    """
+    Skor chunk satu per satu, hasil mengikuti urutan input
+
+    Dengan workers > 1 paling banyak 2 x workers chunk berada di memori
+    sekaligus, sehingga pembacaan tidak pernah mendahului penulisan terlalu jauh.
+    Registry yang sudah berisi model dapat dipakai ulang pada mode satu proses.
+    """
+    if workers <= 1:
+        scorer = ChunkScorer(models, use_kb, registry)
+        for chunk in chunks:
+            yield scorer.score(chunk)
+        return
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                             initargs=(models, use_kb)) as executor:
+        pending = deque()
+        for chunk in chunks:
+            pending.append(executor.submit(_score_in_worker, chunk))
+            if len(pending) >= 2 * workers:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+
+class CsvSink:
+    """Tulis hasil ke CSV secara bertahap (header hanya pada chunk pertama)"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._header = True
+
+    def write(self, frame: pd.DataFrame):
+        frame.to_csv(self.path, mode='w' if self._header else 'a', header=self._header, index=False)
+        self._header = False
+
+    def close(self):
+        pass
+
+
+class ParquetSink:
+    """Tulis hasil ke Parquet, satu row group per chunk"""
+
+    def __init__(self, path: str):
+        try:
+            import pyarrow  # noqa: F401
+        except ImportError:
+            raise SystemExit('Parquet output requires pyarrow: pip install pyarrow')
+        self.path = path
+        self._writer = None
+
+    def write(self, frame: pd.DataFrame):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        table = pa.Table.from_pandas(frame, preserve_index=False)
+        if self._writer is None:
+            self._writer = pq.ParquetWriter(self.path, table.schema)
+        self._writer.write_table(table)
+
+    def close(self):
+        if self._writer is not None:
+            self._writer.close()
+
+
+def open_sink(path: str):
+    """Pilih format output dari ekstensi file"""
+    if path.endswith('.parquet'):
+        return ParquetSink(path)
+    return CsvSink(path)
+
+
+def score_file(input_path: str, output_path: str, models: List[str], use_kb: bool = True,
+               chunksize: int = DEFAULT_CHUNKSIZE, workers: int = 1) -> Dict:
+    """
+    Skor satu file CSV dan tulis hasilnya; mengembalikan ringkasan run
+    """
+    start = time.perf_counter()
+    rows = 0
+    flagged = 0
+    flag_column = 'final_prediction' if use_kb else f'pred_{models[0]}'
+    sink = open_sink(output_path)
+    try:
+        chunks = pd.read_csv(input_path, chunksize=chunksize)
+        for scored in score_chunks(chunks, models, use_kb, workers):
+            sink.write(scored)
+            rows += len(scored)
+            flagged += int(scored[flag_column].sum())
+    finally:
+        sink.close()
+    elapsed = time.perf_counter() - start
+    return {
+        'input': input_path,
+        'output': output_path,
+        'rows': rows,
+        'flagged': flagged,
+        'seconds': elapsed,
+        'rows_per_second': rows / elapsed if elapsed else 0.0,
+    }
+
+
+def main(argv: Optional[list] = None):
+    parser = argparse.ArgumentParser(description='Skor file CSV transaksi per chunk dengan model ML dan Knowledge Base')
+    parser.add_argument('input', help='file CSV input dengan kolom id, V1-V28, Amount')
+    parser.add_argument('-o', '--output', help='file output .csv atau .parquet (default: <input>_scored.csv)')
+    parser.add_argument('--models', nargs='+', default=['xgb'], choices=sorted(MODEL_FILES))
+    parser.add_argument('--chunksize', type=int, default=DEFAULT_CHUNKSIZE)
+    parser.add_argument('--workers', type=int, default=1, help='jumlah proses untuk paralelisme chunk')
+    parser.add_argument('--no-kb', action='store_true', help='lewati evaluasi Knowledge Base')
+    args = parser.parse_args(argv)
+    warnings.filterwarnings('ignore', category=UserWarning)
+
+    output = args.output or os.path.splitext(args.input)[0] + '_scored.csv'
+    summary = score_file(args.input, output, args.models, use_kb=not args.no_kb,
+                         chunksize=max(1, args.chunksize), workers=args.workers)
+    print(f"{summary['rows']} rows scored in {summary['seconds']:.2f}s "
+          f"({summary['rows_per_second']:.0f} rows/s), {summary['flagged']} flagged -> {summary['output']}",
+          file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main()
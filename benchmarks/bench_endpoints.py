@@ -0,0 +1,309 @@
+"""
+Benchmark Latensi Endpoint Prediksi
+===================================
+Mengukur /predict, /predict_ensemble, /predict_weighted, /predict_sequential
+dan /predict_with_kb dengan baris yang diambil acak (seed tetap) dari
+dataset/test-*.csv, lewat dua target:
+
+- client   : Flask test client di proses ini (tanpa jaringan / WSGI server)
+- gunicorn : server gunicorn lokal, request HTTP sungguhan
+
+Untuk setiap skenario (endpoint + model) dilaporkan latensi p50/p95/p99,
+throughput (request berurutan dari satu klien), dan latensi request pertama
+(model dimuat saat dipakai pertama kali). Per target dilaporkan cold start
+(import app / boot gunicorn sampai siap melayani) dan RSS. Juga diukur
+evaluasi Knowledge Base saja (InferenceEngine.infer) tanpa HTTP.
+
+Cache prediksi dimatikan (PREDICTION_CACHE_SIZE=0) kecuali --cache, karena
+sampel yang diulang akan menjadi cache hit dan tidak mengukur inferensi.
+
+Hasil ditulis sebagai JSON (default benchmarks/results/<commit>.json) dan
+bisa dibandingkan dengan hasil commit lain; exit code 1 jika ada regresi.
+
+Penggunaan (dari root repository):
+    python benchmarks/bench_endpoints.py [--targets client gunicorn] [--requests 200]
+    python benchmarks/bench_endpoints.py --compare benchmarks/results/<commit>.json
+"""
+
+import argparse
+import glob
+import json
+import os
+import platform
+import signal
+import subprocess
+import sys
+import time
+import urllib.error
+import urllib.request
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from bench_rss import ROOT, _children, _smaps_rollup, _wait_ready
+
+sys.path.insert(0, ROOT)
+
+from transaction_features import FEATURE_NAMES
+
+
+PAIR_ENDPOINTS = ('/predict_ensemble', '/predict_weighted', '/predict_sequential')
+SINGLE_ENDPOINTS = ('/predict', '/predict_with_kb')
+
+
+def sample_rows(pattern, count, seed):
+    """Baris fitur acak (urutan FEATURE_NAMES) dari semua file yang cocok"""
+    paths = sorted(glob.glob(os.path.join(ROOT, pattern)))
+    if not paths:
+        raise FileNotFoundError(f'no dataset matches {pattern}')
+    frame = pd.concat([pd.read_csv(path, usecols=list(FEATURE_NAMES)) for path in paths])
+    rng = np.random.default_rng(seed)
+    picked = rng.choice(len(frame), size=min(count, len(frame)), replace=False)
+    return frame[list(FEATURE_NAMES)].to_numpy()[picked].tolist()
+
+
+def scenarios(models, pair):
+    """(nama, endpoint, model, payload tanpa fitur) untuk setiap skenario"""
+    result = []
+    for endpoint in SINGLE_ENDPOINTS:
+        for model in models:
+            result.append((f'{endpoint}[{model}]', endpoint, model, {'model': model}))
+    model1, model2 = pair
+    for endpoint in PAIR_ENDPOINTS:
+        result.append((f'{endpoint}[{model1}+{model2}]', endpoint, f'{model1}+{model2}',
+                       {'model1': model1, 'model2': model2}))
+    return result
+
+
+def summarize(samples):
+    """Persentil latensi (ms) dan throughput dari daftar durasi (detik)"""
+    ms = np.asarray(samples) * 1e3
+    return {
+        'requests': len(ms),
+        'p50_ms': float(np.percentile(ms, 50)),
+        'p95_ms': float(np.percentile(ms, 95)),
+        'p99_ms': float(np.percentile(ms, 99)),
+        'mean_ms': float(ms.mean()),
+        'throughput_rps': float(len(ms) / (ms.sum() / 1e3)),
+    }
+
+
+def run_scenarios(send, rows, cases, n_requests, warmup):
+    results = {}
+    by_endpoint = {}
+    for name, endpoint, model, payload in cases:
+        started = time.perf_counter()
+        status = send(endpoint, dict(payload, features=[rows[0]]))
+        first_ms = (time.perf_counter() - started) * 1e3
+        if status != 200:
+            print(f'  {name:<44} skipped: HTTP {status}')
+            continue
+        for i in range(warmup):
+            send(endpoint, dict(payload, features=[rows[i % len(rows)]]))
+
+        samples = []
+        for i in range(n_requests):
+            body = dict(payload, features=[rows[i % len(rows)]])
+            started = time.perf_counter()
+            status = send(endpoint, body)
+            samples.append(time.perf_counter() - started)
+            if status != 200:
+                raise RuntimeError(f'{name} returned HTTP {status}')
+        stats = dict(summarize(samples), endpoint=endpoint, model=model, first_request_ms=first_ms)
+        results[name] = stats
+        by_endpoint.setdefault(endpoint, []).extend(samples)
+        print(f"  {name:<44} {stats['p50_ms']:>8.2f} {stats['p95_ms']:>8.2f} {stats['p99_ms']:>8.2f} "
+              f"{stats['throughput_rps']:>9.1f} {first_ms:>9.1f}")
+    endpoints = {endpoint: summarize(samples) for endpoint, samples in by_endpoint.items()}
+    return results, endpoints
+
+
+def _print_header(target):
+    print(f"\n[{target}]")
+    print(f"  {'scenario':<44} {'p50':>8} {'p95':>8} {'p99':>8} {'req/s':>9} {'first':>9}  (ms)")
+
+
+def bench_client(rows, models, pair, args):
+    _print_header('client')
+    started = time.perf_counter()
+    import app as app_module
+    cold_start = time.perf_counter() - started
+    client = app_module.app.test_client()
+
+    def send(endpoint, body):
+        return client.post(endpoint, json=body).status_code
+
+    available = [model for model in models if model in app_module.model_registry.available()]
+    results, endpoints = run_scenarios(send, rows, scenarios(available, pair), args.requests, args.warmup)
+    return {
+        'cold_start_seconds': cold_start,
+        'memory': _smaps_rollup(os.getpid()),
+        'scenarios': results,
+        'endpoints': endpoints,
+        'kb_engine': bench_kb_engine(app_module.kb_system, rows, args.requests),
+    }
+
+
+def bench_kb_engine(kb_system, rows, n_requests):
+    """Evaluasi Knowledge Base saja, dengan beberapa variasi hasil ML"""
+    from transaction_features import features_dict, to_matrix
+
+    features = [features_dict(to_matrix([row])[0]) for row in rows]
+    ml_results = [
+        {'prediction': int(prob > 0.5), 'probability': prob, 'accuracy': 0.95}
+        for prob in (0.05, 0.45, 0.75, 0.97)
+    ]
+    samples = []
+    for i in range(n_requests):
+        started = time.perf_counter()
+        kb_system.infer(features[i % len(features)], ml_results[i % len(ml_results)])
+        samples.append(time.perf_counter() - started)
+    stats = summarize(samples)
+    print(f"  {'KB engine (infer)':<44} {stats['p50_ms']:>8.3f} {stats['p95_ms']:>8.3f} "
+          f"{stats['p99_ms']:>8.3f} {stats['throughput_rps']:>9.1f}")
+    return stats
+
+
+def bench_gunicorn(rows, models, pair, args, env):
+    _print_header('gunicorn')
+    started = time.time()
+    master = subprocess.Popen(
+        [sys.executable, '-m', 'gunicorn', 'app:app', '--workers', str(args.workers),
+         '--bind', f'127.0.0.1:{args.port}'],
+        cwd=ROOT, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    base_url = f'http://127.0.0.1:{args.port}'
+
+    def send(endpoint, body):
+        request = urllib.request.Request(
+            base_url + endpoint, data=json.dumps(body).encode(),
+            headers={'Content-Type': 'application/json'}
+        )
+        try:
+            with urllib.request.urlopen(request, timeout=60) as response:
+                response.read()
+                return response.status
+        except urllib.error.HTTPError as e:
+            return e.code
+
+    try:
+        if not _wait_ready(args.port, args.timeout):
+            raise RuntimeError('gunicorn did not become ready')
+        cold_start = time.time() - started
+        with urllib.request.urlopen(base_url + '/models', timeout=10) as response:
+            available = json.load(response).get('available', [])
+        cases = scenarios([model for model in models if model in available], pair)
+        results, endpoints = run_scenarios(send, rows, cases, args.requests, args.warmup)
+        workers = [_smaps_rollup(pid) for pid in _children(master.pid)]
+        return {
+            'cold_start_seconds': cold_start,
+            'workers': len(workers),
+            'memory': {
+                'master': _smaps_rollup(master.pid),
+                'per_worker': {
+                    key: sum(w[key] for w in workers) / len(workers) for key in ('rss_mb', 'pss_mb', 'uss_mb')
+                } if workers else {},
+            },
+            'scenarios': results,
+            'endpoints': endpoints,
+        }
+    finally:
+        master.send_signal(signal.SIGTERM)
+        master.wait(timeout=30)
+
+
+def _git(*args):
+    try:
+        return subprocess.run(['git', *args], cwd=ROOT, capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(current, baseline_path, tolerance):
+    """Cetak rasio p50/p95 terhadap baseline; kembalikan daftar regresi"""
+    with open(baseline_path) as f:
+        baseline = json.load(f)
+    base_commit = baseline['meta'].get('commit') or '?'
+    print(f"\ncompare with {base_commit[:12]} (tolerance {tolerance:.0%})")
+    regressions = []
+    for target, result in current['targets'].items():
+        base_target = baseline.get('targets', {}).get(target)
+        if not base_target:
+            continue
+        for name, stats in result['scenarios'].items():
+            base = base_target['scenarios'].get(name)
+            if not base:
+                continue
+            ratios = {key: stats[key] / base[key] for key in ('p50_ms', 'p95_ms') if base[key] > 0}
+            worse = [key for key, ratio in ratios.items() if ratio > 1 + tolerance]
+            marker = '  REGRESSION' if worse else ''
+            print(f"  {target:<9} {name:<44} p50 x{ratios.get('p50_ms', 1):.2f}  "
+                  f"p95 x{ratios.get('p95_ms', 1):.2f}{marker}")
+            regressions.extend(f'{target} {name} {key}' for key in worse)
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--targets', nargs='+', default=['client', 'gunicorn'], choices=['client', 'gunicorn'])
+    parser.add_argument('--models', nargs='+', default=['logreg', 'dt', 'rf', 'gb', 'xgb', 'knn', 'svm'])
+    parser.add_argument('--pair', nargs=2, default=['logreg', 'xgb'],
+                        help='model1 model2 untuk endpoint ensemble/weighted/sequential')
+    parser.add_argument('--dataset', default=os.path.join('dataset', 'test-*.csv'))
+    parser.add_argument('--rows', type=int, default=500)
+    parser.add_argument('--requests', type=int, default=200)
+    parser.add_argument('--warmup', type=int, default=10)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--workers', type=int, default=1)
+    parser.add_argument('--port', type=int, default=8766)
+    parser.add_argument('--timeout', type=float, default=120)
+    parser.add_argument('--cache', action='store_true', help='biarkan cache prediksi aktif')
+    parser.add_argument('--output', help='file JSON hasil (default benchmarks/results/<commit>.json)')
+    parser.add_argument('--compare', help='file JSON hasil commit lain sebagai baseline')
+    parser.add_argument('--tolerance', type=float, default=0.2, help='kenaikan latensi yang masih diterima')
+    args = parser.parse_args()
+
+    if not args.cache:
+        os.environ['PREDICTION_CACHE_SIZE'] = '0'
+    env = dict(os.environ)
+    # The app resolves model and rule files relative to the working directory
+    os.chdir(ROOT)
+
+    rows = sample_rows(args.dataset, args.rows, args.seed)
+    commit = _git('rev-parse', 'HEAD')
+    report = {
+        'meta': {
+            'commit': commit,
+            'dirty': bool(_git('status', '--porcelain', '--untracked-files=no')),
+            'timestamp': datetime.now().isoformat(),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'cpu_count': os.cpu_count(),
+            'args': vars(args),
+        },
+        'targets': {},
+    }
+    for target in args.targets:
+        if target == 'client':
+            report['targets'][target] = bench_client(rows, args.models, args.pair, args)
+        else:
+            report['targets'][target] = bench_gunicorn(rows, args.models, args.pair, args, env)
+        print(f"  cold start {report['targets'][target]['cold_start_seconds']:.2f} s")
+
+    output = args.output or os.path.join(ROOT, 'benchmarks', 'results', f"{(commit or 'unknown')[:12]}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f'\nresults written to {output}')
+
+    if args.compare:
+        regressions = compare(report, args.compare, args.tolerance)
+        if regressions:
+            print(f'{len(regressions)} regression(s)')
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,83 @@
+"""
+Benchmark Feature Marshalling
+=============================
+Membandingkan latensi satu transaksi (marshalling + predict + predict_proba)
+antara jalur lama (pandas DataFrame per request, model dengan nama fitur)
+dan jalur baru (to_matrix + model tanpa validasi nama fitur).
+
+Penggunaan (dari root repository):
+    python benchmarks/bench_features.py [--models logreg dt xgb] [--repeat 500]
+"""
+
+import argparse
+import os
+import sys
+import time
+import warnings
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from model_registry import ModelRegistry, _load_pickle, _load_xgb
+from transaction_features import FEATURE_NAMES, to_matrix
+
+
+def _percentiles(samples):
+    samples_us = np.asarray(samples) * 1e6
+    return np.percentile(samples_us, 50), np.percentile(samples_us, 99)
+
+
+def _time_path(score, rows, repeat):
+    samples = []
+    for i in range(repeat):
+        row = rows[i % len(rows)]
+        start = time.perf_counter()
+        score(row)
+        samples.append(time.perf_counter() - start)
+    return _percentiles(samples)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--models', nargs='+', default=['logreg', 'dt', 'gb', 'xgb', 'knn'])
+    parser.add_argument('--repeat', type=int, default=500)
+    parser.add_argument('--dataset', default=os.path.join('dataset', 'test-1.csv'))
+    args = parser.parse_args()
+    warnings.filterwarnings('ignore', category=UserWarning)
+
+    registry = ModelRegistry()
+    df = pd.read_csv(args.dataset)
+    rows = df[list(FEATURE_NAMES)].to_numpy()[:200].tolist()
+    feature_names = list(FEATURE_NAMES)
+
+    print(f"{'model':<10} {'old p50':>10} {'old p99':>10} {'new p50':>10} {'new p99':>10} {'speedup':>8}  (us)")
+    for name in args.models:
+        path = registry.path(name)
+        if not os.path.exists(path):
+            print(f'{name:<10} skipped: {path} not found')
+            continue
+        # Original model object, feature names intact
+        legacy = _load_xgb(path) if path.endswith('.json') else _load_pickle(path)
+        fast = registry.get(name)
+
+        def old_path(row, model=legacy):
+            features = np.array(row).reshape(1, -1)
+            features_df = pd.DataFrame(features, columns=feature_names)
+            model.predict(features_df)
+            model.predict_proba(features_df)
+
+        def new_path(row, model=fast):
+            features = to_matrix(row)
+            model.predict(features)
+            model.predict_proba(features)
+
+        old_p50, old_p99 = _time_path(old_path, rows, args.repeat)
+        new_p50, new_p99 = _time_path(new_path, rows, args.repeat)
+        print(f'{name:<10} {old_p50:>10.0f} {old_p99:>10.0f} {new_p50:>10.0f} {new_p99:>10.0f} '
+              f'{old_p50 / new_p50:>7.1f}x')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,86 @@
+"""
+Benchmark Jalur Cepat Linear/SVM
+================================
+Membandingkan predict_proba sklearn (LogisticRegression, SVC) dengan
+FastLogisticRegression/FastSVC dari fast_linear.py untuk batch 1 baris
+(p50/p99 per panggilan) dan batch besar (waktu per batch), serta memeriksa
+selisih probabilitas maksimum terhadap model asli.
+
+Penggunaan (dari root repository):
+    python benchmarks/bench_linear.py [--models logreg svm] [--batch 10000]
+"""
+
+import argparse
+import os
+import sys
+import time
+import warnings
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from dataset_store import load_dataset
+from fast_linear import compare, compile_fast
+from model_registry import ModelRegistry
+
+
+def _single_row(predict_proba, rows, repeat):
+    samples = []
+    for i in range(repeat):
+        row = rows[i % len(rows)]
+        start = time.perf_counter()
+        predict_proba(row)
+        samples.append(time.perf_counter() - start)
+    samples_us = np.asarray(samples) * 1e6
+    return np.percentile(samples_us, 50), np.percentile(samples_us, 99)
+
+
+def _batch(predict_proba, X, repeat):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        predict_proba(X)
+        best = min(best, time.perf_counter() - start)
+    return best * 1e3
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--models', nargs='*', default=['logreg', 'svm'])
+    parser.add_argument('--dataset', default=os.path.join('dataset', 'test-2.csv'))
+    parser.add_argument('--batch', type=int, default=10000)
+    parser.add_argument('--repeat', type=int, default=200)
+    parser.add_argument('--batch-repeat', type=int, default=5)
+    args = parser.parse_args()
+    warnings.filterwarnings('ignore', category=UserWarning)
+
+    registry = ModelRegistry(fast=())
+    models = {}
+    for name in args.models:
+        if name in registry.available():
+            models[name] = registry.get(name)
+        else:
+            print(f'{name:<10} skipped: {registry.path(name)} not found')
+
+    X = load_dataset(args.dataset).matrix()
+    # Repeat rows to reach the batch size when the dataset is smaller
+    X_batch = np.resize(X, (args.batch, X.shape[1]))
+    rows = [X[i:i + 1] for i in range(min(len(X), 500))]
+
+    print(f"{'model':<10} {'max |dp|':>9} {'1-row p50':>10} {'fast p50':>9} {'1-row p99':>10} {'fast p99':>9} "
+          f"{'speedup':>8} {f'{args.batch}-row':>10} {'fast':>9} {'speedup':>8}")
+    print(f"{'':<10} {'':>9} {'(us)':>10} {'(us)':>9} {'(us)':>10} {'(us)':>9} {'':>8} {'(ms)':>10} {'(ms)':>9}")
+    for name, model in models.items():
+        fast = compile_fast(model)
+        diff = compare(model, fast, X)['max_abs_diff']
+        old_p50, old_p99 = _single_row(model.predict_proba, rows, args.repeat)
+        new_p50, new_p99 = _single_row(fast.predict_proba, rows, args.repeat)
+        old_batch = _batch(model.predict_proba, X_batch, args.batch_repeat)
+        new_batch = _batch(fast.predict_proba, X_batch, args.batch_repeat)
+        print(f'{name:<10} {diff:>9.1e} {old_p50:>10.0f} {new_p50:>9.0f} {old_p99:>10.0f} {new_p99:>9.0f} '
+              f'{old_p50 / new_p50:>7.1f}x {old_batch:>10.1f} {new_batch:>9.1f} {old_batch / new_batch:>7.1f}x')
+
+
+if __name__ == '__main__':
+    main()
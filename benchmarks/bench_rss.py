@@ -0,0 +1,115 @@
+"""
+Benchmark Memori Worker Gunicorn
+================================
+Menjalankan gunicorn dengan beberapa worker untuk setiap mode MODEL_PRELOAD
+lalu membaca /proc/<pid>/smaps_rollup setiap worker (Linux saja).
+
+- RSS : memori resident worker (termasuk halaman yang dibagi dengan master)
+- PSS : porsi proporsional, halaman bersama dibagi rata ke semua proses
+- USS : memori privat worker (yang bertambah untuk setiap worker baru)
+
+Penggunaan (dari root repository):
+    python benchmarks/bench_rss.py [--workers 4] [--modes worker master]
+"""
+
+import argparse
+import os
+import signal
+import subprocess
+import sys
+import time
+import urllib.request
+
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _smaps_rollup(pid):
+    values = {}
+    with open(f'/proc/{pid}/smaps_rollup') as f:
+        for line in f:
+            parts = line.split()
+            if len(parts) >= 2 and parts[1].isdigit():
+                values[parts[0].rstrip(':')] = int(parts[1])
+    return {
+        'rss_mb': values.get('Rss', 0) / 1024,
+        'pss_mb': values.get('Pss', 0) / 1024,
+        'uss_mb': (values.get('Private_Clean', 0) + values.get('Private_Dirty', 0)) / 1024,
+    }
+
+
+def _children(pid):
+    children = []
+    for entry in os.listdir('/proc'):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f'/proc/{entry}/stat') as f:
+                fields = f.read().rsplit(')', 1)[1].split()
+        except OSError:
+            continue
+        if int(fields[1]) == pid:
+            children.append(int(entry))
+    return children
+
+
+def _wait_ready(port, timeout):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            with urllib.request.urlopen(f'http://127.0.0.1:{port}/models', timeout=1):
+                return True
+        except OSError:
+            time.sleep(0.5)
+    return False
+
+
+def measure(mode, workers, port, timeout):
+    env = dict(os.environ, MODEL_PRELOAD=mode)
+    started = time.time()
+    master = subprocess.Popen(
+        [sys.executable, '-m', 'gunicorn', 'app:app', '--workers', str(workers),
+         '--bind', f'127.0.0.1:{port}'],
+        cwd=ROOT, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    try:
+        if not _wait_ready(port, timeout):
+            raise RuntimeError(f'gunicorn ({mode}) did not become ready')
+        # Give every worker time to finish booting/preloading
+        time.sleep(3)
+        ready_seconds = time.time() - started
+        worker_pids = _children(master.pid)
+        stats = [_smaps_rollup(pid) for pid in worker_pids]
+        return {
+            'mode': mode,
+            'workers': len(stats),
+            'ready_seconds': ready_seconds,
+            'master': _smaps_rollup(master.pid),
+            'per_worker': {
+                key: sum(s[key] for s in stats) / len(stats) for key in ('rss_mb', 'pss_mb', 'uss_mb')
+            },
+            'total_pss_mb': _smaps_rollup(master.pid)['pss_mb'] + sum(s['pss_mb'] for s in stats),
+        }
+    finally:
+        master.send_signal(signal.SIGTERM)
+        master.wait(timeout=30)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--workers', type=int, default=4)
+    parser.add_argument('--modes', nargs='+', default=['worker', 'master'])
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--timeout', type=float, default=120)
+    args = parser.parse_args()
+
+    print(f"{'mode':<8} {'workers':>7} {'RSS/worker':>11} {'PSS/worker':>11} {'USS/worker':>11} {'total PSS':>10}  (MB)")
+    for mode in args.modes:
+        result = measure(mode, args.workers, args.port, args.timeout)
+        per_worker = result['per_worker']
+        print(f"{mode:<8} {result['workers']:>7} {per_worker['rss_mb']:>11.1f} {per_worker['pss_mb']:>11.1f} "
+              f"{per_worker['uss_mb']:>11.1f} {result['total_pss_mb']:>10.1f}")
+
+
+if __name__ == '__main__':
+    main()
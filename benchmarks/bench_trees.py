@@ -0,0 +1,92 @@
+"""
+Benchmark Prediktor Pohon Terkompilasi
+======================================
+Membandingkan predict_proba model asli (sklearn/XGBoost) dengan
+FlatTreeEnsemble dari tree_compiler.py untuk batch 1 baris (p50/p99 per
+panggilan) dan batch besar (waktu per batch), serta memeriksa selisih
+probabilitas maksimum terhadap model asli.
+
+Penggunaan (dari root repository):
+    python benchmarks/bench_trees.py [--models dt gb adaboost xgb] [--batch 10000]
+    python benchmarks/bench_trees.py --files rf="ml model/old model/rf_model.pkl"
+"""
+
+import argparse
+import os
+import sys
+import time
+import warnings
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from dataset_store import load_dataset
+from model_registry import ModelRegistry, _load_pickle
+from tree_compiler import compare, compile_model
+
+
+def _single_row(predict_proba, rows, repeat):
+    samples = []
+    for i in range(repeat):
+        row = rows[i % len(rows)]
+        start = time.perf_counter()
+        predict_proba(row)
+        samples.append(time.perf_counter() - start)
+    samples_us = np.asarray(samples) * 1e6
+    return np.percentile(samples_us, 50), np.percentile(samples_us, 99)
+
+
+def _batch(predict_proba, X, repeat):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        predict_proba(X)
+        best = min(best, time.perf_counter() - start)
+    return best * 1e3
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--models', nargs='*', default=['dt', 'rf', 'gb', 'adaboost', 'xgb'])
+    parser.add_argument('--files', nargs='*', default=[], metavar='NAME=PATH',
+                        help='model pickle tambahan di luar registry')
+    parser.add_argument('--dataset', default=os.path.join('dataset', 'test-2.csv'))
+    parser.add_argument('--batch', type=int, default=10000)
+    parser.add_argument('--repeat', type=int, default=300)
+    parser.add_argument('--batch-repeat', type=int, default=5)
+    args = parser.parse_args()
+    warnings.filterwarnings('ignore', category=UserWarning)
+
+    registry = ModelRegistry(compiled=())
+    models = {}
+    for name in args.models:
+        if name in registry.available():
+            models[name] = registry.get(name)
+        else:
+            print(f'{name:<10} skipped: {registry.path(name)} not found')
+    for item in args.files:
+        name, path = item.split('=', 1)
+        models[name] = _load_pickle(path)
+
+    X = load_dataset(args.dataset).matrix()
+    # Repeat rows to reach the batch size when the dataset is smaller
+    X_batch = np.resize(X, (args.batch, X.shape[1]))
+    rows = [X[i:i + 1] for i in range(min(len(X), 500))]
+
+    print(f"{'model':<10} {'max |dp|':>9} {'1-row p50':>10} {'fast p50':>9} {'1-row p99':>10} {'fast p99':>9} "
+          f"{'speedup':>8} {f'{args.batch}-row':>10} {'fast':>9} {'speedup':>8}")
+    print(f"{'':<10} {'':>9} {'(us)':>10} {'(us)':>9} {'(us)':>10} {'(us)':>9} {'':>8} {'(ms)':>10} {'(ms)':>9}")
+    for name, model in models.items():
+        compiled = compile_model(model)
+        diff = compare(model, compiled, X)['max_abs_diff']
+        old_p50, old_p99 = _single_row(model.predict_proba, rows, args.repeat)
+        new_p50, new_p99 = _single_row(compiled.predict_proba, rows, args.repeat)
+        old_batch = _batch(model.predict_proba, X_batch, args.batch_repeat)
+        new_batch = _batch(compiled.predict_proba, X_batch, args.batch_repeat)
+        print(f'{name:<10} {diff:>9.1e} {old_p50:>10.0f} {new_p50:>9.0f} {old_p99:>10.0f} {new_p99:>9.0f} '
+              f'{old_p50 / new_p50:>7.1f}x {old_batch:>10.1f} {new_batch:>9.1f} {old_batch / new_batch:>7.1f}x')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,145 @@
+"""
+Cascade (Early-Exit) Inference
+==============================
+Generalisasi /predict_sequential menjadi kaskade banyak tahap, misalnya
+logreg -> dt -> xgb -> svm. Setiap tahap punya pita ketidakpastian
+(low, high): baris dengan probabilitas <= low atau >= high dianggap cukup
+yakin dan keluar di tahap itu, sisanya diteruskan ke model berikutnya yang
+lebih mahal. Tahap terakhir selalu memutuskan semua baris yang tersisa.
+
+Dalam mode batch hanya subset baris yang belum yakin yang dikirim ke model
+berikutnya, sehingga sebagian besar trafik dilayani model yang murah.
+"""
+
+import threading
+from typing import Dict, Iterable, List, NamedTuple, Optional
+
+import numpy as np
+
+from inference import DECISION_THRESHOLD, InferenceCore
+
+
+class CascadeStage(NamedTuple):
+    """Satu tahap kaskade: model dan pita ketidakpastian (low, high)"""
+    model: str
+    low: float
+    high: float
+
+
+DEFAULT_CASCADE = (
+    CascadeStage('logreg', 0.01, 0.99),
+    CascadeStage('dt', 0.05, 0.95),
+    CascadeStage('xgb', 0.1, 0.9),
+    CascadeStage('svm', 0.5, 0.5),
+)
+
+
+def parse_stages(config: List[Dict], known: Optional[Iterable[str]] = None) -> List[CascadeStage]:
+    """
+    Konfigurasi JSON [{"model": ..., "low": ..., "high": ...}, ...] -> tahap
+
+    Args:
+        config: daftar tahap dari body request
+        known: nama model yang terdaftar; jika diberikan, model lain ditolak
+
+    Raises:
+        ValueError: konfigurasi kosong, bukan daftar objek, nama model bukan
+            string/tidak dikenal, atau pita tidak valid
+    """
+    if not isinstance(config, list) or not config:
+        raise ValueError('stages must be a non-empty list')
+    known = None if known is None else set(known)
+    stages = []
+    for item in config:
+        if not isinstance(item, dict) or not isinstance(item.get('model'), str):
+            raise ValueError(f'Invalid cascade stage: {item!r}')
+        if known is not None and item['model'] not in known:
+            raise ValueError(f"Unknown model: {item['model']}")
+        try:
+            stage = CascadeStage(item['model'], float(item.get('low', 0.5)), float(item.get('high', 0.5)))
+        except (TypeError, ValueError):
+            raise ValueError(f'Invalid cascade stage: {item!r}')
+        if not 0 <= stage.low <= stage.high <= 1:
+            raise ValueError(f'Stage {stage.model}: expected 0 <= low <= high <= 1')
+        stages.append(stage)
+    return stages
+
+
+class Cascade:
+    """
+    Menjalankan kaskade tahap atas satu batch dan mencatat statistik keluar
+    kumulatif per tahap
+    """
+
+    def __init__(self, core: InferenceCore, stages: List[CascadeStage]):
+        self.core = core
+        self.stages = list(stages)
+        self._lock = threading.Lock()
+        self._rows_total = 0
+        self._exits = np.zeros(len(self.stages), dtype=np.int64)
+
+    def run(self, features: np.ndarray) -> Dict:
+        """
+        Skor semua baris; setiap baris keluar di tahap pertama yang yakin
+
+        Returns:
+            Dictionary berisi probabilitas/prediksi final, indeks tahap keluar
+            per baris, probabilitas tiap tahap (NaN jika baris tidak sampai ke
+            tahap itu) dan statistik keluar per tahap untuk batch ini
+        """
+        n_rows = features.shape[0]
+        final_probs = np.empty(n_rows)
+        exit_stage = np.empty(n_rows, dtype=int)
+        stage_probs = np.full((len(self.stages), n_rows), np.nan)
+        exits = np.zeros(len(self.stages), dtype=np.int64)
+
+        pending = np.arange(n_rows)
+        for index, stage in enumerate(self.stages):
+            probs = self.core.score(stage.model, features[pending]).probabilities
+            stage_probs[index, pending] = probs
+
+            last = index == len(self.stages) - 1
+            confident = np.ones(len(pending), dtype=bool) if last else \
+                (probs <= stage.low) | (probs >= stage.high)
+            done = pending[confident]
+            final_probs[done] = probs[confident]
+            exit_stage[done] = index
+            exits[index] = len(done)
+
+            pending = pending[~confident]
+            if len(pending) == 0:
+                break
+
+        with self._lock:
+            self._rows_total += n_rows
+            self._exits += exits
+
+        return {
+            'probabilities': final_probs,
+            'predictions': (final_probs > DECISION_THRESHOLD).astype(int),
+            'exit_stage': exit_stage,
+            'stage_probabilities': stage_probs,
+            'stage_stats': self._stage_stats(exits, n_rows),
+        }
+
+    def _stage_stats(self, exits: np.ndarray, n_rows: int) -> List[Dict]:
+        stats = []
+        entered = n_rows
+        for stage, exited in zip(self.stages, exits.tolist()):
+            stats.append({
+                'model': stage.model,
+                'low': stage.low,
+                'high': stage.high,
+                'entered': entered,
+                'exited': exited,
+                'exit_fraction': exited / n_rows if n_rows else 0.0,
+            })
+            entered -= exited
+        return stats
+
+    def stats(self) -> Dict:
+        """Statistik kumulatif sejak cascade ini dibuat"""
+        with self._lock:
+            exits = self._exits.copy()
+            rows_total = self._rows_total
+        return {'rows_total': rows_total, 'stages': self._stage_stats(exits, rows_total)}
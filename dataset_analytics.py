@@ -0,0 +1,309 @@
+"""
+Analitik Dataset di Server
+==========================
+Agregat untuk halaman Dashboard, Visualizations, Analysis, Amount Trends dan
+Feature dihitung sekali di server dengan operasi vektor pandas/NumPy,
+menggantikan Papa.parse + localStorage di browser yang macet untuk file di
+atas beberapa MB.
+
+CSV yang di-upload di-hash (SHA-256); hasil analitik disimpan sebagai JSON
+kecil yang sudah di-bin (siap untuk Plotly) di ANALYTICS_DIR dengan nama
+hash tersebut, sehingga upload ulang file yang sama dan semua worker
+gunicorn memakai hasil yang sama. Browser cukup menyimpan dataset_id.
+
+Bagian hasil (SECTIONS):
+- summary            : jumlah transaksi, fraud, fraud rate, rata-rata amount
+- amount_histogram   : histogram Amount per kelas dengan bin yang sama
+- amount_box         : statistik box plot Amount per kelas
+- time_buckets       : jumlah transaksi dan rata-rata amount per bucket id/3600
+- hourly             : fraud rate per jam dalam sehari (0-23)
+- feature_stats      : mean/std/min/max, korelasi dengan Class dan selisih
+                       mean fraud vs legitimate per fitur
+- feature_histograms : histogram per fitur V per kelas
+- correlation        : matriks korelasi V1-V28, Amount, Class
+
+Upload dibatasi ANALYTICS_MAX_UPLOAD_BYTES (dihitung saat streaming ke
+disk), karena analitik membaca seluruh CSV ke memori.
+
+Konfigurasi:
+- ANALYTICS_DIR: direktori cache hasil (default: analytics_cache)
+- ANALYTICS_MAX_UPLOAD_BYTES: ukuran maksimum file upload (default: 256 MiB)
+"""
+
+import hashlib
+import json
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+from typing import Dict, Optional
+
+import numpy as np
+import pandas as pd
+
+from dataset_store import UploadTooLarge
+from transaction_features import AMOUNT_INDEX, FEATURE_NAMES, TIME_INDEX, V_SLICE
+
+
+ANALYTICS_DIR = os.environ.get('ANALYTICS_DIR', 'analytics_cache')
+MAX_UPLOAD_BYTES = int(os.environ.get('ANALYTICS_MAX_UPLOAD_BYTES', 256 << 20))
+LABEL_COLUMN = 'Class'
+AMOUNT_BINS = 50
+FEATURE_BINS = 30
+TOP_FEATURES = 10
+
+SECTIONS = (
+    'summary', 'amount_histogram', 'amount_box', 'time_buckets', 'hourly',
+    'feature_stats', 'feature_histograms', 'correlation',
+)
+
+V_COLUMNS = [name for name in FEATURE_NAMES if name.startswith('V')]
+
+
+def _rounded(values: np.ndarray, decimals: int = 6) -> list:
+    """Array -> list JSON; NaN (mis. korelasi kolom konstan) menjadi None"""
+    values = np.round(np.asarray(values, dtype=float), decimals)
+    return [None if np.isnan(v) else v for v in values.tolist()]
+
+
+def _histogram(values: np.ndarray, labels: np.ndarray, bins: int) -> Dict:
+    """Histogram per kelas dengan edge yang sama untuk kedua kelas"""
+    edges = np.histogram_bin_edges(values, bins=bins)
+    return {
+        'edges': _rounded(edges),
+        'legit': np.histogram(values[labels == 0], bins=edges)[0].tolist(),
+        'fraud': np.histogram(values[labels == 1], bins=edges)[0].tolist(),
+    }
+
+
+def _box_stats(values: np.ndarray) -> Optional[Dict]:
+    """Statistik box plot (whisker 1.5 IQR) untuk trace Plotly precomputed"""
+    if len(values) == 0:
+        return None
+    q1, median, q3 = np.percentile(values, [25, 50, 75])
+    iqr = q3 - q1
+    inside = values[(values >= q1 - 1.5 * iqr) & (values <= q3 + 1.5 * iqr)]
+    return {
+        'q1': float(q1), 'median': float(median), 'q3': float(q3),
+        'lowerfence': float(inside.min()), 'upperfence': float(inside.max()),
+        'mean': float(values.mean()), 'min': float(values.min()), 'max': float(values.max()),
+    }
+
+
+def _moments(matrix: np.ndarray, block_rows: int = 1 << 16):
+    """
+    Mean, standar deviasi (populasi) dan matriks korelasi Pearson antar kolom;
+    kolom konstan menghasilkan korelasi NaN
+
+    Kovarians diakumulasi per blok baris agar tidak perlu salinan terpusat
+    dari seluruh matriks.
+    """
+    mean = matrix.mean(axis=0)
+    scatter = np.zeros((matrix.shape[1], matrix.shape[1]))
+    for start in range(0, matrix.shape[0], block_rows):
+        centered = matrix[start:start + block_rows] - mean
+        scatter += centered.T @ centered
+    root = np.sqrt(np.diag(scatter))
+    with np.errstate(divide='ignore', invalid='ignore'):
+        corr = scatter / np.outer(root, root)
+    return mean, root / np.sqrt(matrix.shape[0]), corr
+
+
+def compute_analytics(frame: pd.DataFrame) -> Dict:
+    """
+    Hitung semua bagian analitik dari DataFrame transaksi
+
+    Raises:
+        ValueError: kolom id, V1-V28, Amount atau Class tidak lengkap, atau
+            dataset kosong
+    """
+    required = list(FEATURE_NAMES) + [LABEL_COLUMN]
+    missing = [name for name in required if name not in frame.columns]
+    if missing:
+        raise ValueError(f"Dataset is missing columns: {', '.join(missing)}")
+    if frame.empty:
+        raise ValueError('Dataset is empty')
+
+    # One float64 matrix [id, V1-V28, Amount, Class]; every column below is a view
+    stat_columns = list(FEATURE_NAMES)
+    data = frame[stat_columns + [LABEL_COLUMN]].to_numpy(dtype=np.float64)
+    stat_matrix = data[:, :-1]
+    v_matrix = data[:, V_SLICE]
+    ids = data[:, TIME_INDEX]
+    amount = data[:, AMOUNT_INDEX]
+    labels = data[:, -1].astype(np.int64)
+    fraud = labels == 1
+    legit = labels == 0
+    total = len(labels)
+    n_fraud = int(fraud.sum())
+
+    summary = {
+        'total': total,
+        'fraud': n_fraud,
+        'legit': int(legit.sum()),
+        'fraud_rate': n_fraud / total,
+        'avg_amount_fraud': float(amount[fraud].mean()) if n_fraud else 0.0,
+        'avg_amount_legit': float(amount[legit].mean()) if legit.any() else 0.0,
+    }
+
+    # Buckets of id / 3600, as the original charts computed them
+    buckets = np.floor(ids / 3600).astype(np.int64)
+    bucket_values, bucket_index = np.unique(buckets, return_inverse=True)
+    bucket_count = np.bincount(bucket_index)
+    bucket_fraud = np.bincount(bucket_index, weights=fraud)
+    time_buckets = {
+        'bucket': bucket_values.tolist(),
+        'legit': (bucket_count - bucket_fraud).astype(int).tolist(),
+        'fraud': bucket_fraud.astype(int).tolist(),
+        'avg_amount': _rounded(np.bincount(bucket_index, weights=amount) / bucket_count, 4),
+    }
+
+    # Hour of day, with the same definition the Knowledge Base uses
+    hour = ((ids / 3600) % 24).astype(np.int64)
+    hour_count = np.bincount(hour, minlength=24)
+    hour_fraud = np.bincount(hour, weights=fraud, minlength=24)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        hour_rate = np.where(hour_count > 0, hour_fraud / hour_count, 0.0)
+    hourly = {
+        'hour': list(range(24)),
+        'transactions': hour_count.tolist(),
+        'fraud': hour_fraud.astype(int).tolist(),
+        'fraud_rate': _rounded(hour_rate),
+    }
+
+    mean, std, all_corr = _moments(data)
+    # Class means from column sums, so the (large) legitimate subset is never copied
+    fraud_sum = stat_matrix[fraud].sum(axis=0)
+    n_legit = total - n_fraud
+    fraud_mean = fraud_sum / n_fraud if n_fraud else np.zeros(len(stat_columns))
+    legit_mean = (mean[:-1] * total - fraud_sum) / n_legit if n_legit else np.zeros(len(stat_columns))
+    class_corr = all_corr[-1, :-1]
+    diff = np.abs(fraud_mean - legit_mean)
+    v_diff = diff[1:1 + len(V_COLUMNS)]
+    top = np.argsort(-v_diff, kind='stable')[:TOP_FEATURES]
+    feature_stats = {
+        'features': stat_columns,
+        'mean': _rounded(mean[:-1]),
+        'std': _rounded(std[:-1]),
+        'min': _rounded(stat_matrix.min(axis=0)),
+        'max': _rounded(stat_matrix.max(axis=0)),
+        'corr_with_class': _rounded(class_corr),
+        'fraud_mean': _rounded(fraud_mean),
+        'legit_mean': _rounded(legit_mean),
+        'mean_difference': _rounded(diff),
+        'top_features': [V_COLUMNS[i] for i in top],
+        'top_differences': _rounded(v_diff[top]),
+    }
+
+    corr_columns = V_COLUMNS + ['Amount', LABEL_COLUMN]
+    corr_index = list(range(V_SLICE.start, V_SLICE.stop)) + [AMOUNT_INDEX, len(stat_columns)]
+    corr_matrix = all_corr[np.ix_(corr_index, corr_index)]
+    correlation = {
+        'features': corr_columns,
+        'matrix': [_rounded(row, 4) for row in corr_matrix],
+    }
+
+    return {
+        'summary': summary,
+        'amount_histogram': _histogram(amount, labels, AMOUNT_BINS),
+        'amount_box': {'legit': _box_stats(amount[legit]), 'fraud': _box_stats(amount[fraud])},
+        'time_buckets': time_buckets,
+        'hourly': hourly,
+        'feature_stats': feature_stats,
+        'feature_histograms': {
+            name: _histogram(v_matrix[:, i], labels, FEATURE_BINS) for i, name in enumerate(V_COLUMNS)
+        },
+        'correlation': correlation,
+    }
+
+
+def read_dataset(path: str) -> pd.DataFrame:
+    """Baca CSV sekali, hanya kolom yang dipakai analitik"""
+    wanted = set(FEATURE_NAMES) | {LABEL_COLUMN}
+    return pd.read_csv(path, usecols=lambda name: name in wanted, dtype=np.float64)
+
+
+class AnalyticsCache:
+    """
+    Cache hasil analitik per hash isi file: JSON di disk dan LRU di memori
+    """
+
+    def __init__(self, root: str = ANALYTICS_DIR, max_in_memory: int = 8,
+                 max_upload_bytes: Optional[int] = None):
+        self.root = root
+        self.max_in_memory = max_in_memory
+        self.max_upload_bytes = MAX_UPLOAD_BYTES if max_upload_bytes is None else max_upload_bytes
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _path(self, dataset_id: str) -> str:
+        return os.path.join(self.root, f'{dataset_id}.json')
+
+    def get(self, dataset_id: str) -> Optional[Dict]:
+        """Hasil analitik untuk dataset_id, atau None jika belum pernah dihitung"""
+        if not dataset_id.isalnum():
+            return None
+        with self._lock:
+            if dataset_id in self._memory:
+                self._memory.move_to_end(dataset_id)
+                return self._memory[dataset_id]
+        try:
+            with open(self._path(dataset_id)) as f:
+                result = json.load(f)
+        except FileNotFoundError:
+            return None
+        self._remember(dataset_id, result)
+        return result
+
+    def _remember(self, dataset_id: str, result: Dict):
+        with self._lock:
+            self._memory[dataset_id] = result
+            while len(self._memory) > self.max_in_memory:
+                self._memory.popitem(last=False)
+
+    def ingest(self, upload) -> Dict:
+        """
+        Simpan upload (file-like) ke file sementara sambil menghitung hash-nya;
+        analitik hanya dihitung jika hash belum ada di cache
+
+        Returns:
+            Dictionary {'dataset_id', 'cached', 'analytics'}
+
+        Raises:
+            UploadTooLarge: upload melebihi max_upload_bytes
+            ValueError: CSV tidak valid untuk analitik
+        """
+        os.makedirs(self.root, exist_ok=True)
+        digest = hashlib.sha256()
+        fd, tmp_path = tempfile.mkstemp(dir=self.root, suffix='.csv')
+        try:
+            written = 0
+            with os.fdopen(fd, 'wb') as f:
+                while True:
+                    block = upload.read(1 << 20)
+                    if not block:
+                        break
+                    written += len(block)
+                    if written > self.max_upload_bytes:
+                        raise UploadTooLarge(f'Upload exceeds {self.max_upload_bytes} bytes')
+                    digest.update(block)
+                    f.write(block)
+            dataset_id = digest.hexdigest()
+            cached = self.get(dataset_id)
+            if cached is not None:
+                return {'dataset_id': dataset_id, 'cached': True, 'analytics': cached}
+
+            try:
+                result = compute_analytics(read_dataset(tmp_path))
+            except (pd.errors.ParserError, pd.errors.EmptyDataError, UnicodeDecodeError) as e:
+                raise ValueError(f'Invalid CSV: {e}')
+        finally:
+            os.remove(tmp_path)
+
+        # Write-then-rename so concurrent readers never see a partial file
+        fd, tmp_json = tempfile.mkstemp(dir=self.root, suffix='.json')
+        with os.fdopen(fd, 'w') as f:
+            json.dump(result, f, separators=(',', ':'))
+        os.replace(tmp_json, self._path(dataset_id))
+        self._remember(dataset_id, result)
+        return {'dataset_id': dataset_id, 'cached': False, 'analytics': result}
@@ -0,0 +1,329 @@
+"""
+Cache Dataset Kolumnar
+======================
+Setiap CSV transaksi (dataset/test-*.csv, creditcard_2023.csv) dikonversi
+satu kali menjadi file kolumnar bertipe di DATASET_CACHE_DIR:
+
+    <nama>-<hash>/id.npy         int64 (float64 jika id tidak bulat)
+    <nama>-<hash>/features.npy   float32 (n_rows, 29): V1-V28, Amount
+    <nama>-<hash>/Class.npy      int8 (hanya jika CSV punya kolom Class)
+    <nama>-<hash>/schema.json    sumber, SHA-256, ukuran/mtime, kolom, dtype
+
+Pemuatan berikutnya membuka file .npy sebagai memmap (tanpa parsing dan
+tanpa salinan) selama SHA-256 sumber sama. Ukuran + mtime yang tercatat di
+schema dipakai sebagai jalan pintas agar file besar tidak perlu di-hash
+ulang setiap kali dimuat.
+
+Konversi berjalan per chunk ke file .npy yang sudah dialokasikan, sehingga
+memori tetap konstan untuk CSV berukuran beberapa GB.
+
+Penggunaan (dari root repository):
+    python dataset_store.py dataset/*.csv     # konversi di muka
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+from datetime import datetime
+from typing import Dict, NamedTuple, Optional
+
+import numpy as np
+import pandas as pd
+
+from transaction_features import FEATURE_NAMES, N_FEATURES, TIME_INDEX
+
+
+DATASET_CACHE_DIR = os.environ.get('DATASET_CACHE_DIR', os.path.join('dataset', '.cache'))
+SCHEMA_FILE = 'schema.json'
+SCHEMA_VERSION = 1
+LABEL_COLUMN = 'Class'
+CONVERT_CHUNKSIZE = 100_000
+
+# Kolom numerik yang disimpan sebagai float32, urutan sesuai FEATURE_NAMES
+VALUE_COLUMNS = FEATURE_NAMES[TIME_INDEX + 1:]
+
+
+class UploadTooLarge(ValueError):
+    """File upload melebihi batas ukuran yang dikonfigurasi"""
+
+
+def file_hash(path: str) -> str:
+    """SHA-256 isi file"""
+    sha = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            sha.update(block)
+    return sha.hexdigest()
+
+
+def count_rows(path: str) -> int:
+    """
+    Jumlah baris data CSV (tanpa header), dihitung per blok byte
+
+    Angka ini batas atas jumlah record hasil parsing pandas: baris kosong dan
+    newline di dalam field berkutip ikut terhitung.
+    """
+    lines = 0
+    last = b'\n'
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            lines += block.count(b'\n')
+            last = block[-1:]
+    if last != b'\n':
+        lines += 1
+    return max(0, lines - 1)
+
+
+class ColumnarDataset(NamedTuple):
+    """Dataset yang dimuat dari cache; array berupa memmap read-only"""
+    ids: np.ndarray
+    features: np.ndarray
+    labels: Optional[np.ndarray]
+    schema: Dict
+
+    def __len__(self) -> int:
+        return self.features.shape[0]
+
+    def matrix(self, rows=slice(None)) -> np.ndarray:
+        """Matriks float64 (n_rows, 30) dalam urutan FEATURE_NAMES untuk model"""
+        values = self.features[rows]
+        out = np.empty((values.shape[0], N_FEATURES))
+        out[:, TIME_INDEX] = self.ids[rows]
+        out[:, TIME_INDEX + 1:] = values
+        return out
+
+    def frame(self) -> pd.DataFrame:
+        """DataFrame dengan kolom FEATURE_NAMES (+ Class), misalnya untuk training"""
+        frame = pd.DataFrame(self.matrix(), columns=list(FEATURE_NAMES))
+        if self.labels is not None:
+            frame[LABEL_COLUMN] = self.labels
+        return frame
+
+
+def _cache_dir(source: str, sha256: str, cache_root: str) -> str:
+    stem = os.path.splitext(os.path.basename(source))[0]
+    return os.path.join(cache_root, f'{stem}-{sha256[:16]}')
+
+
+def _read_schema(directory: str) -> Optional[Dict]:
+    try:
+        with open(os.path.join(directory, SCHEMA_FILE), encoding='utf-8') as f:
+            schema = json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return None
+    return schema if schema.get('version') == SCHEMA_VERSION else None
+
+
+def _find_cached(source: str, cache_root: str) -> Optional[str]:
+    """Direktori cache yang ukuran + mtime sumbernya masih sama, tanpa hashing"""
+    stat = os.stat(source)
+    stem = os.path.splitext(os.path.basename(source))[0]
+    if not os.path.isdir(cache_root):
+        return None
+    for entry in os.listdir(cache_root):
+        if not entry.startswith(stem + '-'):
+            continue
+        schema = _read_schema(os.path.join(cache_root, entry))
+        if (schema is not None and schema['source']['size'] == stat.st_size
+                and schema['source']['mtime_ns'] == stat.st_mtime_ns):
+            return os.path.join(cache_root, entry)
+    return None
+
+
+def _published(directory: str, sha256: str) -> Optional[Dict]:
+    """Schema cache yang sudah terbit untuk isi sumber dengan SHA-256 ini"""
+    schema = _read_schema(directory)
+    return schema if schema is not None and schema['source']['sha256'] == sha256 else None
+
+
+def _restamp(directory: str, schema: Dict, stat: os.stat_result) -> str:
+    """Catat ukuran + mtime sumber saat ini agar _find_cached menemukan cache tanpa hashing"""
+    if (schema['source']['size'], schema['source']['mtime_ns']) != (stat.st_size, stat.st_mtime_ns):
+        schema['source'].update(size=stat.st_size, mtime_ns=stat.st_mtime_ns)
+        tmp_path = os.path.join(directory, f'{SCHEMA_FILE}.{os.getpid()}.tmp')
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(schema, f, indent=2)
+            f.write('\n')
+        os.replace(tmp_path, os.path.join(directory, SCHEMA_FILE))
+    return directory
+
+
+def _finish_ids(ids_path: str, final_path: str, block_rows: int) -> str:
+    """Simpan id sebagai int64 jika semuanya bulat (kasus umum), selain itu float64"""
+    ids = np.load(ids_path, mmap_mode='r')
+    integral = all(
+        np.array_equal(ids[start:start + block_rows], np.round(ids[start:start + block_rows]))
+        for start in range(0, len(ids), block_rows)
+    )
+    if not integral:
+        del ids
+        os.replace(ids_path, final_path)
+        return 'float64'
+
+    out = np.lib.format.open_memmap(final_path, mode='w+', dtype=np.int64, shape=ids.shape)
+    for start in range(0, len(ids), block_rows):
+        out[start:start + block_rows] = ids[start:start + block_rows]
+    out.flush()
+    del out, ids
+    os.remove(ids_path)
+    return 'int64'
+
+
+def _truncate(path: str, n_rows: int, block_rows: int):
+    """Potong file .npy menjadi n_rows baris pertama"""
+    array = np.load(path, mmap_mode='r')
+    tmp_path = path + '.tmp'
+    out = np.lib.format.open_memmap(tmp_path, mode='w+', dtype=array.dtype,
+                                    shape=(n_rows,) + array.shape[1:])
+    for start in range(0, n_rows, block_rows):
+        out[start:start + block_rows] = array[start:min(start + block_rows, n_rows)]
+    out.flush()
+    del out, array
+    os.replace(tmp_path, path)
+
+
+def convert(source: str, cache_root: str = DATASET_CACHE_DIR, sha256: Optional[str] = None,
+            chunksize: int = CONVERT_CHUNKSIZE) -> str:
+    """
+    Konversi CSV menjadi file .npy kolumnar + schema; mengembalikan direktori
+    cache. Cache yang sudah terbit untuk isi sumber yang sama dipakai ulang,
+    tidak pernah dihapus (proses lain mungkin sedang memmap-nya).
+
+    Raises:
+        ValueError: CSV tidak memiliki kolom id, V1-V28 dan Amount
+    """
+    sha256 = sha256 or file_hash(source)
+    stat = os.stat(source)
+    directory = _cache_dir(source, sha256, cache_root)
+    schema = _published(directory, sha256)
+    if schema is not None:
+        # Same content under a new mtime, or another process got here first
+        return _restamp(directory, schema, stat)
+
+    # Upper bound; the files are trimmed to the rows pandas actually parses
+    capacity = count_rows(source)
+    header = pd.read_csv(source, nrows=0).columns
+    missing = [name for name in FEATURE_NAMES if name not in header]
+    if missing:
+        raise ValueError(f"{source} is missing columns: {', '.join(missing)}")
+    has_labels = LABEL_COLUMN in header
+
+    os.makedirs(cache_root, exist_ok=True)
+    tmp_dir = tempfile.mkdtemp(dir=cache_root, prefix='.tmp-')
+    try:
+        ids_path = os.path.join(tmp_dir, 'id.float64.npy')
+        features_path = os.path.join(tmp_dir, 'features.npy')
+        labels_path = os.path.join(tmp_dir, f'{LABEL_COLUMN}.npy')
+        ids = np.lib.format.open_memmap(ids_path, mode='w+', dtype=np.float64, shape=(capacity,))
+        features = np.lib.format.open_memmap(features_path, mode='w+', dtype=np.float32,
+                                             shape=(capacity, len(VALUE_COLUMNS)))
+        labels = None
+        if has_labels:
+            labels = np.lib.format.open_memmap(labels_path, mode='w+', dtype=np.int8, shape=(capacity,))
+
+        usecols = list(FEATURE_NAMES) + ([LABEL_COLUMN] if has_labels else [])
+        row = 0
+        for chunk in pd.read_csv(source, usecols=usecols, chunksize=chunksize):
+            end = row + len(chunk)
+            if end > capacity:
+                raise ValueError(f'{source}: parsed more rows than the file has lines')
+            ids[row:end] = chunk[FEATURE_NAMES[TIME_INDEX]].to_numpy(dtype=np.float64)
+            features[row:end] = chunk[list(VALUE_COLUMNS)].to_numpy(dtype=np.float32)
+            if has_labels:
+                labels[row:end] = chunk[LABEL_COLUMN].to_numpy(dtype=np.int8)
+            row = end
+        n_rows = row
+
+        for array in (ids, features, labels):
+            if array is not None:
+                array.flush()
+        del ids, features, labels
+        if n_rows < capacity:
+            # Blank lines or quoted newlines: drop the unused tail
+            for path in (ids_path, features_path) + ((labels_path,) if has_labels else ()):
+                _truncate(path, n_rows, chunksize)
+        id_dtype = _finish_ids(ids_path, os.path.join(tmp_dir, 'id.npy'), chunksize)
+
+        columns = [{'name': FEATURE_NAMES[TIME_INDEX], 'file': 'id.npy', 'dtype': id_dtype}]
+        columns += [{'name': name, 'file': 'features.npy', 'index': i, 'dtype': 'float32'}
+                    for i, name in enumerate(VALUE_COLUMNS)]
+        if has_labels:
+            columns.append({'name': LABEL_COLUMN, 'file': f'{LABEL_COLUMN}.npy', 'dtype': 'int8'})
+        schema = {
+            'version': SCHEMA_VERSION,
+            'source': {
+                'path': source.replace(os.sep, '/'),
+                'sha256': sha256,
+                'size': stat.st_size,
+                'mtime_ns': stat.st_mtime_ns,
+            },
+            'rows': n_rows,
+            'columns': columns,
+            'created_at': datetime.now().isoformat(timespec='seconds'),
+        }
+        with open(os.path.join(tmp_dir, SCHEMA_FILE), 'w', encoding='utf-8') as f:
+            json.dump(schema, f, indent=2)
+            f.write('\n')
+
+        try:
+            os.replace(tmp_dir, directory)
+        except OSError:
+            # Several processes can convert the same CSV at once; the first one
+            # to publish wins and the others reuse its cache
+            if _published(directory, sha256) is None:
+                raise
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+        return directory
+    except BaseException:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        raise
+
+
+def _open(directory: str) -> ColumnarDataset:
+    schema = _read_schema(directory)
+    labels_path = os.path.join(directory, f'{LABEL_COLUMN}.npy')
+    return ColumnarDataset(
+        ids=np.load(os.path.join(directory, 'id.npy'), mmap_mode='r'),
+        features=np.load(os.path.join(directory, 'features.npy'), mmap_mode='r'),
+        labels=np.load(labels_path, mmap_mode='r') if os.path.exists(labels_path) else None,
+        schema=schema,
+    )
+
+
+def load_dataset(source: str, cache_root: str = DATASET_CACHE_DIR) -> ColumnarDataset:
+    """
+    Muat CSV lewat cache kolumnar; konversi hanya jika belum ada cache yang
+    cocok dengan SHA-256 sumber
+    """
+    directory = _find_cached(source, cache_root)
+    if directory is None:
+        # Same content with a new mtime (e.g. a fresh checkout) is only re-stamped
+        directory = convert(source, cache_root)
+    return _open(directory)
+
+
+def source_hash(source: str, cache_root: str = DATASET_CACHE_DIR) -> str:
+    """SHA-256 sumber, diambil dari schema cache bila ukuran + mtime cocok"""
+    directory = _find_cached(source, cache_root)
+    if directory is not None:
+        return _read_schema(directory)['source']['sha256']
+    return file_hash(source)
+
+
+def main(argv: Optional[list] = None):
+    parser = argparse.ArgumentParser(description='Konversi CSV transaksi ke cache kolumnar .npy')
+    parser.add_argument('sources', nargs='+', help='file CSV sumber')
+    parser.add_argument('--cache-dir', default=DATASET_CACHE_DIR)
+    args = parser.parse_args(argv)
+
+    for source in args.sources:
+        dataset = load_dataset(source, args.cache_dir)
+        labels = 'with Class' if dataset.labels is not None else 'no Class'
+        print(f"{source:<32} {len(dataset):>9} rows ({labels}) sha256={dataset.schema['source']['sha256'][:16]}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,163 @@
+"""
+Ensemble N-Model untuk Sistem Deteksi Penipuan
+==============================================
+Menggabungkan sembarang subset model dari registry dengan salah satu
+strategi berikut:
+
+- soft_vote         : rata-rata probabilitas
+- accuracy_weighted : rata-rata berbobot accuracy model (dinormalisasi)
+- max               : probabilitas tertinggi di antara model
+- stacking          : logistic regression yang dilatih atas probabilitas
+                      model pada dataset evaluasi
+
+Probabilitas semua model disusun menjadi satu matriks (n_rows, n_models)
+sehingga penggabungan untuk satu batch cukup satu perkalian matriks.
+Vektor bobot dan stacker di-cache per kombinasi model dan fingerprint file
+model (lihat ModelRegistry.get_versioned), jadi model yang diganti di disk
+otomatis memicu perhitungan ulang.
+
+Stacker final dilatih pada seluruh dataset evaluasi; kualitasnya dilaporkan
+dari prediksi out-of-fold (stratified k-fold), bukan dari data yang sama
+dengan data latihnya.
+"""
+
+import threading
+from collections import OrderedDict
+from typing import Dict, List, NamedTuple
+
+import numpy as np
+from scipy.special import expit
+from sklearn.linear_model import LogisticRegression
+from sklearn.metrics import accuracy_score, roc_auc_score
+from sklearn.model_selection import StratifiedKFold
+
+from inference import DECISION_THRESHOLD, InferenceCore
+from model_metrics import ModelMetrics
+
+
+STRATEGIES = ('soft_vote', 'accuracy_weighted', 'max', 'stacking')
+STACKER_FOLDS = 5
+
+
+class Stacker(NamedTuple):
+    """Logistic regression di atas probabilitas model, dengan metrik out-of-fold"""
+    coef: np.ndarray
+    intercept: float
+    cv_metrics: Dict
+
+
+def _fit_logistic(stacked: np.ndarray, y: np.ndarray) -> LogisticRegression:
+    return LogisticRegression(class_weight='balanced', max_iter=1000).fit(stacked, y)
+
+
+class EnsembleScorer:
+    """
+    Skoring ensemble dengan cache bobot per kombinasi model
+    """
+
+    def __init__(self, core: InferenceCore, metrics: ModelMetrics, max_cached: int = 64):
+        self.core = core
+        self.metrics = metrics
+        self.max_cached = max_cached
+        self._cache = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _cached(self, key, compute):
+        with self._lock:
+            if key in self._cache:
+                self._cache.move_to_end(key)
+                return self._cache[key]
+        value = compute()
+        with self._lock:
+            self._cache[key] = value
+            while len(self._cache) > self.max_cached:
+                self._cache.popitem(last=False)
+        return value
+
+    def _versions(self, model_names: List[str]) -> tuple:
+        """Fingerprint file setiap model, bagian dari kunci cache"""
+        return tuple(self.core.registry.get_versioned(name)[1] for name in model_names)
+
+    def weights(self, model_names: List[str], strategy: str) -> np.ndarray:
+        """Vektor bobot ternormalisasi (jumlah 1) untuk soft_vote / accuracy_weighted"""
+        key = ('weights', tuple(model_names), self._versions(model_names), strategy)
+        return self._cached(key, lambda: self._compute_weights(model_names, strategy))
+
+    def _compute_weights(self, model_names: List[str], strategy: str) -> np.ndarray:
+        if strategy == 'accuracy_weighted':
+            raw = np.array([self.metrics.accuracy(name) for name in model_names], dtype=float)
+        else:
+            raw = np.ones(len(model_names))
+        weights = raw / raw.sum()
+        weights.setflags(write=False)
+        return weights
+
+    def stacker(self, model_names: List[str]) -> Stacker:
+        """Logistic regression di atas probabilitas model beserta metrik out-of-fold"""
+        key = ('stacking', tuple(model_names), self._versions(model_names))
+        return self._cached(key, lambda: self._fit_stacker(model_names))
+
+    def _fit_stacker(self, model_names: List[str]) -> Stacker:
+        X, y = self.metrics.eval_data()
+        stacked = self.probability_matrix(model_names, X)
+
+        # Held-out quality: every row is scored by a stacker that never saw it
+        folds = StratifiedKFold(n_splits=STACKER_FOLDS, shuffle=True, random_state=0)
+        out_of_fold = np.empty(len(y))
+        for train, test in folds.split(stacked, y):
+            out_of_fold[test] = _fit_logistic(stacked[train], y[train]).predict_proba(stacked[test])[:, 1]
+        cv_metrics = {
+            'folds': STACKER_FOLDS,
+            'accuracy': float(accuracy_score(y, out_of_fold > DECISION_THRESHOLD)),
+            'auc': float(roc_auc_score(y, out_of_fold)),
+        }
+
+        stacker = _fit_logistic(stacked, y)
+        coef = stacker.coef_[0].copy()
+        coef.setflags(write=False)
+        return Stacker(coef, float(stacker.intercept_[0]), cv_metrics)
+
+    def probability_matrix(self, model_names: List[str], features: np.ndarray) -> np.ndarray:
+        """Matriks (n_rows, n_models) probabilitas fraud tiap model"""
+        scores = self.core.score_many(model_names, features)
+        return np.column_stack([scores[name].probabilities for name in model_names])
+
+    def combine(self, model_names: List[str], strategy: str, stacked: np.ndarray) -> np.ndarray:
+        """Gabungkan matriks probabilitas menjadi satu probabilitas per baris"""
+        if strategy == 'max':
+            return stacked.max(axis=1)
+        if strategy == 'stacking':
+            stacker = self.stacker(model_names)
+            return expit(stacked @ stacker.coef + stacker.intercept)
+        return stacked @ self.weights(model_names, strategy)
+
+    def score(self, model_names: List[str], strategy: str, features: np.ndarray) -> Dict:
+        """
+        Skor ensemble untuk setiap baris
+
+        Raises:
+            ValueError: strategi tidak dikenal atau daftar model kosong
+        """
+        if strategy not in STRATEGIES:
+            raise ValueError(f"Unknown strategy '{strategy}', expected one of: {', '.join(STRATEGIES)}")
+        model_names = list(dict.fromkeys(model_names))
+        if not model_names:
+            raise ValueError('models must not be empty')
+
+        stacked = self.probability_matrix(model_names, features)
+        probabilities = self.combine(model_names, strategy, stacked)
+        result = {
+            'models': model_names,
+            'strategy': strategy,
+            'probabilities': probabilities,
+            'predictions': (probabilities > DECISION_THRESHOLD).astype(int),
+            'model_probabilities': {name: stacked[:, i] for i, name in enumerate(model_names)},
+        }
+        if strategy in ('soft_vote', 'accuracy_weighted'):
+            result['weights'] = dict(zip(model_names, self.weights(model_names, strategy).tolist()))
+        elif strategy == 'stacking':
+            stacker = self.stacker(model_names)
+            result['weights'] = dict(zip(model_names, stacker.coef.tolist()))
+            result['intercept'] = stacker.intercept
+            result['stacker_cv'] = stacker.cv_metrics
+        return result
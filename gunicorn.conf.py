@@ -0,0 +1,43 @@
+"""
+Konfigurasi Gunicorn
+====================
+Dibaca otomatis oleh `gunicorn app:app` (Procfile, render.yaml).
+
+MODEL_PRELOAD menentukan di mana model ML dimuat:
+- master (default): app di-import dan semua model dimuat sekali di proses
+  master sebelum fork. Worker berbagi halaman memori read-only tersebut
+  (copy-on-write), sehingga menambah worker tidak menggandakan memori model.
+  gc.freeze() mencegah GC menyentuh objek-objek itu dan memicu penyalinan.
+- worker: setiap worker memuat semua model sendiri setelah fork
+  (perilaku lama, untuk pembanding).
+- lazy: model dimuat per worker saat pertama kali diminta.
+"""
+
+import gc
+import os
+
+
+model_preload = os.environ.get('MODEL_PRELOAD', 'master')
+preload_app = model_preload == 'master'
+
+
+def _preload_models(server):
+    import app
+    loaded = app.model_registry.preload()
+    server.log.info('Preloaded models: %s', ', '.join(loaded))
+    if app.model_registry.preload_skipped:
+        server.log.warning('Not preloaded (MODEL_CACHE_SIZE=%d): %s', app.model_registry.max_resident,
+                           ', '.join(app.model_registry.preload_skipped))
+
+
+def on_starting(server):
+    if model_preload == 'master':
+        _preload_models(server)
+        # Move everything allocated so far into the permanent generation so
+        # collections in the workers do not write to (and un-share) these pages
+        gc.freeze()
+
+
+def post_fork(server, worker):
+    if model_preload == 'worker':
+        _preload_models(server)
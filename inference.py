@@ -0,0 +1,148 @@
+"""
+Inference Core untuk Sistem Deteksi Penipuan
+============================================
+Satu jalur inferensi untuk semua endpoint prediksi: probabilitas fraud
+dihitung sekali per model (satu kali lewat predict_proba, tanpa predict
+terpisah) dan label kelas diturunkan dari probabilitas tersebut.
+
+Jika beberapa model dipilih, model-model itu dijalankan paralel di thread
+pool; sklearn dan XGBoost melepas GIL di kode native sehingga latensi
+ensemble mendekati model paling lambat, bukan jumlah semuanya.
+
+Jika diberi PredictionCache, skor disimpan per (model, fingerprint file
+model, hash fitur) sehingga payload identik tidak diskor ulang; model yang
+dimuat ulang dari file baru otomatis memakai kunci baru.
+
+Jika diberi Metrics, durasi predict_proba dan jumlah baris dicatat per
+model (cache hit tidak dihitung).
+
+Konfigurasi:
+- INFERENCE_THREADS: ukuran thread pool (default: min(8, jumlah CPU))
+"""
+
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, NamedTuple, Optional
+
+import numpy as np
+
+from metrics import NULL_METRICS, Metrics
+from model_registry import ModelRegistry
+from prediction_cache import PredictionCache, features_digest
+
+
+DECISION_THRESHOLD = 0.5
+
+
+class ModelScores(NamedTuple):
+    """Hasil satu model untuk setiap baris input"""
+    probabilities: np.ndarray
+    predictions: np.ndarray
+
+
+def score_model(model: Any, features: np.ndarray) -> ModelScores:
+    """
+    Hitung probabilitas fraud (kelas 1) dan label untuk setiap baris
+
+    Model tanpa predict_proba memakai nilai decision_function sebagai skor
+    dengan batas keputusan 0.
+    """
+    if hasattr(model, 'predict_proba'):
+        probabilities = np.asarray(model.predict_proba(features)[:, 1], dtype=float)
+        predictions = (probabilities > DECISION_THRESHOLD).astype(int)
+    else:
+        probabilities = np.asarray(model.decision_function(features), dtype=float)
+        predictions = (probabilities > 0).astype(int)
+    return ModelScores(probabilities, predictions)
+
+
+def _frozen(scores: ModelScores) -> ModelScores:
+    # Cached arrays are shared between requests and must not be modified
+    scores.probabilities.setflags(write=False)
+    scores.predictions.setflags(write=False)
+    return scores
+
+
+class InferenceCore:
+    """
+    Menjalankan satu atau beberapa model dari registry atas matriks fitur
+    """
+
+    def __init__(self, registry: ModelRegistry, max_workers: int = None,
+                 cache: Optional[PredictionCache] = None, metrics: Optional[Metrics] = None):
+        self.registry = registry
+        self.cache = cache
+        self.metrics = metrics if metrics is not None else NULL_METRICS
+        if max_workers is None:
+            max_workers = int(os.environ.get('INFERENCE_THREADS', min(8, os.cpu_count() or 1)))
+        self.max_workers = max(1, max_workers)
+        self._executor = None
+        self._executor_pid = None
+        self._lock = threading.Lock()
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        # Created on first use and re-created after fork: threads do not
+        # survive into gunicorn workers forked from a preloaded master
+        with self._lock:
+            if self._executor is None or self._executor_pid != os.getpid():
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.max_workers, thread_name_prefix='inference'
+                )
+                self._executor_pid = os.getpid()
+            return self._executor
+
+    def _digest(self, features: np.ndarray) -> Optional[bytes]:
+        """Hash fitur untuk kunci cache, None jika batch tidak di-cache"""
+        if self.cache is None or not self.cache.accepts(features):
+            return None
+        return features_digest(features)
+
+    def _score(self, model_name: str, model: Any, features: np.ndarray) -> ModelScores:
+        if not self.metrics.enabled:
+            return score_model(model, features)
+        with self.metrics.timer('fraud_model_seconds', model=model_name):
+            scores = score_model(model, features)
+        self.metrics.inc('fraud_model_rows_total', features.shape[0], model=model_name)
+        return scores
+
+    def score(self, model_name: str, features: np.ndarray) -> ModelScores:
+        """Skor satu model"""
+        model, fingerprint = self.registry.get_versioned(model_name)
+        digest = self._digest(features)
+        if digest is None:
+            return self._score(model_name, model, features)
+        return self.cache.get_or_compute(
+            (model_name, fingerprint, digest), lambda: _frozen(self._score(model_name, model, features))
+        )
+
+    def score_many(self, model_names: List[str], features: np.ndarray) -> Dict[str, ModelScores]:
+        """Skor beberapa model secara paralel; hasil mengikuti urutan model_names"""
+        unique_names = list(dict.fromkeys(model_names))
+        # Load in the calling thread so a missing model surfaces before fan-out
+        models = {name: self.registry.get_versioned(name) for name in unique_names}
+
+        results = {}
+        pending = {}
+        digest = self._digest(features)
+        for name, (model, fingerprint) in models.items():
+            cached = None if digest is None else self.cache.get((name, fingerprint, digest))
+            if cached is not None:
+                results[name] = cached
+            else:
+                pending[name] = model
+
+        if len(pending) <= 1 or self.max_workers == 1:
+            computed = {name: self._score(name, model, features) for name, model in pending.items()}
+        else:
+            executor = self._get_executor()
+            futures = {
+                name: executor.submit(self._score, name, model, features) for name, model in pending.items()
+            }
+            computed = {name: future.result() for name, future in futures.items()}
+
+        for name, scores in computed.items():
+            if digest is not None:
+                self.cache.put((name, models[name][1], digest), _frozen(scores))
+            results[name] = scores
+        return {name: results[name] for name in unique_names}
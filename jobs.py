@@ -0,0 +1,366 @@
+"""
+Job Scoring Asinkron
+====================
+Upload CSV besar diskor di latar belakang agar tidak menahan worker gunicorn
+yang melayani /predict. POST /jobs menyimpan file dan langsung mengembalikan
+id job; pool proses terpisah menjalankan skoring per chunk (batch_score)
+dan mencatat progres ke SQLite, sehingga latensi /predict tetap stabil.
+
+Semua state disimpan lokal tanpa layanan eksternal:
+
+    JOBS_DIR/jobs.sqlite3     status dan progres semua job
+    JOBS_DIR/<id>/input.csv   file yang di-upload
+    JOBS_DIR/<id>/result.csv  hasil skoring (ditulis bertahap)
+
+Setiap job mencatat PID proses server yang mengantrikannya (owner) beserta
+identitas proses itu (boot id + waktu mulai proses dari /proc), sehingga
+PID yang dipakai ulang setelah restart container/host tidak dianggap
+sebagai owner yang masih hidup. Saat JobRunner dibuat, job milik proses
+yang sudah mati dipulihkan: job queued
+diantrikan ulang di proses ini, job running ditandai failed (hasil
+parsialnya tidak bisa dilanjutkan). Job yang gagal sebelum atau di luar
+run_job (mis. pool proses rusak) ditandai failed oleh callback future.
+
+Konfigurasi:
+- JOBS_DIR: direktori penyimpanan job (default: jobs)
+- JOB_WORKERS: jumlah proses skoring per worker gunicorn (default: 1)
+- JOB_MAX_UPLOAD_BYTES: ukuran maksimum file upload (default: 1 GiB)
+"""
+
+import multiprocessing
+import os
+import shutil
+import sqlite3
+import threading
+import time
+import uuid
+import warnings
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Dict, List, Optional
+
+import pandas as pd
+
+from batch_score import DEFAULT_CHUNKSIZE, open_sink, score_chunks
+from dataset_store import UploadTooLarge, count_rows
+from model_registry import ModelRegistry
+
+
+JOBS_DIR = os.environ.get('JOBS_DIR', 'jobs')
+INPUT_FILE = 'input.csv'
+RESULT_FILE = 'result.csv'
+MAX_UPLOAD_BYTES = int(os.environ.get('JOB_MAX_UPLOAD_BYTES', 1 << 30))
+
+QUEUED = 'queued'
+RUNNING = 'running'
+DONE = 'done'
+FAILED = 'failed'
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    status TEXT NOT NULL,
+    models TEXT NOT NULL,
+    use_kb INTEGER NOT NULL,
+    chunksize INTEGER NOT NULL,
+    rows_total INTEGER,
+    rows_done INTEGER NOT NULL DEFAULT 0,
+    flagged INTEGER NOT NULL DEFAULT 0,
+    error TEXT,
+    created_at REAL NOT NULL,
+    started_at REAL,
+    finished_at REAL,
+    owner INTEGER,
+    owner_token TEXT
+)
+"""
+
+
+def _pid_alive(pid: Optional[int]) -> bool:
+    if not pid:
+        return False
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def _process_token(pid: int) -> Optional[str]:
+    """
+    Identitas proses yang tidak berulang walau PID-nya dipakai ulang: boot id
+    kernel + waktu mulai proses; None jika /proc tidak tersedia (non-Linux)
+    """
+    try:
+        with open('/proc/sys/kernel/random/boot_id', encoding='ascii') as f:
+            boot_id = f.read().strip()
+        with open(f'/proc/{pid}/stat', encoding='utf-8', errors='replace') as f:
+            stat = f.read()
+    except OSError:
+        return None
+    # Field 22 (starttime); the command name in field 2 may contain spaces
+    return f"{boot_id}:{stat.rsplit(')', 1)[1].split()[19]}"
+
+
+def _owner_alive(pid: Optional[int], token: Optional[str]) -> bool:
+    """Owner masih hidup: PID ada dan (bila tercatat) identitas prosesnya sama"""
+    if not _pid_alive(pid):
+        return False
+    # Jobs created before tokens were recorded, or without /proc: PID only
+    return token is None or _process_token(pid) == token
+
+
+class JobStore:
+    """
+    Penyimpanan job di SQLite; aman dipakai dari beberapa proses
+    """
+
+    def __init__(self, root: str = JOBS_DIR):
+        self.root = root
+        self.db_path = os.path.join(root, 'jobs.sqlite3')
+        os.makedirs(root, exist_ok=True)
+        with self._connect() as conn:
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute(_SCHEMA)
+            # Databases created before job ownership was tracked
+            columns = {row['name'] for row in conn.execute('PRAGMA table_info(jobs)')}
+            if 'owner' not in columns:
+                conn.execute('ALTER TABLE jobs ADD COLUMN owner INTEGER')
+            if 'owner_token' not in columns:
+                conn.execute('ALTER TABLE jobs ADD COLUMN owner_token TEXT')
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    def job_dir(self, job_id: str) -> str:
+        return os.path.join(self.root, job_id)
+
+    def input_path(self, job_id: str) -> str:
+        return os.path.join(self.job_dir(job_id), INPUT_FILE)
+
+    def result_path(self, job_id: str) -> str:
+        return os.path.join(self.job_dir(job_id), RESULT_FILE)
+
+    def create(self, models: List[str], use_kb: bool, chunksize: int) -> str:
+        """Daftarkan job baru; file input ditulis pemanggil ke input_path(id)"""
+        job_id = uuid.uuid4().hex
+        os.makedirs(self.job_dir(job_id))
+        with self._connect() as conn:
+            conn.execute(
+                'INSERT INTO jobs (id, status, models, use_kb, chunksize, created_at, owner, owner_token) '
+                'VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
+                (job_id, QUEUED, ','.join(models), int(use_kb), chunksize, time.time(),
+                 os.getpid(), _process_token(os.getpid()))
+            )
+        return job_id
+
+    def delete(self, job_id: str):
+        """Hapus job beserta file-filenya"""
+        with self._connect() as conn:
+            conn.execute('DELETE FROM jobs WHERE id = ?', (job_id,))
+        shutil.rmtree(self.job_dir(job_id), ignore_errors=True)
+
+    def fail_pending(self, job_id: str, error: str) -> bool:
+        """Tandai job failed jika masih queued/running; False jika sudah selesai"""
+        with self._connect() as conn:
+            cursor = conn.execute(
+                'UPDATE jobs SET status = ?, error = ?, finished_at = ? WHERE id = ? AND status IN (?, ?)',
+                (FAILED, error, time.time(), job_id, QUEUED, RUNNING)
+            )
+            return cursor.rowcount == 1
+
+    def orphaned(self) -> List[Dict]:
+        """Job queued/running yang proses owner-nya sudah tidak hidup"""
+        with self._connect() as conn:
+            rows = conn.execute('SELECT id, status, owner, owner_token FROM jobs WHERE status IN (?, ?)',
+                                (QUEUED, RUNNING)).fetchall()
+        return [dict(row) for row in rows if not _owner_alive(row['owner'], row['owner_token'])]
+
+    def adopt(self, job_id: str, previous_owner: Optional[int],
+              previous_token: Optional[str] = None) -> bool:
+        """Ambil alih job queued milik proses mati; False jika proses lain lebih dulu"""
+        with self._connect() as conn:
+            cursor = conn.execute(
+                'UPDATE jobs SET owner = ?, owner_token = ? '
+                'WHERE id = ? AND status = ? AND owner IS ? AND owner_token IS ?',
+                (os.getpid(), _process_token(os.getpid()), job_id, QUEUED, previous_owner, previous_token)
+            )
+            return cursor.rowcount == 1
+
+    def update(self, job_id: str, **fields):
+        columns = ', '.join(f'{name} = ?' for name in fields)
+        with self._connect() as conn:
+            conn.execute(f'UPDATE jobs SET {columns} WHERE id = ?', (*fields.values(), job_id))
+
+    def claim(self, job_id: str) -> bool:
+        """Tandai job queued menjadi running; False jika sudah diambil proses lain"""
+        with self._connect() as conn:
+            cursor = conn.execute(
+                'UPDATE jobs SET status = ?, started_at = ? WHERE id = ? AND status = ?',
+                (RUNNING, time.time(), job_id, QUEUED)
+            )
+            return cursor.rowcount == 1
+
+    def get(self, job_id: str) -> Optional[Dict]:
+        with self._connect() as conn:
+            row = conn.execute('SELECT * FROM jobs WHERE id = ?', (job_id,)).fetchone()
+        if row is None:
+            return None
+        job = dict(row)
+        del job['owner'], job['owner_token']
+        job['models'] = job['models'].split(',')
+        job['use_kb'] = bool(job['use_kb'])
+        total = job['rows_total']
+        if job['status'] == DONE:
+            job['progress'] = 1.0
+        else:
+            job['progress'] = job['rows_done'] / total if total else 0.0
+        return job
+
+
+# Registry of a pool process; models stay loaded across the jobs it runs
+_worker_registry = None
+
+
+def _run_in_worker(store: JobStore, job_id: str) -> Dict:
+    global _worker_registry
+    if _worker_registry is None:
+        warnings.filterwarnings('ignore', category=UserWarning)
+        _worker_registry = ModelRegistry()
+    return run_job(store, job_id, _worker_registry)
+
+
+def run_job(store: JobStore, job_id: str, registry=None) -> Dict:
+    """
+    Skor file input job per chunk dan catat progres setelah setiap chunk
+    """
+    if not store.claim(job_id):
+        return store.get(job_id)
+    job = store.get(job_id)
+    input_path = store.input_path(job_id)
+    flag_column = 'final_prediction' if job['use_kb'] else f"pred_{job['models'][0]}"
+    rows_done = 0
+    flagged = 0
+    try:
+        # Upper bound for progress; replaced by the parsed count when done
+        store.update(job_id, rows_total=count_rows(input_path))
+        sink = open_sink(store.result_path(job_id))
+        try:
+            chunks = pd.read_csv(input_path, chunksize=job['chunksize'])
+            for scored in score_chunks(chunks, job['models'], job['use_kb'], registry=registry):
+                sink.write(scored)
+                rows_done += len(scored)
+                flagged += int(scored[flag_column].sum())
+                store.update(job_id, rows_done=rows_done, flagged=flagged)
+        finally:
+            sink.close()
+        store.update(job_id, status=DONE, rows_total=rows_done, finished_at=time.time())
+    except Exception as e:
+        store.update(job_id, status=FAILED, error=str(e), finished_at=time.time())
+    return store.get(job_id)
+
+
+class JobRunner:
+    """
+    Pool proses latar belakang untuk menjalankan job
+
+    Pool dibuat saat job pertama dikirim dan dibuat ulang setelah fork, sama
+    seperti thread pool InferenceCore. Proses pool di-spawn (bukan fork):
+    fork dari proses yang sudah menjalankan XGBoost/OpenMP dapat membuat
+    proses anak macet, jadi setiap proses pool memuat registry sendiri.
+    """
+
+    def __init__(self, store: JobStore, max_workers: int = None,
+                 max_upload_bytes: Optional[int] = None, recover: bool = True):
+        self.store = store
+        if max_workers is None:
+            max_workers = int(os.environ.get('JOB_WORKERS', 1))
+        self.max_workers = max(1, max_workers)
+        self.max_upload_bytes = MAX_UPLOAD_BYTES if max_upload_bytes is None else max_upload_bytes
+        self._executor = None
+        self._executor_pid = None
+        self._lock = threading.Lock()
+        if recover:
+            self.recover()
+
+    def recover(self) -> Dict[str, List[str]]:
+        """
+        Pulihkan job milik proses server yang sudah mati: queued diantrikan
+        ulang di sini, running ditandai failed
+        """
+        requeued, failed = [], []
+        for job in self.store.orphaned():
+            if job['status'] == RUNNING:
+                if self.store.fail_pending(job['id'], 'Server stopped while the job was running'):
+                    failed.append(job['id'])
+            elif self.store.adopt(job['id'], job['owner'], job['owner_token']):
+                self._dispatch(job['id'])
+                requeued.append(job['id'])
+        return {'requeued': requeued, 'failed': failed}
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._executor is None or self._executor_pid != os.getpid():
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.max_workers, mp_context=multiprocessing.get_context('spawn')
+                )
+                self._executor_pid = os.getpid()
+            return self._executor
+
+    def submit(self, models: List[str], use_kb: bool, upload,
+               chunksize: int = DEFAULT_CHUNKSIZE) -> str:
+        """
+        Simpan upload (file-like, mis. FileStorage atau request.stream) dan antrikan job
+
+        Raises:
+            UploadTooLarge: upload melebihi max_upload_bytes (job dihapus)
+        """
+        job_id = self.store.create(models, use_kb, chunksize)
+        try:
+            written = 0
+            with open(self.store.input_path(job_id), 'wb') as f:
+                while True:
+                    block = upload.read(1 << 20)
+                    if not block:
+                        break
+                    written += len(block)
+                    if written > self.max_upload_bytes:
+                        raise UploadTooLarge(f'Upload exceeds {self.max_upload_bytes} bytes')
+                    f.write(block)
+        except BaseException:
+            self.store.delete(job_id)
+            raise
+        self._dispatch(job_id)
+        return job_id
+
+    def _dispatch(self, job_id: str):
+        executor = self._get_executor()
+        try:
+            future = executor.submit(_run_in_worker, self.store, job_id)
+        except BrokenProcessPool:
+            # A worker died earlier; start a fresh pool once
+            self._reset_executor(executor)
+            executor = self._get_executor()
+            future = executor.submit(_run_in_worker, self.store, job_id)
+        future.add_done_callback(lambda done: self._job_finished(job_id, done, executor))
+
+    def _job_finished(self, job_id: str, future: Future, executor: ProcessPoolExecutor):
+        """run_job mencatat error-nya sendiri; exception di sini berarti job tidak pernah selesai"""
+        error = None if future.cancelled() else future.exception()
+        if future.cancelled() or error is not None:
+            message = 'Job was cancelled' if future.cancelled() else f'{type(error).__name__}: {error}'
+            self.store.fail_pending(job_id, message)
+        if isinstance(error, BrokenProcessPool):
+            self._reset_executor(executor)
+
+    def _reset_executor(self, executor: ProcessPoolExecutor):
+        """Buang pool yang rusak; pool pengganti dibuat pada submit berikutnya"""
+        with self._lock:
+            if self._executor is not executor:
+                return
+            self._executor = None
+        executor.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,405 @@
+"""
+Indeks IVF untuk Model KNN
+==========================
+knn_model.pkl adalah KNeighborsClassifier (brute force, euclidean) yang
+menyimpan seluruh data training; setiap query menghitung jarak ke semua
+sampel. Modul ini membangun indeks IVF (inverted file) dari data training
+yang tersimpan di pickle (model._fit_X / model._y):
+
+- data training dipartisi dengan k-means menjadi n_lists klaster
+- baris training diurutkan per klaster sehingga setiap list kontigu
+- query hanya menghitung jarak ke titik di nprobe klaster terdekat
+
+nprobe adalah kenop recall/latensi: nprobe = n_lists sama dengan pencarian
+exact (hasil identik dengan KNN asli kecuali pembulatan float32), nilai
+kecil lebih cepat tetapi bisa melewatkan tetangga di klaster lain. Query
+yang kandidatnya kurang dari k tetangga dijawab dengan pencarian exact.
+
+Indeks disimpan sekali di KNN_INDEX_DIR dan dibuka sebagai memmap
+read-only (halaman dibagi antar worker gunicorn lewat page cache):
+
+    knn-<hash>-<n_lists>/train.npy      float32 (n, 30), diurutkan per list
+    knn-<hash>-<n_lists>/labels.npy     indeks kelas per baris
+    knn-<hash>-<n_lists>/rows.npy       posisi baris di _fit_X asli
+    knn-<hash>-<n_lists>/centroids.npy  float32 (n_lists, 30)
+    knn-<hash>-<n_lists>/offsets.npy    awal setiap list (n_lists + 1)
+    knn-<hash>-<n_lists>/index.json     sumber, SHA-256, ukuran/mtime, parameter
+
+Konfigurasi:
+- KNN_INDEX: 1/true agar registry memakai indeks ini untuk model 'knn' (default nonaktif)
+- KNN_NPROBE: jumlah klaster yang diperiksa per query (default 8)
+- KNN_NLISTS: jumlah klaster (default: akar jumlah sampel training)
+- KNN_INDEX_DIR: direktori indeks (default 'ml model/.knn_index')
+
+Penggunaan (dari root repository):
+    python knn_index.py [--nprobe 1 2 4 8 16] [--dataset dataset/test-2.csv]
+"""
+
+import argparse
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+from datetime import datetime
+from typing import Any, Dict, Optional, Tuple
+
+import numpy as np
+
+from dataset_store import file_hash
+
+
+KNN_INDEX_DIR = os.environ.get('KNN_INDEX_DIR', os.path.join('ml model', '.knn_index'))
+INDEX_FILE = 'index.json'
+INDEX_VERSION = 1
+KMEANS_ITERATIONS = 25
+KMEANS_SAMPLE = 50_000
+
+# Distance blocks (queries x list points) hold about this many values
+BLOCK_ELEMENTS = 1 << 20
+
+# Up to this many queries are searched one by one instead of list by list
+SMALL_BATCH = 8
+
+
+def _squared_distances(X: np.ndarray, centroids: np.ndarray) -> np.ndarray:
+    """Jarak kuadrat (n, k); hanya untuk peringkat klaster, bukan jarak tetangga"""
+    return (np.einsum('ij,ij->i', X, X)[:, None] - 2 * X @ centroids.T
+            + np.einsum('ij,ij->i', centroids, centroids)[None, :])
+
+
+def kmeans(X: np.ndarray, n_clusters: int, n_iter: int = KMEANS_ITERATIONS,
+           seed: int = 0) -> np.ndarray:
+    """K-means (inisialisasi k-means++, iterasi Lloyd) dalam float64"""
+    rng = np.random.default_rng(seed)
+    sample = X if len(X) <= KMEANS_SAMPLE else X[rng.choice(len(X), KMEANS_SAMPLE, replace=False)]
+
+    centroids = np.empty((n_clusters, X.shape[1]))
+    centroids[0] = sample[rng.integers(len(sample))]
+    closest = ((sample - centroids[0]) ** 2).sum(axis=1)
+    for i in range(1, n_clusters):
+        total = closest.sum()
+        pick = rng.choice(len(sample), p=closest / total) if total > 0 else rng.integers(len(sample))
+        centroids[i] = sample[pick]
+        closest = np.minimum(closest, ((sample - centroids[i]) ** 2).sum(axis=1))
+
+    for _ in range(n_iter):
+        assignment = _squared_distances(sample, centroids).argmin(axis=1)
+        counts = np.bincount(assignment, minlength=n_clusters)
+        sums = np.zeros_like(centroids)
+        np.add.at(sums, assignment, sample)
+        empty = counts == 0
+        updated = np.where(empty[:, None], centroids, sums / np.maximum(counts, 1)[:, None])
+        # Empty clusters restart from random points
+        updated[empty] = sample[rng.choice(len(sample), int(empty.sum()), replace=False)]
+        if np.allclose(updated, centroids):
+            break
+        centroids = updated
+    return centroids
+
+
+def _check_model(model: Any):
+    if not hasattr(model, '_fit_X') or not hasattr(model, '_y'):
+        raise ValueError(f'{type(model).__name__} is not a fitted KNeighborsClassifier')
+    if getattr(model, 'effective_metric_', None) != 'euclidean':
+        raise ValueError(f'KNN index only supports the euclidean metric, got {model.effective_metric_}')
+    if model.weights != 'uniform':
+        raise ValueError(f'KNN index only supports uniform weights, got {model.weights}')
+    if np.ndim(model._y) != 1:
+        raise ValueError('KNN index only supports single-output classifiers')
+
+
+def _index_dir(sha256: str, n_lists: int, cache_root: str) -> str:
+    return os.path.join(cache_root, f'knn-{sha256[:16]}-{n_lists}')
+
+
+def _read_meta(directory: str) -> Optional[Dict]:
+    try:
+        with open(os.path.join(directory, INDEX_FILE), encoding='utf-8') as f:
+            meta = json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return None
+    return meta if meta.get('version') == INDEX_VERSION else None
+
+
+def _find_index(source: str, n_lists: Optional[int], cache_root: str) -> Optional[str]:
+    """Indeks yang ukuran + mtime sumbernya masih sama, tanpa hashing"""
+    if not os.path.isdir(cache_root):
+        return None
+    stat = os.stat(source)
+    for entry in sorted(os.listdir(cache_root)):
+        if not entry.startswith('knn-'):
+            continue
+        meta = _read_meta(os.path.join(cache_root, entry))
+        if (meta is not None and meta['source']['size'] == stat.st_size
+                and meta['source']['mtime_ns'] == stat.st_mtime_ns
+                and (n_lists is None or meta['n_lists'] == n_lists)):
+            return os.path.join(cache_root, entry)
+    return None
+
+
+def _restamp(directory: str, stat: os.stat_result) -> str:
+    """Catat ukuran + mtime sumber saat ini agar _find_index menemukan indeks tanpa hashing"""
+    meta = _read_meta(directory)
+    if (meta['source']['size'], meta['source']['mtime_ns']) != (stat.st_size, stat.st_mtime_ns):
+        meta['source'].update(size=stat.st_size, mtime_ns=stat.st_mtime_ns)
+        tmp_path = os.path.join(directory, f'{INDEX_FILE}.{os.getpid()}.tmp')
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(meta, f, indent=2)
+            f.write('\n')
+        os.replace(tmp_path, os.path.join(directory, INDEX_FILE))
+    return directory
+
+
+def build_index(model: Any, source: str, cache_root: Optional[str] = None,
+                n_lists: Optional[int] = None, seed: int = 0) -> str:
+    """
+    Bangun indeks IVF dari data training model dan simpan di cache_root;
+    mengembalikan direktori indeks. Indeks yang sudah terbit untuk isi
+    sumber yang sama dipakai ulang, tidak pernah dihapus.
+
+    Raises:
+        ValueError: model bukan KNeighborsClassifier euclidean berbobot uniform
+    """
+    _check_model(model)
+    cache_root = cache_root or KNN_INDEX_DIR
+    X = np.asarray(model._fit_X, dtype=np.float64)
+    n_samples = X.shape[0]
+    if n_lists is None:
+        n_lists = int(os.environ.get('KNN_NLISTS', 0)) or int(round(np.sqrt(n_samples)))
+    n_lists = max(1, min(n_lists, n_samples))
+
+    sha256 = file_hash(source)
+    stat = os.stat(source)
+    directory = _index_dir(sha256, n_lists, cache_root)
+    if _read_meta(directory) is not None:
+        # Same content under a new mtime, or another worker got here first
+        return _restamp(directory, stat)
+
+    centroids = kmeans(X, n_lists, seed=seed)
+    assignment = _squared_distances(X, centroids).argmin(axis=1)
+    rows = np.argsort(assignment, kind='stable')
+    offsets = np.concatenate([[0], np.cumsum(np.bincount(assignment, minlength=n_lists))])
+
+    os.makedirs(cache_root, exist_ok=True)
+    tmp_dir = tempfile.mkdtemp(dir=cache_root, prefix='.tmp-')
+    try:
+        train = np.lib.format.open_memmap(os.path.join(tmp_dir, 'train.npy'), mode='w+',
+                                          dtype=np.float32, shape=X.shape)
+        train[:] = X[rows]
+        train.flush()
+        del train
+        np.save(os.path.join(tmp_dir, 'labels.npy'), np.asarray(model._y)[rows].astype(np.int32))
+        np.save(os.path.join(tmp_dir, 'rows.npy'), rows.astype(np.int64))
+        np.save(os.path.join(tmp_dir, 'centroids.npy'), centroids.astype(np.float32))
+        np.save(os.path.join(tmp_dir, 'offsets.npy'), offsets.astype(np.int64))
+        meta = {
+            'version': INDEX_VERSION,
+            'source': {
+                'path': source.replace(os.sep, '/'),
+                'sha256': sha256,
+                'size': stat.st_size,
+                'mtime_ns': stat.st_mtime_ns,
+            },
+            'n_samples': n_samples,
+            'n_features': X.shape[1],
+            'n_lists': n_lists,
+            'n_neighbors': int(model.n_neighbors),
+            'classes': np.asarray(model.classes_).tolist(),
+            'seed': seed,
+            'created_at': datetime.now().isoformat(timespec='seconds'),
+        }
+        with open(os.path.join(tmp_dir, INDEX_FILE), 'w', encoding='utf-8') as f:
+            json.dump(meta, f, indent=2)
+            f.write('\n')
+
+        try:
+            os.replace(tmp_dir, directory)
+        except OSError:
+            # Several workers can build at once (gunicorn without preload); the
+            # first one to publish wins and the others reuse its index
+            if _read_meta(directory) is None:
+                raise
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+        return directory
+    except BaseException:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        raise
+
+
+class IVFKNeighborsClassifier:
+    """
+    Pengganti KNeighborsClassifier (predict/predict_proba/kneighbors) yang
+    mencari tetangga lewat indeks IVF
+    """
+
+    def __init__(self, directory: str, nprobe: Optional[int] = None):
+        meta = _read_meta(directory)
+        if meta is None:
+            raise FileNotFoundError(f'No KNN index in {directory}')
+        if nprobe is None:
+            nprobe = int(os.environ.get('KNN_NPROBE', 8))
+        self.directory = directory
+        self.meta = meta
+        self.train = np.load(os.path.join(directory, 'train.npy'), mmap_mode='r')
+        # Distances use |q|^2 - 2 q.x + |x|^2 in float64, like sklearn's euclidean_distances
+        self.norms = np.einsum('ij,ij->i', self.train.astype(np.float64), self.train.astype(np.float64))
+        self.labels = np.load(os.path.join(directory, 'labels.npy'))
+        self.rows = np.load(os.path.join(directory, 'rows.npy'))
+        self.centroids = np.load(os.path.join(directory, 'centroids.npy')).astype(np.float64)
+        self.offsets = np.load(os.path.join(directory, 'offsets.npy'))
+        self.classes_ = np.asarray(meta['classes'])
+        self.n_neighbors = meta['n_neighbors']
+        self.n_features_in_ = meta['n_features']
+        self.n_lists = meta['n_lists']
+        self.nprobe = nprobe
+
+    @classmethod
+    def open_or_build(cls, model: Any, source: str, cache_root: Optional[str] = None,
+                      n_lists: Optional[int] = None, nprobe: Optional[int] = None) -> 'IVFKNeighborsClassifier':
+        """Buka indeks untuk file model ini, bangun jika belum ada atau sumber berubah"""
+        if n_lists is None and os.environ.get('KNN_NLISTS'):
+            n_lists = int(os.environ['KNN_NLISTS'])
+        cache_root = cache_root or KNN_INDEX_DIR
+        directory = _find_index(source, n_lists, cache_root)
+        if directory is None:
+            directory = build_index(model, source, cache_root, n_lists)
+        return cls(directory, nprobe)
+
+    def _probes(self, queries: np.ndarray) -> np.ndarray:
+        """nprobe klaster terdekat per query (n, nprobe)"""
+        nprobe = max(1, min(self.nprobe, self.n_lists))
+        distances = _squared_distances(queries, self.centroids)
+        if nprobe == self.n_lists:
+            return np.broadcast_to(np.arange(self.n_lists), distances.shape)
+        return np.argpartition(distances, nprobe - 1, axis=1)[:, :nprobe]
+
+    def _search(self, queries: np.ndarray, k: int, probes: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """Top-k (jarak kuadrat, posisi di indeks) per query di atas list yang di-probe"""
+        n_queries = queries.shape[0]
+        best_d = np.full((n_queries, k), np.inf)
+        best_i = np.full((n_queries, k), -1, dtype=np.int64)
+        query_norms = np.einsum('ij,ij->i', queries, queries)
+
+        if n_queries <= SMALL_BATCH:
+            # Few queries: gather each query's candidates and score them at once
+            for row in range(n_queries):
+                positions = np.concatenate([
+                    np.arange(self.offsets[lst], self.offsets[lst + 1]) for lst in probes[row].tolist()
+                ])
+                points = self.train[positions].astype(np.float64)
+                distances = query_norms[row] - 2 * points @ queries[row] + self.norms[positions]
+                count = min(k, len(positions))
+                keep = np.argpartition(distances, count - 1)[:count] if count < len(positions) else slice(None)
+                best_d[row, :count] = distances[keep]
+                best_i[row, :count] = positions[keep]
+            return np.maximum(best_d, 0), best_i
+
+        # Many queries: walk the lists once, scoring every query that probes a
+        # list as one matrix product and merging into the running top-k
+        flat = probes.ravel()
+        order = np.argsort(flat, kind='stable')
+        lists, starts = np.unique(flat[order], return_index=True)
+        ends = np.append(starts[1:], len(flat))
+        for lst, start, end in zip(lists.tolist(), starts.tolist(), ends.tolist()):
+            first, last = self.offsets[lst], self.offsets[lst + 1]
+            if first == last:
+                continue
+            points = np.asarray(self.train[first:last], dtype=np.float64)
+            candidates = np.arange(first, last)
+            members = order[start:end] // probes.shape[1]
+            block = max(1, BLOCK_ELEMENTS // len(points))
+            for i in range(0, len(members), block):
+                q = members[i:i + block]
+                distances = (query_norms[q][:, None] - 2 * queries[q] @ points.T
+                             + self.norms[None, first:last])
+                merged_d = np.concatenate([best_d[q], distances], axis=1)
+                merged_i = np.concatenate([best_i[q], np.broadcast_to(candidates, distances.shape)], axis=1)
+                keep = np.argpartition(merged_d, k - 1, axis=1)[:, :k]
+                best_d[q] = np.take_along_axis(merged_d, keep, axis=1)
+                best_i[q] = np.take_along_axis(merged_i, keep, axis=1)
+        return np.maximum(best_d, 0), best_i
+
+    def _neighbours(self, X: np.ndarray, k: int) -> Tuple[np.ndarray, np.ndarray]:
+        """(jarak kuadrat, posisi di indeks) k tetangga, urut dari yang terdekat"""
+        queries = np.ascontiguousarray(X, dtype=np.float64)
+        if queries.ndim != 2 or queries.shape[1] != self.n_features_in_:
+            raise ValueError(f'Expected {self.n_features_in_} features, got shape {queries.shape}')
+        best_d, best_i = self._search(queries, k, self._probes(queries))
+
+        # Too few candidates in the probed lists: answer those queries exactly
+        short = np.flatnonzero(best_i[:, -1] < 0)
+        if len(short):
+            all_lists = np.broadcast_to(np.arange(self.n_lists), (len(short), self.n_lists))
+            best_d[short], best_i[short] = self._search(queries[short], k, all_lists)
+
+        order = np.argsort(best_d, axis=1, kind='stable')
+        return np.take_along_axis(best_d, order, axis=1), np.take_along_axis(best_i, order, axis=1)
+
+    def kneighbors(self, X: np.ndarray, n_neighbors: Optional[int] = None,
+                   return_distance: bool = True):
+        """Tetangga terdekat: jarak euclidean dan indeks baris di _fit_X asli"""
+        squared, positions = self._neighbours(X, n_neighbors or self.n_neighbors)
+        indices = self.rows[positions]
+        return (np.sqrt(squared), indices) if return_distance else indices
+
+    def predict_proba(self, X: np.ndarray) -> np.ndarray:
+        _, positions = self._neighbours(X, self.n_neighbors)
+        neighbour_labels = self.labels[positions]
+        counts = np.stack([(neighbour_labels == c).sum(axis=1) for c in range(len(self.classes_))], axis=1)
+        return counts / self.n_neighbors
+
+    def predict(self, X: np.ndarray) -> np.ndarray:
+        return self.classes_[self.predict_proba(X).argmax(axis=1)]
+
+
+def main():
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+    from dataset_store import load_dataset
+    from model_registry import ModelRegistry
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--nprobe', nargs='+', type=int, default=[1, 2, 4, 8, 16, 32])
+    parser.add_argument('--nlists', type=int)
+    parser.add_argument('--dataset', default=os.path.join('dataset', 'test-2.csv'))
+    parser.add_argument('--queries', type=int, default=300, help='query satu baris untuk latensi')
+    args = parser.parse_args()
+
+    registry = ModelRegistry(knn_index=False)
+    model = registry.get('knn')
+    index = IVFKNeighborsClassifier.open_or_build(model, registry.path('knn'), n_lists=args.nlists)
+    dataset = load_dataset(args.dataset)
+    X, y = dataset.matrix(), np.asarray(dataset.labels)
+    rows = [X[i:i + 1] for i in range(min(args.queries, len(X)))]
+
+    def timed(predict):
+        start = time.perf_counter()
+        labels = predict(X)
+        batch = time.perf_counter() - start
+        samples = []
+        for row in rows:
+            start = time.perf_counter()
+            predict(row)
+            samples.append(time.perf_counter() - start)
+        return labels, batch * 1e3, np.percentile(np.asarray(samples) * 1e6, 50)
+
+    exact_labels, exact_batch, exact_p50 = timed(model.predict)
+    exact_neighbours = model.kneighbors(X, return_distance=False)
+    exact_accuracy = float((exact_labels == y).mean())
+    print(f"index {index.directory}: {index.n_lists} lists, {len(index.rows)} samples")
+    print(f"{'nprobe':>6} {'accuracy':>9} {'delta':>9} {'agree':>7} {'recall@k':>9} "
+          f"{'batch ms':>9} {'1-row us':>9}")
+    print(f"{'exact':>6} {exact_accuracy:>9.5f} {0:>9.5f} {1:>7.4f} {1:>9.4f} {exact_batch:>9.1f} {exact_p50:>9.0f}")
+    for nprobe in args.nprobe:
+        index.nprobe = nprobe
+        labels, batch, p50 = timed(index.predict)
+        neighbours = index.kneighbors(X, return_distance=False)
+        recall = np.mean([len(np.intersect1d(a, b)) for a, b in zip(neighbours, exact_neighbours)]) / index.n_neighbors
+        accuracy = float((labels == y).mean())
+        print(f'{nprobe:>6} {accuracy:>9.5f} {accuracy - exact_accuracy:>+9.5f} '
+              f'{(labels == exact_labels).mean():>7.4f} {recall:>9.4f} {batch:>9.1f} {p50:>9.0f}')
+
+
+if __name__ == '__main__':
+    main()
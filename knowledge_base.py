@@ -8,12 +8,456 @@ Komponen:
 - Rule Engine: Evaluasi aturan bisnis
 - Knowledge Base: Fakta dan pola penipuan
 - Inference Engine: Forward chaining untuk reasoning
+
+Aturan dimuat dari fraud_rules.json sebagai snapshot RuleSet yang immutable.
+Perubahan aturan (file diedit, PUT /admin/rules, add_rule) membangun dan
+memvalidasi snapshot baru lalu menggantinya dalam satu assignment
+(copy-on-write), sehingga jalur request tidak pernah mengambil lock. Setiap
+proses worker memeriksa mtime file aturan paling sering sekali per
+RULES_CHECK_INTERVAL detik (default 2, negatif = nonaktif) dan memuat ulang
+jika berubah, jadi semua worker gunicorn mengikuti file yang sama.
 """
 
+import ast
+import hashlib
 import json
+import operator
+import os
+import string
+import tempfile
+import threading
+import warnings
 import numpy as np
-from typing import Dict, List, Tuple, Any
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Tuple
 from datetime import datetime, time
+from time import monotonic
+
+from metrics import NULL_METRICS, Metrics
+from velocity_store import EMPTY_VELOCITY, VELOCITY_VARIABLES
+
+
+# Variabel konteks yang boleh dipakai di kondisi aturan (lihat RuleEngine._prepare_context)
+CONTEXT_VARIABLES = frozenset({
+    'hour', 'amount', 'prob', 'extreme_features', 'very_extreme_features',
+    'time_seconds', 'ml_prediction', *VELOCITY_VARIABLES
+})
+
+
+RULES_FILE = os.environ.get('FRAUD_RULES_FILE', 'fraud_rules.json')
+RULES_CHECK_INTERVAL = float(os.environ.get('RULES_CHECK_INTERVAL', 2))
+
+RULE_ACTIONS = ('increase_risk', 'flag_high_risk', 'assert_fact')
+REQUIRED_RULE_FIELDS = ('id', 'name', 'condition', 'action', 'weight', 'description')
+# Aturan fakta tidak mengubah skor, jadi tidak butuh weight tetapi butuh nama fakta
+REQUIRED_FACT_RULE_FIELDS = ('id', 'name', 'condition', 'action', 'fact', 'description')
+
+
+class RuleCompilationError(ValueError):
+    """Kondisi aturan tidak valid atau memakai konstruksi yang tidak diizinkan"""
+
+
+class RuleNetwork:
+    """
+    Jaringan diskriminasi "Rete-lite" untuk satu rule set
+
+    Kondisi semua aturan dipecah menjadi predikat atomik (satu perbandingan
+    atau satu `in`); predikat yang sama di banyak aturan disimpan sekali.
+    Setiap predikat dievaluasi tepat sekali per transaksi, lalu hanya aturan
+    yang terindeks di bawah predikat yang bernilai benar yang diperiksa:
+    aturan konjungtif (hanya `and`) terpicu begitu semua predikatnya benar,
+    aturan dengan `or` / `not` dihitung dari nilai predikat yang sudah ada.
+    Biaya per transaksi tumbuh dengan jumlah predikat unik, bukan jumlah aturan.
+
+    Aturan fakta (action assert_fact) menurunkan fakta boolean yang bisa
+    dipakai aturan lain. Pencocokan berjalan sebagai forward chaining dengan
+    agenda: fakta baru hanya memicu evaluasi ulang predikat yang memakai fakta
+    tersebut dan aturan yang terindeks di bawahnya, sampai tidak ada fakta
+    baru (fixpoint). Aturan risiko dinilai setelah fixpoint tercapai.
+    """
+
+    def __init__(self, predicates: List[Tuple[Callable, Callable]], predicate_keys: List[Any],
+                 conjunctions: Dict[int, Tuple[int, ...]],
+                 expressions: List[Tuple[int, Callable, Callable]], n_rules: int,
+                 rule_facts: Optional[Dict[int, str]] = None,
+                 predicates_by_fact: Optional[Dict[str, List[int]]] = None):
+        self.predicates = predicates
+        self.predicate_keys = predicate_keys
+        self.conjunctions = conjunctions
+        self.expressions = expressions
+        self.n_rules = n_rules
+        self.rule_facts = rule_facts or {}
+        self.facts = tuple(dict.fromkeys(self.rule_facts.values()))
+        self.predicates_by_fact = predicates_by_fact or {}
+        self.expression_by_rule = {expression[0]: expression for expression in expressions}
+        self.required = {rule: len(atoms) for rule, atoms in conjunctions.items()}
+        self.rules_by_predicate = [[] for _ in predicates]
+        for rule, atoms in conjunctions.items():
+            for predicate in atoms:
+                self.rules_by_predicate[predicate].append(rule)
+
+    def match(self, context: Dict) -> List[int]:
+        """
+        Indeks aturan yang terpicu untuk satu transaksi, urut sesuai rule set
+
+        Fakta turunan ditulis ke context (True/False) saat pencocokan berjalan.
+        """
+        for fact in self.facts:
+            context[fact] = False
+        counts = {}
+        complete = set()
+        agenda = []
+        values = []
+        for predicate, rules in zip(self.predicates, self.rules_by_predicate):
+            value = predicate[0](context)
+            values.append(value)
+            if value:
+                for rule in rules:
+                    count = counts.get(rule, 0) + 1
+                    counts[rule] = count
+                    if count == self.required[rule]:
+                        complete.add(rule)
+                        if rule in self.rule_facts:
+                            agenda.append(rule)
+        for rule, expression, _ in self.expressions:
+            # Expression fact rules never read derived facts (see compile_network)
+            if rule in self.rule_facts and expression(values):
+                complete.add(rule)
+                agenda.append(rule)
+
+        while agenda:
+            fact = self.rule_facts[agenda.pop()]
+            if context[fact]:
+                continue
+            context[fact] = True
+            for index in self.predicates_by_fact.get(fact, ()):
+                value = self.predicates[index][0](context)
+                if value == values[index]:
+                    continue
+                values[index] = value
+                for rule in self.rules_by_predicate[index]:
+                    count = counts.get(rule, 0) + (1 if value else -1)
+                    counts[rule] = count
+                    if count == self.required[rule]:
+                        complete.add(rule)
+                        if rule in self.rule_facts:
+                            agenda.append(rule)
+                    else:
+                        complete.discard(rule)
+
+        for rule, expression, _ in self.expressions:
+            if rule not in self.rule_facts and expression(values):
+                complete.add(rule)
+        return sorted(complete)
+
+    def match_batch(self, context: Dict, n_rows: int) -> np.ndarray:
+        """
+        Mask (n_rows, n_rules) aturan yang terpicu untuk banyak transaksi
+
+        Mask fakta turunan diulang sampai fixpoint dan ditulis ke context.
+        """
+        for fact in self.facts:
+            context[fact] = np.zeros(n_rows, dtype=bool)
+        masks = [np.broadcast_to(batch(context), (n_rows,)) for _, batch in self.predicates]
+        fired = np.zeros((n_rows, self.n_rules), dtype=bool)
+        pending = range(self.n_rules)
+        while True:
+            for rule in pending:
+                if rule in self.conjunctions:
+                    atoms = self.conjunctions[rule]
+                    fired[:, rule] = np.logical_and.reduce([masks[predicate] for predicate in atoms])
+                else:
+                    fired[:, rule] = self.expression_by_rule[rule][2](masks)
+
+            changed = []
+            for rule, fact in self.rule_facts.items():
+                derived = context[fact] | fired[:, rule]
+                if not np.array_equal(derived, context[fact]):
+                    context[fact] = derived
+                    changed.append(fact)
+            if not changed:
+                return fired
+
+            # Only predicates reading a changed fact, and the rules indexed under them, are redone
+            affected = {index for fact in changed for index in self.predicates_by_fact.get(fact, ())}
+            for index in affected:
+                masks[index] = np.broadcast_to(self.predicates[index][1](context), (n_rows,))
+            pending = sorted({rule for index in affected for rule in self.rules_by_predicate[index]}
+                             | {rule for rule, _, _ in self.expressions if rule not in self.rule_facts})
+
+
+class RuleSet(NamedTuple):
+    """Snapshot aturan ter-compile; tidak pernah diubah, hanya diganti utuh"""
+    rules: Tuple[Dict, ...]
+    network: RuleNetwork
+    version: str                            # hash isi aturan, sama di semua worker
+    source_stamp: Optional[Tuple[int, int]]  # (ukuran, mtime_ns) file saat dimuat
+    loaded_at: str
+
+
+class RuleCompiler:
+    """
+    Compiler kondisi aturan menjadi closure Python
+
+    Kondisi di-parse sekali dengan modul ast dan hanya konstruksi berikut yang
+    diizinkan: perbandingan (<, <=, >, >=, ==, !=), and/or/not, operator `in`
+    / `not in` terhadap list literal, nama variabel konteks dan konstanta
+    numerik. Tidak ada eval() sehingga aturan tidak dapat menjalankan kode.
+
+    Setiap kondisi bisa di-compile dalam dua mode: skalar (konteks berisi
+    angka, hasil bool) dan batch (konteks berisi array NumPy, hasil mask bool).
+    """
+
+    COMPARE_OPS = {
+        ast.Gt: operator.gt, ast.GtE: operator.ge,
+        ast.Lt: operator.lt, ast.LtE: operator.le,
+        ast.Eq: operator.eq, ast.NotEq: operator.ne,
+    }
+    # `5000 < amount` is normalized to `amount > 5000` so both share one predicate
+    MIRRORED_OPS = {
+        ast.Gt: ast.Lt, ast.Lt: ast.Gt, ast.GtE: ast.LtE, ast.LtE: ast.GtE,
+        ast.Eq: ast.Eq, ast.NotEq: ast.NotEq,
+    }
+
+    def __init__(self, variables: frozenset = CONTEXT_VARIABLES):
+        self.variables = variables
+
+    def compile(self, condition: str) -> Callable[[Dict], bool]:
+        """Compile string kondisi menjadi fungsi context -> bool"""
+        predicate = self._compile_node(self._parse(condition), batch=False)
+        return lambda context: bool(predicate(context))
+
+    def compile_batch(self, condition: str) -> Callable[[Dict], np.ndarray]:
+        """Compile string kondisi menjadi fungsi context (array per kolom) -> mask bool"""
+        predicate = self._compile_node(self._parse(condition), batch=True)
+        return lambda context: np.asarray(predicate(context), dtype=bool)
+
+    def compile_network(self, conditions: List[str],
+                        rule_facts: Optional[Dict[int, str]] = None,
+                        rule_ids: Optional[List[str]] = None) -> RuleNetwork:
+        """
+        Compile kondisi semua aturan (urut sesuai rule set) menjadi satu RuleNetwork
+
+        Args:
+            conditions: kondisi setiap aturan
+            rule_facts: {indeks aturan: nama fakta} untuk aturan assert_fact;
+                nama fakta harus sudah termasuk di variabel compiler
+            rule_ids: ID setiap aturan untuk pesan error (default: indeks)
+        """
+        rule_facts = rule_facts or {}
+        facts = set(rule_facts.values())
+        predicates, keys, index, predicates_by_fact = [], [], {}, {}
+
+        def predicate_index(node: ast.AST) -> int:
+            node = self._normalize_atom(node)
+            key = self._atom_key(node)
+            if key not in index:
+                scalar = self._compile_node(node, batch=False)
+                batch = self._compile_node(node, batch=True)
+                index[key] = len(predicates)
+                predicates.append((
+                    lambda context, scalar=scalar: bool(scalar(context)),
+                    lambda context, batch=batch: np.asarray(batch(context), dtype=bool)
+                ))
+                keys.append(key)
+                for fact in self._names(node) & facts:
+                    predicates_by_fact.setdefault(fact, []).append(index[key])
+            return index[key]
+
+        conjunctions, expressions = {}, []
+        for rule, condition in enumerate(conditions):
+            try:
+                node = self._parse(condition)
+                atoms = self._conjuncts(node)
+                if rule in rule_facts:
+                    self._check_monotonic(condition, node, atoms, facts)
+                if atoms is not None:
+                    conjunctions[rule] = tuple(dict.fromkeys(predicate_index(atom) for atom in atoms))
+                else:
+                    expressions.append((
+                        rule,
+                        self._compile_expression(node, predicate_index, batch=False),
+                        self._compile_expression(node, predicate_index, batch=True)
+                    ))
+            except RuleCompilationError as e:
+                rule_id = rule_ids[rule] if rule_ids is not None else f'#{rule}'
+                raise RuleCompilationError(f"Aturan {rule_id} ditolak: {e}") from None
+        return RuleNetwork(predicates, keys, conjunctions, expressions, len(conditions),
+                           rule_facts, predicates_by_fact)
+
+    def _names(self, node: ast.AST) -> set:
+        return {child.id for child in ast.walk(node) if isinstance(child, ast.Name)}
+
+    def _check_monotonic(self, condition: str, node: ast.AST, atoms: Optional[List[ast.AST]],
+                         facts: set):
+        """
+        Aturan fakta hanya boleh memakai fakta turunan secara positif (`fakta and ...`),
+        sehingga fakta tidak pernah ditarik kembali dan fixpoint-nya unik
+        """
+        if not self._names(node) & facts:
+            return
+        positive = atoms is not None and all(
+            isinstance(atom, ast.Name) or not self._names(atom) & facts for atom in atoms
+        )
+        if not positive:
+            raise RuleCompilationError(
+                f"Kondisi {condition!r}: fakta turunan hanya boleh dipakai sebagai syarat "
+                f"'and' positif di aturan assert_fact"
+            )
+
+    def _split_chain(self, node: ast.Compare) -> List[ast.Compare]:
+        """`a < b < c` -> [`a < b`, `b < c`]"""
+        operands = [node.left] + node.comparators
+        return [
+            ast.Compare(left=operands[i], ops=[op], comparators=[operands[i + 1]])
+            for i, op in enumerate(node.ops)
+        ]
+
+    def _conjuncts(self, node: ast.AST) -> Optional[List[ast.AST]]:
+        """Predikat atomik jika kondisi murni konjungsi, None jika memakai or/not"""
+        if isinstance(node, ast.BoolOp):
+            if not isinstance(node.op, ast.And):
+                return None
+            atoms = []
+            for value in node.values:
+                sub = self._conjuncts(value)
+                if sub is None:
+                    return None
+                atoms += sub
+            return atoms
+        if isinstance(node, ast.UnaryOp) and isinstance(node.op, ast.Not):
+            return None
+        if isinstance(node, ast.Compare) and len(node.ops) > 1:
+            return self._split_chain(node)
+        return [node]
+
+    def _compile_expression(self, node: ast.AST, predicate_index: Callable[[ast.AST], int],
+                            batch: bool) -> Callable[[List], Any]:
+        """Kondisi dengan or/not sebagai fungsi atas nilai predikat atomik"""
+        if isinstance(node, ast.Compare) and len(node.ops) > 1:
+            node = ast.BoolOp(op=ast.And(), values=self._split_chain(node))
+        if isinstance(node, ast.BoolOp):
+            operands = [self._compile_expression(value, predicate_index, batch) for value in node.values]
+            if batch:
+                combine = np.logical_and if isinstance(node.op, ast.And) else np.logical_or
+                return lambda values: combine.reduce([operand(values) for operand in operands])
+            if isinstance(node.op, ast.And):
+                return lambda values: all(operand(values) for operand in operands)
+            return lambda values: any(operand(values) for operand in operands)
+        if isinstance(node, ast.UnaryOp) and isinstance(node.op, ast.Not):
+            operand = self._compile_expression(node.operand, predicate_index, batch)
+            if batch:
+                return lambda values: np.logical_not(operand(values))
+            return lambda values: not operand(values)
+        predicate = predicate_index(node)
+        return lambda values: values[predicate]
+
+    def _normalize_atom(self, node: ast.AST) -> ast.AST:
+        if (isinstance(node, ast.Compare) and not isinstance(node.left, ast.Name)
+                and isinstance(node.comparators[0], ast.Name)
+                and type(node.ops[0]) in self.MIRRORED_OPS):
+            return ast.Compare(left=node.comparators[0],
+                               ops=[self.MIRRORED_OPS[type(node.ops[0])]()],
+                               comparators=[node.left])
+        return node
+
+    def _atom_key(self, node: ast.AST) -> Any:
+        """Kunci kanonis predikat: (variabel, operator, konstanta)"""
+        if isinstance(node, ast.Compare) and isinstance(node.left, ast.Name):
+            op, right = node.ops[0], node.comparators[0]
+            if isinstance(op, (ast.In, ast.NotIn)) and isinstance(right, (ast.List, ast.Tuple, ast.Set)):
+                value = tuple(sorted({self._literal(element) for element in right.elts}))
+            elif isinstance(right, ast.Name):
+                value = ('variable', right.id)
+            else:
+                value = self._literal(right)
+            return (node.left.id, type(op).__name__, value)
+        return ast.dump(node)
+
+    def _parse(self, condition: str) -> ast.AST:
+        try:
+            return ast.parse(condition, mode='eval').body
+        except SyntaxError as e:
+            raise RuleCompilationError(f"Sintaks kondisi tidak valid: {condition!r} ({e.msg})")
+        except TypeError:
+            raise RuleCompilationError(f"Kondisi harus berupa string, bukan {type(condition).__name__}") from None
+
+    def _compile_node(self, node: ast.AST, batch: bool) -> Callable[[Dict], Any]:
+        if isinstance(node, ast.BoolOp):
+            operands = [self._compile_node(value, batch) for value in node.values]
+            if batch:
+                combine = np.logical_and if isinstance(node.op, ast.And) else np.logical_or
+                return lambda context: combine.reduce([operand(context) for operand in operands])
+            if isinstance(node.op, ast.And):
+                return lambda context: all(operand(context) for operand in operands)
+            return lambda context: any(operand(context) for operand in operands)
+
+        if isinstance(node, ast.UnaryOp) and isinstance(node.op, ast.Not):
+            operand = self._compile_node(node.operand, batch)
+            if batch:
+                return lambda context: np.logical_not(operand(context))
+            return lambda context: not operand(context)
+
+        if isinstance(node, ast.Compare):
+            return self._compile_compare(node, batch)
+
+        if isinstance(node, ast.Name):
+            if node.id not in self.variables:
+                raise RuleCompilationError(f"Variabel tidak dikenal: {node.id!r}")
+            name = node.id
+            return lambda context: context[name]
+
+        value = self._literal(node)
+        return lambda context: value
+
+    def _compile_compare(self, node: ast.Compare, batch: bool) -> Callable[[Dict], Any]:
+        left = self._compile_node(node.left, batch)
+        steps = []
+        for op, comparator in zip(node.ops, node.comparators):
+            if isinstance(op, (ast.In, ast.NotIn)):
+                if not isinstance(comparator, (ast.List, ast.Tuple, ast.Set)):
+                    raise RuleCompilationError("Operator 'in' hanya boleh terhadap list literal")
+                literals = [self._literal(element) for element in comparator.elts]
+                negate = isinstance(op, ast.NotIn)
+                if batch:
+                    members = np.array(literals)
+                    compare_op = lambda a, b, negate=negate: np.isin(a, b, invert=negate)
+                else:
+                    members = frozenset(literals)
+                    compare_op = lambda a, b, negate=negate: (a in b) != negate
+                steps.append((compare_op, lambda context, members=members: members))
+            elif type(op) in self.COMPARE_OPS:
+                steps.append((self.COMPARE_OPS[type(op)], self._compile_node(comparator, batch)))
+            else:
+                raise RuleCompilationError(f"Operator tidak diizinkan: {type(op).__name__}")
+
+        if batch:
+            def compare_batch(context):
+                current = left(context)
+                mask = True
+                for compare_op, right in steps:
+                    value = right(context)
+                    mask = np.logical_and(mask, compare_op(current, value))
+                    current = value
+                return mask
+            return compare_batch
+
+        def compare(context):
+            current = left(context)
+            for compare_op, right in steps:
+                value = right(context)
+                if not compare_op(current, value):
+                    return False
+                current = value
+            return True
+        return compare
+
+    def _literal(self, node: ast.AST) -> Any:
+        """Konstanta numerik/boolean (termasuk bilangan negatif)"""
+        if isinstance(node, ast.UnaryOp) and isinstance(node.op, ast.USub):
+            return -self._literal(node.operand)
+        if isinstance(node, ast.Constant) and isinstance(node.value, (int, float)):
+            return node.value
+        raise RuleCompilationError(f"Konstruksi tidak diizinkan: {ast.dump(node)}")
 
 
 class FraudKnowledgeBase:
@@ -21,7 +465,7 @@ class FraudKnowledgeBase:
     Knowledge Base untuk menyimpan fakta dan pola penipuan kartu kredit
     """
     
-    def __init__(self):
+    def __init__(self, rules_file: str = RULES_FILE, check_interval: float = RULES_CHECK_INTERVAL):
         self.facts = {
             # Pola waktu transaksi penipuan
             'high_risk_hours': [0, 1, 2, 3, 4, 5, 23],  # Tengah malam - subuh
@@ -65,17 +509,183 @@ class FraudKnowledgeBase:
             }
         }
         
-        # Load rules dari file jika ada
-        self.rules = self._load_rules()
+        # Load rules dari file jika ada, lalu compile sekali di sini
+        self.rules_file = rules_file
+        self.check_interval = check_interval
+        self.last_reload_error = None
+        self._write_lock = threading.Lock()
+        self._next_check = monotonic() + check_interval
+        self._rejected_stamp = None
+        stamp = self._stat_rules_file()
+        self._ruleset = self._build_ruleset(self._load_rules(), stamp)
+    
+    @property
+    def rules(self) -> List[Dict]:
+        return list(self._ruleset.rules)
+    
+    @property
+    def rules_version(self) -> str:
+        """Versi rule set: hash isi aturan, berubah setiap kali aturan berubah"""
+        return self._ruleset.version
+    
+    def snapshot(self) -> RuleSet:
+        """Snapshot aturan saat ini; satu request memakai satu snapshot"""
+        return self._ruleset
     
     def _load_rules(self) -> List[Dict]:
         """Load aturan dari file JSON"""
         try:
-            with open('fraud_rules.json', 'r', encoding='utf-8') as f:
+            with open(self.rules_file, 'r', encoding='utf-8') as f:
                 return json.load(f)
         except FileNotFoundError:
             return self._get_default_rules()
     
+    def _stat_rules_file(self) -> Optional[Tuple[int, int]]:
+        try:
+            stat = os.stat(self.rules_file)
+        except FileNotFoundError:
+            return None
+        return stat.st_size, stat.st_mtime_ns
+    
+    def _build_ruleset(self, rules: List[Dict], stamp: Optional[Tuple[int, int]]) -> RuleSet:
+        """Validasi dan compile seluruh aturan; gagal total jika satu aturan tidak valid"""
+        if not isinstance(rules, list):
+            raise RuleCompilationError("Rule set harus berupa list aturan")
+        for rule in rules:
+            self._validate_rule(rule)
+        ids = [rule['id'] for rule in rules]
+        duplicates = sorted({rule_id for rule_id in ids if ids.count(rule_id) > 1})
+        if duplicates:
+            raise RuleCompilationError(f"ID aturan duplikat: {', '.join(duplicates)}")
+        
+        # Derived facts become boolean variables that every rule may read
+        rule_facts = {
+            index: rule['fact'] for index, rule in enumerate(rules) if rule['action'] == 'assert_fact'
+        }
+        compiler = RuleCompiler(CONTEXT_VARIABLES | frozenset(rule_facts.values()))
+        network = compiler.compile_network([rule['condition'] for rule in rules], rule_facts, ids)
+        canonical = json.dumps(rules, sort_keys=True, ensure_ascii=False)
+        return RuleSet(
+            rules=tuple(rules),
+            network=network,
+            version=hashlib.sha256(canonical.encode('utf-8')).hexdigest()[:16],
+            source_stamp=stamp,
+            loaded_at=datetime.now().isoformat(timespec='seconds')
+        )
+    
+    def _validate_rule(self, rule: Dict):
+        """Periksa field wajib sesuai action aturan"""
+        if not isinstance(rule, dict):
+            raise RuleCompilationError(f"Aturan harus berupa object, bukan {type(rule).__name__}")
+        rule_id = rule.get('id', '?')
+        if rule.get('action') not in RULE_ACTIONS:
+            raise RuleCompilationError(f"Aturan {rule_id} ditolak: action '{rule.get('action')}' tidak dikenal")
+        fact_rule = rule['action'] == 'assert_fact'
+        required = REQUIRED_FACT_RULE_FIELDS if fact_rule else REQUIRED_RULE_FIELDS
+        missing = [field for field in required if field not in rule]
+        if missing:
+            raise RuleCompilationError(f"Aturan {rule_id} ditolak: field {', '.join(missing)} tidak ada")
+        if not isinstance(rule['id'], str):
+            raise RuleCompilationError(f"Aturan {rule_id!r} ditolak: id harus berupa string")
+        if not isinstance(rule['condition'], str):
+            raise RuleCompilationError(
+                f"Aturan {rule_id} ditolak: condition harus berupa string, bukan {type(rule['condition']).__name__}"
+            )
+        if fact_rule:
+            fact = rule['fact']
+            if not isinstance(fact, str) or not fact.isidentifier() or fact in CONTEXT_VARIABLES:
+                raise RuleCompilationError(f"Aturan {rule_id} ditolak: nama fakta {fact!r} tidak valid")
+            if 'pattern_description' in rule:
+                self._validate_template(rule_id, rule['pattern_description'])
+        elif isinstance(rule['weight'], bool) or not isinstance(rule['weight'], (int, float)):
+            raise RuleCompilationError(f"Aturan {rule_id} ditolak: weight harus berupa angka")
+    
+    def _validate_template(self, rule_id: str, template: str):
+        """Template deskripsi pola hanya boleh merujuk variabel konteks, mis. {amount:.2f}"""
+        try:
+            fields = [field for _, field, _, _ in string.Formatter().parse(template) if field is not None]
+            if any(field not in CONTEXT_VARIABLES for field in fields):
+                raise ValueError(f"hanya variabel {', '.join(sorted(CONTEXT_VARIABLES))} yang diizinkan")
+            template.format(**{name: 1 for name in CONTEXT_VARIABLES})
+        except (ValueError, TypeError) as e:
+            raise RuleCompilationError(f"Aturan {rule_id} ditolak: pattern_description tidak valid ({e})") from None
+    
+    def refresh(self) -> RuleSet:
+        """
+        Muat ulang aturan jika file berubah; dipanggil di jalur request
+
+        Pemeriksaan dibatasi sekali per check_interval dan tidak pernah
+        menunggu lock: jika thread lain sedang memuat ulang, snapshot saat ini
+        langsung dipakai. File yang tidak valid diabaikan (aturan lama tetap
+        aktif) dan dicatat di last_reload_error.
+        """
+        ruleset = self._ruleset
+        now = monotonic()
+        if self.check_interval < 0 or now < self._next_check:
+            return ruleset
+        self._next_check = now + self.check_interval
+        stamp = self._stat_rules_file()
+        if stamp is None or stamp == ruleset.source_stamp or stamp == self._rejected_stamp:
+            return ruleset
+        if not self._write_lock.acquire(blocking=False):
+            return ruleset
+        try:
+            self._reload_file(stamp)
+        except (OSError, ValueError) as e:
+            # A half-written or invalid file must not take the service down
+            self._rejected_stamp = stamp
+            self.last_reload_error = str(e)
+            warnings.warn(f"{self.rules_file} tidak dimuat ulang: {e}")
+        finally:
+            self._write_lock.release()
+        return self._ruleset
+    
+    def _reload_file(self, stamp: Optional[Tuple[int, int]]):
+        with open(self.rules_file, 'r', encoding='utf-8') as f:
+            rules = json.load(f)
+        self._ruleset = self._build_ruleset(rules, stamp)
+        self._rejected_stamp = None
+        self.last_reload_error = None
+    
+    def reload(self) -> RuleSet:
+        """
+        Muat ulang file aturan sekarang juga
+
+        Raises:
+            RuleCompilationError / ValueError: file berisi aturan tidak valid
+                (aturan lama tetap aktif)
+        """
+        with self._write_lock:
+            self._reload_file(self._stat_rules_file())
+        return self._ruleset
+    
+    def replace_rules(self, rules: List[Dict]) -> RuleSet:
+        """
+        Validasi rule set baru, tulis ke file aturan secara atomik lalu aktifkan
+
+        Worker lain mengikuti lewat refresh() begitu mtime file berubah.
+
+        Raises:
+            RuleCompilationError: ada aturan yang tidak valid (file tidak diubah)
+        """
+        with self._write_lock:
+            ruleset = self._build_ruleset(rules, None)
+            directory = os.path.dirname(os.path.abspath(self.rules_file))
+            fd, tmp_path = tempfile.mkstemp(dir=directory, prefix='.fraud_rules-', suffix='.tmp')
+            try:
+                with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                    json.dump(rules, f, indent=2, ensure_ascii=False)
+                    f.write('\n')
+                os.replace(tmp_path, self.rules_file)
+            except BaseException:
+                if os.path.exists(tmp_path):
+                    os.remove(tmp_path)
+                raise
+            self._ruleset = ruleset._replace(source_stamp=self._stat_rules_file())
+            self._rejected_stamp = None
+            self.last_reload_error = None
+        return self._ruleset
+    
     def _get_default_rules(self) -> List[Dict]:
         """Aturan default jika file tidak ditemukan"""
         return [
@@ -123,6 +733,55 @@ class FraudKnowledgeBase:
                 'weight': 0.25,
                 'description': 'Kombinasi berbahaya: waktu malam + nominal tinggi + ML prob tinggi',
                 'priority': 4
+            },
+            # Aturan fakta: pola penipuan yang diturunkan sebagai fakta
+            {
+                'id': 'P1',
+                'name': 'Transaksi Malam Nominal Besar',
+                'condition': 'hour in [0, 1, 2, 3, 4] and amount > 5000',
+                'action': 'assert_fact',
+                'fact': 'night_high_amount',
+                'priority': 1,
+                'description': 'Transaksi dengan nominal tinggi di jam tidak biasa',
+                'category': 'pattern_based',
+                'risk_level': 'HIGH',
+                'pattern_description': 'Transaksi $ {amount:.2f} pada jam {hour}:00'
+            },
+            {
+                'id': 'P2',
+                'name': 'Micro Transaction Mencurigakan',
+                'condition': 'amount < 0.5 and prob > 0.5',
+                'action': 'assert_fact',
+                'fact': 'card_testing',
+                'priority': 2,
+                'description': 'Transaksi mikro dengan probabilitas tinggi, pola testing kartu curian',
+                'category': 'pattern_based',
+                'risk_level': 'MEDIUM',
+                'pattern_description': 'Transaksi mikro $ {amount:.2f} dengan prob {prob:.2%}'
+            },
+            {
+                'id': 'P3',
+                'name': 'Anomali Fitur Ekstrim',
+                'condition': 'extreme_features > 5',
+                'action': 'assert_fact',
+                'fact': 'extreme_anomaly',
+                'priority': 1,
+                'description': 'Fitur PCA menunjukkan nilai sangat tidak normal',
+                'category': 'pattern_based',
+                'risk_level': 'HIGH',
+                'pattern_description': '{extreme_features} fitur menunjukkan nilai abnormal'
+            },
+            {
+                'id': 'P4',
+                'name': 'Multiple Micro Transactions',
+                'condition': 'velocity_micro_count >= 2 and amount < 0.5',
+                'action': 'assert_fact',
+                'fact': 'card_testing',
+                'priority': 1,
+                'description': 'Transaksi mikro yang sering digunakan untuk testing kartu curian',
+                'category': 'velocity_based',
+                'risk_level': 'HIGH',
+                'pattern_description': 'Transaksi mikro $ {amount:.2f} setelah {velocity_micro_count} transaksi mikro lain dalam jendela velocity'
             }
         ]
     
@@ -135,8 +794,10 @@ class FraudKnowledgeBase:
         return self.rules
     
     def add_rule(self, rule: Dict):
-        """Tambah aturan baru"""
-        self.rules.append(rule)
+        """Tambah aturan baru di proses ini (kondisi di-compile dulu, ditolak jika tidak valid)"""
+        with self._write_lock:
+            current = self._ruleset
+            self._ruleset = self._build_ruleset(list(current.rules) + [rule], current.source_stamp)
     
     def get_fraud_patterns(self) -> List[Dict]:
         """Ambil pola-pola penipuan yang diketahui"""
@@ -146,77 +807,213 @@ class FraudKnowledgeBase:
 class RuleEngine:
     """
     Rule Engine untuk mengevaluasi aturan bisnis fraud detection
+
+    Engine tidak menyimpan state per request: aturan yang terpicu dan jejak
+    reasoning hanya hidup di dalam satu pemanggilan evaluate(), sehingga satu
+    instance aman dipakai banyak thread sekaligus (gunicorn --threads).
+    
+    Jika diberi Metrics, durasi setiap fase (context, match, actions,
+    explain) dan jumlah setiap aturan terpicu dicatat.
     """
     
-    def __init__(self, knowledge_base: FraudKnowledgeBase):
+    def __init__(self, knowledge_base: FraudKnowledgeBase, metrics: Optional[Metrics] = None):
         self.kb = knowledge_base
-        self.fired_rules = []
-        self.reasoning_trace = []
+        self.metrics = metrics if metrics is not None else NULL_METRICS
     
-    def evaluate(self, features: Dict, ml_prediction: Dict) -> Dict:
+    def evaluate(self, features: Dict, ml_prediction: Dict, velocity: Optional[Dict] = None) -> Dict:
         """
         Evaluasi aturan berdasarkan fitur transaksi dan prediksi ML
         
         Args:
             features: Dictionary berisi fitur transaksi (Time, V1-V28, Amount)
             ml_prediction: Dictionary berisi hasil prediksi ML (prediction, probability, accuracy)
+            velocity: velocity kartu dari VelocityStore (default: tanpa riwayat, semua 0)
         
         Returns:
             Dictionary berisi hasil evaluasi lengkap dengan reasoning
         """
-        self.fired_rules = []
-        self.reasoning_trace = []
+        stopwatch = self.metrics.stopwatch('fraud_kb_phase_seconds', 'phase')
         
         # Ekstrak informasi dari features
-        context = self._prepare_context(features, ml_prediction)
+        context = self._prepare_context(features, ml_prediction, velocity)
+        stopwatch.lap('context')
         
-        # Evaluasi setiap aturan
+        # Evaluasi setiap aturan (satu snapshot untuk seluruh evaluasi)
+        ruleset = self.kb.snapshot()
         risk_score = ml_prediction['probability']
         rules_applied = []
+        reasoning_trace = []
+        
+        # Forward chaining to a fixpoint: fact rules derive facts first, then
+        # risk rules see every derived fact
+        fired = ruleset.network.match(context)
+        stopwatch.lap('match')
+        fact_rules = [ruleset.rules[index] for index in fired if index in ruleset.network.rule_facts]
+        risk_rules = [ruleset.rules[index] for index in fired if index not in ruleset.network.rule_facts]
+        
+        derived_facts = list(dict.fromkeys(rule['fact'] for rule in fact_rules))
+        for rule in fact_rules:
+            reasoning_trace.append(
+                f"→ Fakta {rule['fact']} diturunkan oleh {rule['id']}: {rule['description']}"
+            )
+        
+        # Actions are applied in rule-set order: flag_high_risk does not commute with increase_risk
+        for rule in risk_rules:
+            rules_applied.append({
+                'rule_id': rule['id'],
+                'rule_name': rule['name'],
+                'description': rule['description'],
+                'weight': rule['weight'],
+                'action': rule['action']
+            })
+            
+            # Apply rule action
+            if rule['action'] == 'increase_risk':
+                risk_score = min(1.0, risk_score + (rule['weight'] * (1 - risk_score)))
+            elif rule['action'] == 'flag_high_risk':
+                risk_score = max(risk_score, 0.7)
+            
+            reasoning_trace.append(
+                f"✓ Aturan {rule['id']} terpicu: {rule['description']}"
+            )
         
-        for rule in self.kb.get_rules():
-            if self._evaluate_rule(rule, context):
-                self.fired_rules.append(rule['id'])
-                rules_applied.append({
-                    'rule_id': rule['id'],
-                    'rule_name': rule['name'],
-                    'description': rule['description'],
-                    'weight': rule['weight'],
-                    'action': rule['action']
-                })
-                
-                # Apply rule action
-                if rule['action'] == 'increase_risk':
-                    risk_score = min(1.0, risk_score + (rule['weight'] * (1 - risk_score)))
-                elif rule['action'] == 'flag_high_risk':
-                    risk_score = max(risk_score, 0.7)
-                
-                self.reasoning_trace.append(
-                    f"✓ Aturan {rule['id']} terpicu: {rule['description']}"
-                )
+        stopwatch.lap('actions')
         
         # Tentukan klasifikasi final
         final_prediction = 1 if risk_score > 0.5 else 0
         confidence = 'TINGGI' if risk_score > 0.75 or risk_score < 0.25 else \
                     'SEDANG' if risk_score > 0.6 or risk_score < 0.4 else 'RENDAH'
         
-        # Deteksi pola penipuan yang diketahui
-        detected_patterns = self._detect_patterns(context)
+        # Pola penipuan = aturan fakta yang terpicu dan memiliki risk_level
+        detected_patterns = self._detect_patterns(fact_rules, context)
         
-        return {
+        result = {
             'final_prediction': final_prediction,
             'final_risk_score': float(risk_score),
             'ml_probability': ml_prediction['probability'],
             'risk_adjustment': float(risk_score - ml_prediction['probability']),
             'confidence_level': confidence,
             'rules_fired': rules_applied,
+            'derived_facts': derived_facts,
             'detected_patterns': detected_patterns,
-            'reasoning_trace': self.reasoning_trace,
+            'reasoning_trace': reasoning_trace,
             'recommendation': self._get_recommendation(final_prediction, risk_score, context),
-            'context_summary': self._summarize_context(context)
+            'context_summary': self._summarize_context(context),
+            'rules_version': ruleset.version,
+            # Every rule that matched (fact and risk rules), in rule-set order
+            'matched_rules': [ruleset.rules[index]['id'] for index in fired]
         }
+        stopwatch.lap('explain')
+        
+        self.record(result, mode='single')
+        return result
     
-    def _prepare_context(self, features: Dict, ml_prediction: Dict) -> Dict:
+    def record(self, result: Dict, mode: str = 'cached'):
+        """
+        Catat satu evaluasi di metrics; dipanggil juga untuk hasil evaluate
+        yang dilayani dari cache agar hitungan aturan tidak berkurang
+        """
+        if self.metrics.enabled:
+            self.metrics.inc('fraud_kb_evaluations_total', mode=mode)
+            for rule_id in result['matched_rules']:
+                self.metrics.inc('fraud_rule_fired_total', rule=rule_id)
+    
+    def evaluate_batch(self, features_matrix: np.ndarray, ml_probs: np.ndarray,
+                       ml_preds: np.ndarray = None, velocity: Optional[Dict] = None) -> Dict:
+        """
+        Evaluasi aturan untuk banyak transaksi sekaligus dengan operasi array
+        
+        Args:
+            features_matrix: Array (n, 30) dengan kolom [Time, V1-V28, Amount]
+            ml_probs: Array (n,) probabilitas fraud dari model ML
+            ml_preds: Array (n,) prediksi kelas ML (default: ml_probs > 0.5)
+            velocity: {variabel velocity: array (n,)} (default: semua 0)
+        
+        Returns:
+            Dictionary berisi array hasil per transaksi; nilainya identik dengan
+            memanggil evaluate() untuk setiap baris
+        """
+        features_matrix = np.asarray(features_matrix, dtype=float)
+        ml_probs = np.asarray(ml_probs, dtype=float)
+        if ml_preds is None:
+            ml_preds = (ml_probs > 0.5).astype(int)
+        context = self._prepare_batch_context(features_matrix, ml_probs, ml_preds, velocity)
+        n_rows = features_matrix.shape[0]
+        
+        ruleset = self.kb.snapshot()
+        risk_score = ml_probs.copy()
+        # Each distinct predicate is evaluated once over all rows and derived fact
+        # masks are iterated to a fixpoint; actions are applied in rule-set order
+        fired = ruleset.network.match_batch(context, n_rows)
+        
+        if self.metrics.enabled:
+            self.metrics.inc('fraud_kb_evaluations_total', n_rows, mode='batch')
+            for index, count in enumerate(fired.sum(axis=0).tolist()):
+                if count:
+                    self.metrics.inc('fraud_rule_fired_total', count, rule=ruleset.rules[index]['id'])
+        
+        for index, rule in enumerate(ruleset.rules):
+            mask = fired[:, index]
+            if not mask.any():
+                continue
+            
+            # Apply rule action hanya pada baris yang memicu aturan
+            if rule['action'] == 'increase_risk':
+                updated = np.minimum(1.0, risk_score + (rule['weight'] * (1 - risk_score)))
+            elif rule['action'] == 'flag_high_risk':
+                updated = np.maximum(risk_score, 0.7)
+            else:
+                continue
+            risk_score = np.where(mask, updated, risk_score)
+        
+        final_prediction = (risk_score > 0.5).astype(int)
+        confidence = np.select(
+            [(risk_score > 0.75) | (risk_score < 0.25), (risk_score > 0.6) | (risk_score < 0.4)],
+            ['TINGGI', 'SEDANG'],
+            default='RENDAH'
+        )
+        risk_indices = [
+            index for index in range(len(ruleset.rules)) if index not in ruleset.network.rule_facts
+        ]
+        rule_ids = [ruleset.rules[index]['id'] for index in risk_indices]
+        fired = fired[:, risk_indices]
+        
+        return {
+            'final_prediction': final_prediction,
+            'final_risk_score': risk_score,
+            'ml_probability': ml_probs,
+            'risk_adjustment': risk_score - ml_probs,
+            'confidence_level': confidence,
+            'rule_ids': rule_ids,
+            'fired_mask': fired,
+            'rules_fired': [[rule_ids[i] for i in np.flatnonzero(row)] for row in fired],
+            'derived_facts': {fact: context[fact] for fact in ruleset.network.facts},
+            'rules_version': ruleset.version
+        }
+    
+    def _prepare_batch_context(self, features_matrix: np.ndarray, ml_probs: np.ndarray,
+                               ml_preds: np.ndarray, velocity: Optional[Dict] = None) -> Dict:
+        """Versi array dari _prepare_context (satu array per variabel konteks)"""
+        time_seconds = features_matrix[:, 0]
+        v_features = np.abs(features_matrix[:, 1:29])
+        velocity = velocity or {}
+        context = {
+            name: np.asarray(velocity.get(name, np.zeros(len(time_seconds))))
+            for name in VELOCITY_VARIABLES
+        }
+        context.update({
+            'hour': ((time_seconds / 3600) % 24).astype(int),
+            'amount': features_matrix[:, -1],
+            'prob': ml_probs,
+            'extreme_features': np.count_nonzero(v_features > 3, axis=1),
+            'very_extreme_features': np.count_nonzero(v_features > 5, axis=1),
+            'time_seconds': time_seconds,
+            'ml_prediction': np.asarray(ml_preds)
+        })
+        return context
+    
+    def _prepare_context(self, features: Dict, ml_prediction: Dict,
+                         velocity: Optional[Dict] = None) -> Dict:
         """Siapkan konteks untuk evaluasi aturan"""
         # Ekstrak waktu dari Time (asumsi dalam detik)
         time_seconds = features.get('Time', 0)
@@ -230,7 +1027,10 @@ class RuleEngine:
         amount = features.get('Amount', 0)
         prob = ml_prediction['probability']
         
-        return {
+        context = dict(EMPTY_VELOCITY)
+        if velocity:
+            context.update((name, velocity[name]) for name in VELOCITY_VARIABLES if name in velocity)
+        context.update({
             'hour': hour,
             'amount': amount,
             'prob': prob,
@@ -239,49 +1039,24 @@ class RuleEngine:
             'v_features': v_features,
             'time_seconds': time_seconds,
             'ml_prediction': ml_prediction['prediction']
-        }
+        })
+        return context
     
-    def _evaluate_rule(self, rule: Dict, context: Dict) -> bool:
-        """Evaluasi apakah sebuah aturan terpenuhi"""
-        try:
-            condition = rule['condition']
-            # Evaluasi kondisi dengan context
-            return eval(condition, {"__builtins__": {}}, context)
-        except Exception as e:
-            self.reasoning_trace.append(f"⚠ Error evaluasi aturan {rule['id']}: {str(e)}")
-            return False
-    
-    def _detect_patterns(self, context: Dict) -> List[Dict]:
-        """Deteksi pola penipuan yang diketahui"""
-        detected = []
-        
-        # Pattern 1: Transaksi Malam Nominal Besar
-        if context['hour'] in [0, 1, 2, 3, 4] and \
-           context['amount'] > 5000:
-            detected.append({
-                'pattern': 'Transaksi Malam Nominal Besar',
-                'risk_level': 'HIGH',
-                'description': f"Transaksi $ {context['amount']:.2f} pada jam {context['hour']}:00"
-            })
-        
-        # Pattern 2: Multiple characteristics (micro transaction)
-        if context['amount'] < self.kb.get_fact('micro_transaction_threshold') and \
-           context['prob'] > 0.5:
-            detected.append({
-                'pattern': 'Micro Transaction Mencurigakan',
-                'risk_level': 'MEDIUM',
-                'description': f"Transaksi mikro $ {context['amount']:.2f} dengan prob {context['prob']:.2%}"
-            })
-        
-        # Pattern 3: Anomali Fitur Ekstrim
-        if context['extreme_features'] > 5:
-            detected.append({
-                'pattern': 'Anomali Fitur Ekstrim',
-                'risk_level': 'HIGH',
-                'description': f"{context['extreme_features']} fitur menunjukkan nilai abnormal"
-            })
-        
-        return detected
+    def _detect_patterns(self, fact_rules: List[Dict], context: Dict) -> List[Dict]:
+        """
+        Pola penipuan yang dikenali dari aturan fakta yang terpicu; hanya
+        pattern_description (divalidasi saat load) yang diisi variabel
+        konteks, description biasa dipakai apa adanya
+        """
+        return [
+            {
+                'pattern': rule['name'],
+                'risk_level': rule['risk_level'],
+                'description': (rule['pattern_description'].format(**context)
+                                if 'pattern_description' in rule else rule['description'])
+            }
+            for rule in fact_rules if 'risk_level' in rule
+        ]
     
     def _get_recommendation(self, prediction: int, risk_score: float, context: Dict) -> str:
         """Berikan rekomendasi tindakan"""
@@ -315,17 +1090,19 @@ class InferenceEngine:
     Inference Engine untuk forward chaining reasoning
     """
     
-    def __init__(self, knowledge_base: FraudKnowledgeBase):
+    def __init__(self, knowledge_base: FraudKnowledgeBase, metrics: Optional[Metrics] = None):
         self.kb = knowledge_base
-        self.rule_engine = RuleEngine(knowledge_base)
+        self.rule_engine = RuleEngine(knowledge_base, metrics)
     
-    def infer(self, features: Dict, ml_prediction: Dict) -> Dict:
+    def infer(self, features: Dict, ml_prediction: Dict, velocity: Optional[Dict] = None) -> Dict:
         """
         Lakukan inferensi menggunakan forward chaining
         Gabungkan hasil ML dengan knowledge base reasoning
+        (velocity: riwayat kartu dari VelocityStore, opsional)
         """
-        # Evaluasi menggunakan rule engine
-        kb_result = self.rule_engine.evaluate(features, ml_prediction)
+        # Ambil aturan terbaru jika file aturan berubah, lalu evaluasi
+        self.kb.refresh()
+        kb_result = self.rule_engine.evaluate(features, ml_prediction, velocity)
         
         # Tambahkan metadata
         kb_result['inference_method'] = 'Forward Chaining dengan Rule-Based Reasoning'
@@ -334,6 +1111,17 @@ class InferenceEngine:
         
         return kb_result
     
+    def infer_batch(self, features_matrix: np.ndarray, ml_probs: np.ndarray,
+                    ml_preds: np.ndarray = None, velocity: Optional[Dict] = None) -> Dict:
+        """
+        Inferensi untuk banyak transaksi sekaligus (backtesting/batch scoring)
+        """
+        self.kb.refresh()
+        kb_result = self.rule_engine.evaluate_batch(features_matrix, ml_probs, ml_preds, velocity)
+        kb_result['inference_method'] = 'Forward Chaining dengan Rule-Based Reasoning'
+        kb_result['knowledge_base_version'] = '1.0'
+        return kb_result
+    
     def explain(self, result: Dict) -> str:
         """
         Generate penjelasan lengkap dalam bahasa Indonesia
@@ -394,10 +1182,10 @@ class InferenceEngine:
 
 
 # Fungsi helper untuk integrasi mudah
-def create_fraud_detection_system():
+def create_fraud_detection_system(metrics: Optional[Metrics] = None):
     """Factory function untuk membuat sistem deteksi fraud lengkap"""
     kb = FraudKnowledgeBase()
-    inference_engine = InferenceEngine(kb)
+    inference_engine = InferenceEngine(kb, metrics)
     return inference_engine
 
 
@@ -0,0 +1,223 @@
+"""
+Metrik Runtime (Prometheus)
+===========================
+Instrumentasi ringan untuk jalur prediksi: timer monotonic per tahap,
+counter dan histogram per model dan per aturan, diekspor dalam format teks
+Prometheus oleh endpoint /metrics.
+
+Metrik dimatikan secara default. Selama nonaktif setiap pemanggilan
+inc/observe/timer/stopwatch langsung kembali (timer dan stopwatch berupa
+objek kosong bersama), jadi jalur prediksi tidak membayar apa pun selain
+satu pengecekan atribut.
+
+Nilai disimpan di memori setiap proses; dengan beberapa worker gunicorn
+setiap worker melaporkan angkanya sendiri (scrape per worker atau pakai
+satu worker dengan --threads).
+
+Konfigurasi:
+- METRICS_ENABLED: 1/true untuk mengaktifkan pengumpulan dan /metrics (default nonaktif)
+"""
+
+import math
+import os
+import threading
+import time
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+
+# Latency buckets in seconds (0.1 ms .. 2.5 s)
+DEFAULT_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01,
+                   0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+
+# Nama metrik -> (tipe, deskripsi)
+METRIC_DEFINITIONS = {
+    'fraud_request_seconds': ('histogram', 'HTTP request latency per endpoint and status'),
+    'fraud_stage_seconds': ('histogram', 'Latency of each stage inside a prediction endpoint'),
+    'fraud_model_seconds': ('histogram', 'Model scoring latency (predict_proba) per model'),
+    'fraud_model_rows_total': ('counter', 'Rows scored per model'),
+    'fraud_kb_phase_seconds': ('histogram', 'Rule engine latency per phase'),
+    'fraud_kb_evaluations_total': ('counter', 'Transactions evaluated by the rule engine'),
+    'fraud_rule_fired_total': ('counter', 'Times each rule fired'),
+}
+
+Labels = Tuple[Tuple[str, str], ...]
+
+
+def _label_key(labels: Dict) -> Labels:
+    return tuple(sorted((name, str(value)) for name, value in labels.items()))
+
+
+def _format_labels(labels: Labels, extra: Labels = ()) -> str:
+    pairs = labels + extra
+    if not pairs:
+        return ''
+    escaped = (
+        f'{name}="' + value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') + '"'
+        for name, value in pairs
+    )
+    return '{' + ','.join(escaped) + '}'
+
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return '+Inf' if value > 0 else '-Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _NullTimer:
+    """Timer/stopwatch kosong yang dipakai saat metrik nonaktif"""
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def lap(self, label_value: str):
+        pass
+
+
+_NULL_TIMER = _NullTimer()
+
+
+class _Timer:
+    __slots__ = ('metrics', 'name', 'labels', 'started')
+
+    def __init__(self, metrics: 'Metrics', name: str, labels: Dict):
+        self.metrics = metrics
+        self.name = name
+        self.labels = labels
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.metrics.observe(self.name, time.perf_counter() - self.started, **self.labels)
+        return False
+
+
+class _Stopwatch:
+    """
+    Mengukur tahap berurutan tanpa blok with bersarang: lap('x') mencatat
+    waktu sejak lap sebelumnya (atau sejak dibuat) dengan label tahap 'x'
+    """
+    __slots__ = ('metrics', 'name', 'label', 'labels', 'last')
+
+    def __init__(self, metrics: 'Metrics', name: str, label: str, labels: Dict):
+        self.metrics = metrics
+        self.name = name
+        self.label = label
+        self.labels = labels
+        self.last = time.perf_counter()
+
+    def lap(self, label_value: str):
+        now = time.perf_counter()
+        self.metrics.observe(self.name, now - self.last, **{self.label: label_value}, **self.labels)
+        self.last = now
+
+
+class Metrics:
+    """
+    Registry counter/histogram berlabel, aman untuk banyak thread
+    """
+
+    def __init__(self, enabled: Optional[bool] = None, buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        if enabled is None:
+            enabled = os.environ.get('METRICS_ENABLED', '').lower() in ('1', 'true', 'yes')
+        self.enabled = enabled
+        self.buckets = tuple(sorted(buckets))
+        self._counters = {}
+        self._histograms = {}
+        self._collectors = []
+        self._lock = threading.Lock()
+
+    def inc(self, name: str, amount: float = 1, **labels):
+        """Tambah counter"""
+        if not self.enabled:
+            return
+        key = (name, _label_key(labels))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + amount
+
+    def observe(self, name: str, value: float, **labels):
+        """Catat satu nilai ke histogram"""
+        if not self.enabled:
+            return
+        key = (name, _label_key(labels))
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                # Per-bucket (non-cumulative) counts, sum, count
+                histogram = self._histograms[key] = [[0] * len(self.buckets), 0.0, 0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    histogram[0][i] += 1
+                    break
+            histogram[1] += value
+            histogram[2] += 1
+
+    def timer(self, name: str, **labels):
+        """Context manager yang mencatat durasi blok ke histogram"""
+        if not self.enabled:
+            return _NULL_TIMER
+        return _Timer(self, name, labels)
+
+    def stopwatch(self, name: str, label: str, **labels):
+        """Stopwatch untuk tahap berurutan (lihat _Stopwatch)"""
+        if not self.enabled:
+            return _NULL_TIMER
+        return _Stopwatch(self, name, label, labels)
+
+    def add_collector(self, collector: Callable[[], Iterable[Tuple[str, str, str, Dict, float]]]):
+        """
+        Daftarkan fungsi yang dipanggil saat render dan mengembalikan
+        (nama, tipe, deskripsi, labels, nilai) untuk statistik yang sudah
+        dihitung di tempat lain (cache, velocity store, ...)
+        """
+        self._collectors.append(collector)
+
+    def reset(self):
+        with self._lock:
+            self._counters.clear()
+            self._histograms.clear()
+
+    def render(self) -> str:
+        """Semua metrik dalam format teks Prometheus 0.0.4"""
+        with self._lock:
+            counters = dict(self._counters)
+            histograms = {key: (list(h[0]), h[1], h[2]) for key, h in self._histograms.items()}
+
+        families = {}
+        for (name, labels), value in sorted(counters.items()):
+            families.setdefault(name, []).append(f'{name}{_format_labels(labels)} {_format_value(value)}')
+        for (name, labels), (counts, total, count) in sorted(histograms.items()):
+            lines = families.setdefault(name, [])
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets, counts):
+                cumulative += bucket_count
+                lines.append(f"{name}_bucket{_format_labels(labels, (('le', _format_value(bound)),))} {cumulative}")
+            lines.append(f"{name}_bucket{_format_labels(labels, (('le', '+Inf'),))} {count}")
+            lines.append(f'{name}_sum{_format_labels(labels)} {_format_value(total)}')
+            lines.append(f'{name}_count{_format_labels(labels)} {count}')
+
+        definitions = dict(METRIC_DEFINITIONS)
+        for collector in self._collectors:
+            for name, kind, description, labels, value in collector():
+                definitions.setdefault(name, (kind, description))
+                families.setdefault(name, []).append(
+                    f'{name}{_format_labels(_label_key(labels))} {_format_value(value)}'
+                )
+
+        output: List[str] = []
+        for name in sorted(families):
+            kind, description = definitions.get(name, ('untyped', ''))
+            output.append(f'# HELP {name} {description}')
+            output.append(f'# TYPE {name} {kind}')
+            output.extend(families[name])
+        return '\n'.join(output) + '\n'
+
+
+# Shared disabled instance for components constructed without metrics
+NULL_METRICS = Metrics(enabled=False)
@@ -0,0 +1,185 @@
+"""
+Model Metrics untuk Sistem Deteksi Penipuan
+===========================================
+Tabel metrik model (accuracy, precision, recall, AUC) yang dihitung offline
+dan disimpan sebagai artifact JSON, dikunci dengan hash SHA-256 file model
+dan dataset evaluasi.
+
+Saat boot aplikasi cukup membaca artifact ini. Metrik sebuah model hanya
+dihitung ulang (saat pertama kali dibutuhkan) jika hash file modelnya
+berubah atau belum ada di artifact.
+
+Metrik dicatat per backend registry: model asli sklearn memakai nama model
+sebagai kunci, backend lain (COMPILED_TREES, FAST_LINEAR, indeks IVF
+KNN_INDEX) memakai '<nama>@<backend>', sehingga akurasi eksak dan
+aproksimasi tidak saling menimpa.
+
+Penggunaan offline:
+    python model_metrics.py            # hitung metrik yang basi/belum ada
+    python model_metrics.py --force    # hitung ulang semua model
+"""
+
+import argparse
+import json
+import os
+import threading
+import warnings
+from datetime import datetime
+from typing import Dict, Optional
+
+import numpy as np
+from sklearn.metrics import accuracy_score, precision_score, recall_score, roc_auc_score
+
+from dataset_store import file_hash, load_dataset, source_hash
+from model_registry import ModelRegistry
+
+
+METRICS_FILE = os.path.join('ml model', 'model_metrics.json')
+EVAL_DATASET = os.path.join('dataset', 'test-2.csv')
+
+
+def evaluate_model(model, X, y) -> Dict:
+    """Hitung metrik klasifikasi sebuah model pada (X, y)"""
+    pred = model.predict(X)
+    metrics = {
+        'accuracy': float(accuracy_score(y, pred)),
+        'precision': float(precision_score(y, pred, zero_division=0)),
+        'recall': float(recall_score(y, pred, zero_division=0)),
+        'auc': None,
+    }
+    if hasattr(model, 'predict_proba') and len(np.unique(y)) == 2:
+        metrics['auc'] = float(roc_auc_score(y, model.predict_proba(X)[:, 1]))
+    return metrics
+
+
+class ModelMetrics:
+    """
+    Akses tabel metrik yang dipersistenkan, dengan perhitungan ulang lazy
+    untuk model yang file-nya berubah
+    """
+
+    def __init__(self, registry: ModelRegistry, path: str = METRICS_FILE,
+                 dataset: str = EVAL_DATASET):
+        self.registry = registry
+        self.path = path
+        self.dataset = dataset
+        self._lock = threading.Lock()
+        self._hashes = {}
+        self._dataset_hash = None
+        self._eval_data = None
+        self._artifact = self._read()
+
+    def _read(self) -> Dict:
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return {'dataset': None, 'models': {}}
+
+    def _write(self):
+        # Merge with what other workers may have written since we read it
+        on_disk = self._read()
+        if on_disk.get('dataset') == self._artifact.get('dataset'):
+            merged = dict(on_disk.get('models', {}))
+            merged.update(self._artifact['models'])
+            self._artifact['models'] = merged
+        tmp_path = f'{self.path}.{os.getpid()}.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self._artifact, f, indent=2, sort_keys=True)
+            f.write('\n')
+        os.replace(tmp_path, self.path)
+
+    def _model_hash(self, name: str) -> str:
+        # Keyed by size + mtime so a replaced model file is hashed (and evaluated) again
+        stat = os.stat(self.registry.path(name))
+        key = (name, stat.st_size, stat.st_mtime_ns)
+        if key not in self._hashes:
+            self._hashes[key] = file_hash(self.registry.path(name))
+        return self._hashes[key]
+
+    def _current_dataset(self) -> Dict:
+        if self._dataset_hash is None:
+            self._dataset_hash = source_hash(self.dataset)
+        return {'path': self.dataset.replace(os.sep, '/'), 'sha256': self._dataset_hash}
+
+    def eval_data(self):
+        """(X, y) dataset evaluasi sebagai array NumPy, dimuat sekali dari cache kolumnar"""
+        if self._eval_data is None:
+            dataset = load_dataset(self.dataset)
+            self._eval_data = (dataset.matrix(), np.asarray(dataset.labels))
+        return self._eval_data
+
+    def _key(self, name: str) -> str:
+        """Kunci artifact untuk model dengan backend registry saat ini"""
+        backend = self.registry.backend(name)
+        return name if backend == 'sklearn' else f'{name}@{backend}'
+
+    def is_fresh(self, name: str) -> bool:
+        """Apakah metrik tersimpan masih cocok dengan file model dan dataset"""
+        entry = self._artifact['models'].get(self._key(name))
+        return (
+            entry is not None
+            and self._artifact.get('dataset') == self._current_dataset()
+            and entry.get('model_sha256') == self._model_hash(name)
+        )
+
+    def get(self, name: str, force: bool = False) -> Dict:
+        """Metrik sebuah model; dihitung ulang jika basi"""
+        key = self._key(name)
+        if not force and self.is_fresh(name):
+            return self._artifact['models'][key]
+
+        with self._lock:
+            if not force and self.is_fresh(name):
+                return self._artifact['models'][key]
+
+            model = self.registry.get(name)
+            X, y = self.eval_data()
+            entry = evaluate_model(model, X, y)
+            entry['backend'] = self.registry.backend(name)
+            entry['model_sha256'] = self._model_hash(name)
+            entry['evaluated_at'] = datetime.now().isoformat(timespec='seconds')
+
+            dataset = self._current_dataset()
+            if self._artifact.get('dataset') != dataset:
+                self._artifact = {'dataset': dataset, 'models': {}}
+            self._artifact['models'][key] = entry
+            self._write()
+            return entry
+
+    def accuracy(self, name: str) -> float:
+        """Accuracy sebuah model pada dataset evaluasi"""
+        return self.get(name)['accuracy']
+
+    def cached(self) -> Dict[str, Dict]:
+        """
+        Metrik yang sudah tersimpan dan masih valid untuk backend saat ini
+        (tanpa menghitung ulang)
+        """
+        return {
+            name: self._artifact['models'][self._key(name)] for name in self.registry.names()
+            if os.path.exists(self.registry.path(name)) and self.is_fresh(name)
+        }
+
+
+def main(argv: Optional[list] = None):
+    parser = argparse.ArgumentParser(description='Evaluasi offline model ML dan simpan tabel metrik')
+    parser.add_argument('--force', action='store_true', help='hitung ulang semua model')
+    parser.add_argument('--output', default=METRICS_FILE)
+    parser.add_argument('--dataset', default=EVAL_DATASET)
+    args = parser.parse_args(argv)
+    warnings.filterwarnings('ignore', category=UserWarning)
+
+    registry = ModelRegistry(max_resident=1)
+    metrics = ModelMetrics(registry, path=args.output, dataset=args.dataset)
+    for name in registry.available():
+        fresh = metrics.is_fresh(name)
+        entry = metrics.get(name, force=args.force)
+        status = 'cached' if fresh and not args.force else 'evaluated'
+        auc = f"{entry['auc']:.4f}" if entry['auc'] is not None else '-'
+        print(f"{name:<10} {status:<10} acc={entry['accuracy']:.4f} "
+              f"prec={entry['precision']:.4f} rec={entry['recall']:.4f} auc={auc}")
+
+
+if __name__ == '__main__':
+    main()
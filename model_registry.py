@@ -0,0 +1,267 @@
+"""
+Model Registry untuk Sistem Deteksi Penipuan
+============================================
+Memuat model ML secara lazy (saat pertama kali diminta) dan hanya menyimpan
+sejumlah terbatas model di memori dengan kebijakan LRU.
+
+Dengan begitu worker gunicorn tidak perlu meng-unpickle kedelapan model saat
+import, dan model besar (KNN, SVM) hanya dimuat jika memang dipakai.
+
+Konfigurasi:
+- MODEL_CACHE_SIZE: jumlah maksimum model yang tetap berada di memori
+  (default: semua model)
+- MODEL_CHECK_INTERVAL: detik antar pemeriksaan ukuran + mtime file model
+  yang sudah dimuat; file yang berubah dimuat ulang (default 2, negatif
+  menonaktifkan)
+- MODEL_PRELOAD: mode pemuatan di gunicorn, lihat gunicorn.conf.py
+- COMPILED_TREES: model pohon yang batch kecilnya diskor prediktor array
+  datar (daftar dipisah koma, 'all' untuk semua model pohon, default kosong;
+  lihat tree_compiler.py)
+- KNN_INDEX: 1/true agar model 'knn' mencari tetangga lewat indeks IVF
+  (lihat knn_index.py)
+- FAST_LINEAR: model linear/SVM yang diskor dengan operasi matriks NumPy
+  (daftar dipisah koma, 'all' untuk logreg dan svm, default kosong; lihat
+  fast_linear.py)
+"""
+
+import os
+import pickle
+import threading
+from collections import OrderedDict
+from time import monotonic
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import xgboost as xgb
+
+from transaction_features import strip_feature_names
+from fast_linear import compile_fast
+from knn_index import IVFKNeighborsClassifier
+from tree_compiler import CompiledTreeModel
+
+
+MODEL_DIR = 'ml model'
+MODEL_CHECK_INTERVAL = float(os.environ.get('MODEL_CHECK_INTERVAL', 2))
+
+# Nama model -> nama file di MODEL_DIR
+MODEL_FILES = {
+    'logreg': 'logreg_model.pkl',
+    'svm': 'svm_model.pkl',
+    'knn': 'knn_model.pkl',
+    'rf': 'rf_model.pkl',
+    'dt': 'dt_model.pkl',
+    'gb': 'gb_model.pkl',
+    'xgb': 'xgb_model.json',
+    'adaboost': 'adaboost_model.pkl',
+}
+
+# Models that tree_compiler can flatten
+TREE_MODELS = ('dt', 'rf', 'gb', 'xgb', 'adaboost')
+
+# Models that fast_linear can score with plain matrix ops
+LINEAR_MODELS = ('logreg', 'svm')
+
+
+class ModelNotAvailable(LookupError):
+    """Model dikenal tetapi file-nya tidak ada atau gagal dimuat"""
+
+
+def _load_pickle(path: str) -> Any:
+    with open(path, 'rb') as f:
+        return pickle.load(f)
+
+
+def _load_xgb(path: str) -> Any:
+    model = xgb.XGBClassifier()
+    model.load_model(path)
+    # The JSON was saved from the raw booster, so the sklearn wrapper does not
+    # restore n_classes_ and predict_proba fails without it
+    model.n_classes_ = 2
+    return model
+
+
+class ModelRegistry:
+    """
+    Registry model dengan lazy loading dan cache LRU berukuran terbatas
+    """
+
+    def __init__(self, model_dir: str = MODEL_DIR, max_resident: Optional[int] = None,
+                 compiled: Optional[Iterable[str]] = None, knn_index: Optional[bool] = None,
+                 fast: Optional[Iterable[str]] = None, check_interval: float = MODEL_CHECK_INTERVAL):
+        self.model_dir = model_dir
+        self.check_interval = check_interval
+        if max_resident is None:
+            max_resident = int(os.environ.get('MODEL_CACHE_SIZE', len(MODEL_FILES)))
+        self.max_resident = max(1, max_resident)
+        if compiled is None:
+            compiled = [name.strip() for name in os.environ.get('COMPILED_TREES', '').split(',') if name.strip()]
+        if 'all' in compiled:
+            compiled = TREE_MODELS
+        unknown = set(compiled) - set(TREE_MODELS)
+        if unknown:
+            raise ValueError(f'COMPILED_TREES: not tree models: {sorted(unknown)}')
+        self.compiled = frozenset(compiled)
+        if knn_index is None:
+            knn_index = os.environ.get('KNN_INDEX', '').lower() in ('1', 'true', 'yes')
+        self.knn_index = knn_index
+        if fast is None:
+            fast = [name.strip() for name in os.environ.get('FAST_LINEAR', '').split(',') if name.strip()]
+        if 'all' in fast:
+            fast = LINEAR_MODELS
+        unknown = set(fast) - set(LINEAR_MODELS)
+        if unknown:
+            raise ValueError(f'FAST_LINEAR: not linear/SVM models: {sorted(unknown)}')
+        self.fast = frozenset(fast)
+        self._models = OrderedDict()
+        self._next_check = {}
+        self._lock = threading.Lock()
+        self._load_locks = {name: threading.Lock() for name in MODEL_FILES}
+        self.loads = 0
+        self.evictions = 0
+        self.preload_skipped: List[str] = []
+
+    def path(self, name: str) -> str:
+        """Path file model"""
+        return os.path.join(self.model_dir, MODEL_FILES[name])
+
+    def names(self) -> List[str]:
+        """Semua nama model yang dikenal registry"""
+        return list(MODEL_FILES)
+
+    def available(self) -> List[str]:
+        """Nama model yang file-nya tersedia di disk"""
+        return [name for name in MODEL_FILES if os.path.exists(self.path(name))]
+
+    def backend(self, name: str) -> str:
+        """Implementasi yang menskor model: 'compiled', 'fast', 'ivf' atau 'sklearn' (model asli)"""
+        if name in self.compiled:
+            return 'compiled'
+        if name in self.fast:
+            return 'fast'
+        if name == 'knn' and self.knn_index:
+            return 'ivf'
+        return 'sklearn'
+
+    def loaded(self) -> List[str]:
+        """Nama model yang saat ini berada di memori (paling lama dipakai dulu)"""
+        with self._lock:
+            return list(self._models)
+
+    def get(self, name: str) -> Any:
+        """
+        Ambil model, muat dari disk jika belum ada di memori
+
+        Raises:
+            KeyError: nama model tidak dikenal
+            ModelNotAvailable: file model tidak ada atau gagal dimuat
+        """
+        return self.get_versioned(name)[0]
+
+    def get_versioned(self, name: str) -> Tuple[Any, Tuple]:
+        """
+        (model, fingerprint) dengan fingerprint = (ukuran, mtime_ns) file saat
+        model dimuat; berubah setiap kali model dimuat dari file yang berbeda.
+        Model yang file-nya berubah sejak dimuat (diperiksa sekali per
+        check_interval) dimuat ulang.
+        """
+        if name not in MODEL_FILES:
+            raise KeyError(name)
+
+        entry = self._resident(name)
+        if entry is not None:
+            return entry
+
+        # One loader per model name, so concurrent requests for the same
+        # model unpickle it only once while other models stay available
+        with self._load_locks[name]:
+            entry = self._resident(name)
+            if entry is not None:
+                return entry
+
+            entry = self._load(name)
+
+            with self._lock:
+                self._models[name] = entry
+                self._next_check[name] = monotonic() + self.check_interval
+                self.loads += 1
+                while len(self._models) > self.max_resident:
+                    self._models.popitem(last=False)
+                    self.evictions += 1
+            return entry
+
+    def _resident(self, name: str) -> Optional[Tuple[Any, Tuple]]:
+        """Entri model di memori; None jika belum dimuat atau file-nya sudah berubah"""
+        with self._lock:
+            entry = self._models.get(name)
+            if entry is None:
+                return None
+            self._models.move_to_end(name)
+            now = monotonic()
+            if self.check_interval < 0 or now < self._next_check.get(name, 0):
+                return entry
+            self._next_check[name] = now + self.check_interval
+        try:
+            stat = os.stat(self.path(name))
+        except OSError:
+            # File removed or unreadable: keep serving the resident model
+            return entry
+        if (stat.st_size, stat.st_mtime_ns) == entry[1]:
+            return entry
+        with self._lock:
+            if self._models.get(name) is entry:
+                del self._models[name]
+        return None
+
+    def _load(self, name: str) -> Tuple[Any, Tuple]:
+        path = self.path(name)
+        if not os.path.exists(path):
+            raise ModelNotAvailable(f"Model '{name}' tidak tersedia: {path} tidak ditemukan")
+        try:
+            stat = os.stat(path)
+            model = _load_xgb(path) if path.endswith('.json') else _load_pickle(path)
+            # Models are always fed plain arrays in FEATURE_NAMES order
+            model = strip_feature_names(model)
+            backend = self.backend(name)
+            if backend == 'compiled':
+                model = CompiledTreeModel(model)
+            elif backend == 'fast':
+                model = compile_fast(model)
+            elif backend == 'ivf':
+                model = IVFKNeighborsClassifier.open_or_build(model, path)
+            return model, (stat.st_size, stat.st_mtime_ns)
+        except Exception as e:
+            raise ModelNotAvailable(f"Model '{name}' gagal dimuat: {e}") from e
+
+    def preload(self, names: Optional[List[str]] = None) -> List[str]:
+        """
+        Muat model sekaligus (default: semua yang tersedia), misalnya di proses
+        master gunicorn sebelum fork agar halaman memorinya dibagi antar worker
+
+        Batas max_resident (MODEL_CACHE_SIZE) tetap berlaku: hanya model
+        pertama sebanyak batas itu yang dimuat, sisanya dicatat di
+        preload_skipped dan dimuat lazy seperti biasa.
+        """
+        names = self.available() if names is None else names
+        self.preload_skipped = list(names[self.max_resident:])
+        for name in names[:self.max_resident]:
+            self.get(name)
+        return self.loaded()
+
+    def evict(self, name: str) -> bool:
+        """Keluarkan model dari memori"""
+        with self._lock:
+            return self._models.pop(name, None) is not None
+
+    def stats(self) -> Dict:
+        """Status registry untuk monitoring"""
+        return {
+            'known': self.names(),
+            'available': self.available(),
+            'loaded': self.loaded(),
+            'max_resident': self.max_resident,
+            'preload_skipped': self.preload_skipped,
+            'compiled': sorted(self.compiled),
+            'knn_index': self.knn_index,
+            'fast': sorted(self.fast),
+            'loads': self.loads,
+            'evictions': self.evictions,
+        }
@@ -0,0 +1,129 @@
+"""
+Cache Hasil Prediksi
+====================
+Klien yang retry dan antrean offline PWA (OfflinePredictionQueue di
+static/js/pwa.js) mengirim ulang payload /predict* yang identik setelah
+koneksi pulih. Cache LRU + TTL berukuran terbatas ini dipasang di depan
+inferensi model (InferenceCore) dan inferensi Knowledge Base sehingga
+vektor fitur yang sama tidak diskor berulang kali.
+
+Kunci cache adalah hash SHA-256 dari vektor fitur yang dikanonisasi
+(float64 C-contiguous, -0.0 dinormalisasi menjadi 0.0) ditambah komponen
+versi: fingerprint file model yang sedang dimuat (ukuran + mtime) dan versi
+rule set Knowledge Base. Jika model dimuat ulang dari file baru atau aturan
+berubah, kunci lama tidak pernah cocok lagi dan keluar sendiri lewat
+LRU/TTL, jadi invalidasi terjadi otomatis.
+
+Konfigurasi:
+- PREDICTION_CACHE_SIZE: jumlah entri maksimum per cache (default 4096, 0 = nonaktif)
+- PREDICTION_CACHE_TTL: umur entri dalam detik (default 300)
+- PREDICTION_CACHE_MAX_ROWS: batch lebih besar dari ini tidak di-cache (default 64)
+"""
+
+import hashlib
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Optional
+
+import numpy as np
+
+
+def features_digest(features: np.ndarray) -> bytes:
+    """Hash kanonis matriks fitur (bentuk + nilai float64)"""
+    canonical = np.ascontiguousarray(features, dtype=np.float64) + 0.0  # -0.0 -> 0.0
+    sha = hashlib.sha256()
+    sha.update(str(canonical.shape).encode())
+    sha.update(canonical.tobytes())
+    return sha.digest()
+
+
+class PredictionCache:
+    """
+    Cache LRU dengan TTL dan penghitung hit/miss, aman untuk banyak thread
+    """
+
+    def __init__(self, max_entries: Optional[int] = None, ttl: Optional[float] = None,
+                 max_rows: Optional[int] = None, clock: Callable[[], float] = time.monotonic):
+        if max_entries is None:
+            max_entries = int(os.environ.get('PREDICTION_CACHE_SIZE', 4096))
+        if ttl is None:
+            ttl = float(os.environ.get('PREDICTION_CACHE_TTL', 300))
+        if max_rows is None:
+            max_rows = int(os.environ.get('PREDICTION_CACHE_MAX_ROWS', 64))
+        self.max_entries = max(0, max_entries)
+        self.ttl = ttl
+        self.max_rows = max_rows
+        self._clock = clock
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_entries > 0
+
+    def accepts(self, features: np.ndarray) -> bool:
+        """Apakah batch ini cukup kecil untuk di-cache"""
+        return self.enabled and features.shape[0] <= self.max_rows
+
+    def get(self, key: Hashable) -> Any:
+        """Nilai ter-cache atau None (miss / kedaluwarsa)"""
+        now = self._clock()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                expires_at, value = entry
+                if expires_at > now:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self._entries[key]
+                self.expirations += 1
+            self.misses += 1
+            return None
+
+    def put(self, key: Hashable, value: Any):
+        if not self.enabled:
+            return
+        with self._lock:
+            self._entries[key] = (self._clock() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def get_or_compute(self, key: Hashable, compute: Callable[[], Any]) -> Any:
+        """Ambil dari cache atau hitung lalu simpan (dihitung di luar lock)"""
+        if not self.enabled:
+            return compute()
+        value = self.get(key)
+        if value is None:
+            value = compute()
+            self.put(key, value)
+        return value
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict:
+        """Statistik untuk monitoring"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'enabled': self.enabled,
+                'entries': len(self._entries),
+                'max_entries': self.max_entries,
+                'ttl_seconds': self.ttl,
+                'max_rows': self.max_rows,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+                'evictions': self.evictions,
+                'expirations': self.expirations,
+            }
@@ -1,4 +1,3 @@
-import pandas as pd
 import pickle
 from sklearn.linear_model import LogisticRegression
 from sklearn.svm import SVC
@@ -7,8 +6,10 @@ from sklearn.ensemble import RandomForestClassifier, GradientBoostingClassifier,
 from sklearn.tree import DecisionTreeClassifier
 import xgboost as xgb
 
-# Load your dataset
-df = pd.read_csv('dataset/creditcard_2023.csv')
+from dataset_store import load_dataset
+
+# Load your dataset (parsed once into the columnar cache, memory-mapped afterwards)
+df = load_dataset('dataset/creditcard_2023.csv').frame()
 X = df.drop('Class', axis=1)
 y = df['Class']
 
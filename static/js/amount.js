@@ -27,43 +27,48 @@ window.addEventListener("resize", function () {
 
 document.getElementById("csvFile").addEventListener("change", function (e) {
   if (!e.target.files.length) return;
-  Papa.parse(e.target.files[0], {
-    header: true,
-    dynamicTyping: true,
-    skipEmptyLines: true,
-    complete: function (results) {
-      const data = results.data;
-      renderAmountTrends(data);
-    },
-  });
+  const formData = new FormData();
+  formData.append("file", e.target.files[0]);
+  fetch("/analytics", { method: "POST", body: formData })
+    .then(readJson)
+    .then((result) => {
+      localStorage.setItem("creditcard_dataset_id", result.dataset_id);
+      return fetch(
+        `/analytics/${result.dataset_id}?sections=amount_histogram,time_buckets`
+      ).then(readJson);
+    })
+    .then(renderAmountTrends)
+    .catch((error) => alert("Error processing CSV file: " + error.message));
 });
 
-function renderAmountTrends(data) {
-  const columns = Object.keys(data[0]);
-  const amountCol = columns.find((c) => c.toLowerCase() === "amount");
-  const classCol = columns.find((c) => c.toLowerCase() === "class");
-  const idCol = columns.find((c) => c.toLowerCase() === "id");
+function readJson(response) {
+  return response.json().then((body) => {
+    if (!response.ok) throw new Error(body.error || response.statusText);
+    return body;
+  });
+}
+
+// Pre-binned histogram -> bar trace (bin centers, bin width)
+function histogramTrace(histogram, key, name, color) {
+  const edges = histogram.edges;
+  return {
+    x: edges.slice(0, -1).map((edge, i) => (edge + edges[i + 1]) / 2),
+    y: histogram[key],
+    width: edges.slice(0, -1).map((edge, i) => edges[i + 1] - edge),
+    type: "bar",
+    name: name,
+    marker: { color: color },
+    opacity: 0.7,
+  };
+}
 
+function renderAmountTrends(analytics) {
   // Amount Distribution
-  const amounts = data.map((row) => row[amountCol]);
-  const classes = data.map((row) => row[classCol]);
   Plotly.newPlot(
     "amount-distribution",
     [
-      {
-        x: amounts.filter((_, i) => classes[i] == 0),
-        type: "histogram",
-        name: "Non-Fraudulent",
-        marker: { color: "#2ecc40" },
-        opacity: 0.7,
-      },
-      {
-        x: amounts.filter((_, i) => classes[i] == 1),
-        type: "histogram",
-        name: "Fraudulent",
-        marker: { color: "#ff4136" },
-        opacity: 0.7,
-      },
+      histogramTrace(analytics.amount_histogram, "legit", "Non-Fraudulent", "#2ecc40"),
+      histogramTrace(analytics.amount_histogram, "fraud", "Fraudulent", "#ff4136"),
     ],
     {
       barmode: "overlay",
@@ -76,22 +81,13 @@ function renderAmountTrends(data) {
   );
 
   // Average Amount Over Time
-  let idBuckets = {};
-  data.forEach((row) => {
-    let bucket = Math.floor(row[idCol] / 3600);
-    if (!idBuckets[bucket]) idBuckets[bucket] = { sum: 0, count: 0 };
-    idBuckets[bucket].sum += row[amountCol];
-    idBuckets[bucket].count += 1;
-  });
-  const buckets = Object.keys(idBuckets)
-    .map(Number)
-    .sort((a, b) => a - b);
+  const buckets = analytics.time_buckets;
   Plotly.newPlot(
     "avg-amount-trend",
     [
       {
-        x: buckets,
-        y: buckets.map((b) => idBuckets[b].sum / idBuckets[b].count),
+        x: buckets.bucket,
+        y: buckets.avg_amount,
         type: "scatter",
         mode: "lines+markers",
         name: "Average Amount",
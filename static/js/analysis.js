@@ -26,43 +26,38 @@ window.addEventListener("resize", function () {
 });
 
 document.addEventListener("DOMContentLoaded", function () {
-  const stored = localStorage.getItem("creditcard_csv_data");
-  if (stored) {
-    const data = JSON.parse(stored);
-    updateAnalysisSummary(data);
-    renderMathTable(data);
-    mathematicalAnalysis(data);
-  } else {
+  const datasetId = localStorage.getItem("creditcard_dataset_id");
+  const noData = () => {
     document.getElementById("math-table-container").innerHTML =
       '<p style="color:#ff4136;">No data found. Please upload a CSV file on the Dashboard page first.</p>';
+  };
+  if (!datasetId) {
+    noData();
+    return;
   }
+  fetch(`/analytics/${datasetId}?sections=summary,feature_stats`)
+    .then((response) => {
+      if (!response.ok) throw new Error(response.statusText);
+      return response.json();
+    })
+    .then((analytics) => {
+      updateAnalysisSummary(analytics.summary);
+      renderMathTable(analytics.feature_stats);
+      mathematicalAnalysis(analytics.feature_stats);
+    })
+    .catch(noData);
 });
 
-function updateAnalysisSummary(data) {
-  const total = data.length;
-  const frauds = data.filter((row) => row["Class"] === 1);
-  const legit = data.filter((row) => row["Class"] === 0);
-  const fraudCount = frauds.length;
-  const legitCount = legit.length;
-  const fraudRate = ((fraudCount / total) * 100).toFixed(4);
-
-  const avgFraud = frauds.length
-    ? (
-        frauds.map((r) => +r["Amount"]).reduce((a, b) => a + b, 0) /
-        frauds.length
-      ).toFixed(2)
-    : 0;
-  const avgLegit = legit.length
-    ? (
-        legit.map((r) => +r["Amount"]).reduce((a, b) => a + b, 0) / legit.length
-      ).toFixed(2)
-    : 0;
+function updateAnalysisSummary(summary) {
+  const fraudRate = (summary.fraud_rate * 100).toFixed(4);
+  const avgFraud = summary.avg_amount_fraud.toFixed(2);
+  const avgLegit = summary.avg_amount_legit.toFixed(2);
 
   document.getElementById("analysis-summary").innerHTML = `
         <ul>
-          <li><strong>Total Transactions:</strong> ${total}</li>
-          <li><strong>Fraudulent Transactions:</strong> ${fraudCount}</li>
-          <li><strong>Legitimate Transactions:</strong> ${legitCount}</li>
+          <li><strong>Total Transactions:</strong> ${summary.total}</li>
+          <li><strong>Fraudulent Transactions:</strong> ${summary.fraud}</li>
+          <li><strong>Legitimate Transactions:</strong> ${summary.legit}</li>
           <li><strong>Fraud Rate:</strong> ${fraudRate}%</li>
           <li><strong>Average Fraudulent Transaction Amount:</strong> $${avgFraud}</li>
           <li><strong>Average Legitimate Transaction Amount:</strong> $${avgLegit}</li>
@@ -70,67 +65,26 @@ function updateAnalysisSummary(data) {
       `;
 }
 
-function renderMathTable(data) {
-  if (!data || !data.length) {
-    document.getElementById("math-table-container").innerHTML =
-      '<p style="color:#ff4136;">No data found in file.</p>';
-    return;
-  }
-  const columns = Object.keys(data[0]);
-  const classCol = columns.find((c) => c.toLowerCase() === "class");
-  const featureCols = columns.filter(
-    (c) => /^v\d+$/i.test(c) || ["amount", "id"].includes(c.toLowerCase())
-  );
-
-  // Prepare class array for correlation
-  const classArr = data.map((row) => row[classCol]);
-
-  // Helper functions
-  function mean(arr) {
-    return arr.reduce((a, b) => a + b, 0) / arr.length;
-  }
-  function std(arr, m) {
-    return Math.sqrt(
-      arr.reduce((a, b) => a + Math.pow(b - m, 2), 0) / arr.length
-    );
-  }
-  function corr(x, y) {
-    const mx = mean(x),
-      my = mean(y);
-    const sx = std(x, mx),
-      sy = std(y, my);
-    if (sx === 0 || sy === 0) return 0;
-    const cov =
-      x.reduce((a, xi, i) => a + (xi - mx) * (y[i] - my), 0) / x.length;
-    return cov / (sx * sy);
-  }
-  function min(arr) {
-    return Math.min(...arr);
-  }
-  function max(arr) {
-    return Math.max(...arr);
-  }
+// Missing values (e.g. correlation of a constant column) arrive as null
+function fixed(value) {
+  return value === null ? "-" : value.toFixed(5);
+}
 
+function renderMathTable(stats) {
   // Build table rows
-  let rows = featureCols
-    .map((col) => {
-      const arr = data.map((row) => row[col]);
-      const m = mean(arr);
-      const s = std(arr, m);
-      const mn = min(arr);
-      const mx = max(arr);
-      const c = corr(arr, classArr);
+  let rows = stats.features
+    .map((col, i) => {
       const highlight =
         col.toLowerCase() === "amount"
           ? ' style="font-weight:bold;background:#e3f2fd;"'
           : "";
       return `<tr${highlight}>
                 <td>${col}</td>
-                <td>${m.toFixed(5)}</td>
-                <td>${s.toFixed(5)}</td>
-                <td>${mn.toFixed(5)}</td>
-                <td>${mx.toFixed(5)}</td>
-                <td>${c.toFixed(5)}</td>
+                <td>${fixed(stats.mean[i])}</td>
+                <td>${fixed(stats.std[i])}</td>
+                <td>${fixed(stats.min[i])}</td>
+                <td>${fixed(stats.max[i])}</td>
+                <td>${fixed(stats.corr_with_class[i])}</td>
             </tr>`;
     })
     .join("");
@@ -154,67 +108,27 @@ function renderMathTable(data) {
         `;
 }
 
-function mathematicalAnalysis(data) {
-  const keys = Object.keys(data[0]).filter(
-    (k) =>
-      k !== "Class" &&
-      k.toLowerCase() !== "id" &&
-      data.some((row) => typeof row[k] === "number")
-  );
-
-  const vKeys = keys
-    .filter((k) => /^v\d+$/i.test(k))
-    .sort((a, b) => {
-      const aNum = parseInt(a.replace(/^v/i, ""), 10);
-      const bNum = parseInt(b.replace(/^v/i, ""), 10);
-      return aNum - bNum;
-    });
-  const otherKeys = keys.filter(
-    (k) => !/^v\d+$/i.test(k) && k.toLowerCase() !== "amount"
-  );
-  let sortedKeys = [...vKeys, ...otherKeys];
-
-  if (keys.some((k) => k.toLowerCase() === "amount")) {
-    sortedKeys = sortedKeys.filter((k) => k.toLowerCase() !== "amount");
-    sortedKeys.push("Amount");
-  }
-
-  const fraud = data.filter((row) => row["Class"] === 1);
-  const legit = data.filter((row) => row["Class"] === 0);
-
-  // Use mean difference as a proxy for feature importance
-  let importances = sortedKeys.map((k) => {
-    const fraudMean =
-      fraud
-        .map((r) => +r[k])
-        .filter((x) => !isNaN(x))
-        .reduce((a, b) => a + b, 0) / (fraud.length || 1);
-    const legitMean =
-      legit
-        .map((r) => +r[k])
-        .filter((x) => !isNaN(x))
-        .reduce((a, b) => a + b, 0) / (legit.length || 1);
-    return {
-      feature: k,
-      fraudMean,
-      legitMean,
-      diff: Math.abs(fraudMean - legitMean),
-    };
-  });
-
-  // Build table rows
-  let rows = importances
+function mathematicalAnalysis(stats) {
+  // V1-V28 followed by Amount; mean difference is a proxy for feature importance
+  let rows = stats.features
+    .map((feature, i) => ({
+      feature,
+      fraudMean: stats.fraud_mean[i],
+      legitMean: stats.legit_mean[i],
+      diff: stats.mean_difference[i],
+    }))
+    .filter((row) => row.feature.toLowerCase() !== "id")
     .map(
-      (row, idx) => `
+      (row) => `
           <tr${
             row.feature.toLowerCase() === "amount"
               ? ' style="font-weight:bold;background:#e3f2fd;"'
               : ""
           }>
             <td>${row.feature}</td>
-            <td>${row.fraudMean.toFixed(5)}</td>
-            <td>${row.legitMean.toFixed(5)}</td>
-            <td>${row.diff.toFixed(5)}</td>
+            <td>${fixed(row.fraudMean)}</td>
+            <td>${fixed(row.legitMean)}</td>
+            <td>${fixed(row.diff)}</td>
           </tr>
         `
     )
@@ -27,41 +27,36 @@ window.addEventListener("resize", function () {
 
 document.getElementById("csvFile").addEventListener("change", function (e) {
   if (!e.target.files.length) return;
-  Papa.parse(e.target.files[0], {
-    header: true,
-    dynamicTyping: true,
-    skipEmptyLines: true,
-    complete: function (results) {
-      const data = results.data;
-      renderFeatureImportance(data);
-    },
-  });
+  const formData = new FormData();
+  formData.append("file", e.target.files[0]);
+  fetch("/analytics", { method: "POST", body: formData })
+    .then(readJson)
+    .then((result) => {
+      localStorage.setItem("creditcard_dataset_id", result.dataset_id);
+      return fetch(
+        `/analytics/${result.dataset_id}?sections=feature_stats,correlation`
+      ).then(readJson);
+    })
+    .then(renderFeatureImportance)
+    .catch((error) => alert("Error processing CSV file: " + error.message));
 });
 
-function renderFeatureImportance(data) {
-  const columns = Object.keys(data[0]);
-  const amountCol = columns.find((c) => c.toLowerCase() === "amount");
-  const classCol = columns.find((c) => c.toLowerCase() === "class");
-  const featureCols = columns.filter((c) => /^v\d+$/i.test(c));
+function readJson(response) {
+  return response.json().then((body) => {
+    if (!response.ok) throw new Error(body.error || response.statusText);
+    return body;
+  });
+}
 
+function renderFeatureImportance(analytics) {
   // Feature Importance
-  let fraudRows = data.filter((row) => row[classCol] == 1);
-  let nonFraudRows = data.filter((row) => row[classCol] == 0);
-  let featureDiffs = featureCols.map((f) => {
-    let meanFraud =
-      fraudRows.reduce((a, r) => a + r[f], 0) / (fraudRows.length || 1);
-    let meanNonFraud =
-      nonFraudRows.reduce((a, r) => a + r[f], 0) / (nonFraudRows.length || 1);
-    return { feature: f, diff: Math.abs(meanFraud - meanNonFraud) };
-  });
-  featureDiffs.sort((a, b) => b.diff - a.diff);
-  let topFeatures = featureDiffs.slice(0, 10);
+  const stats = analytics.feature_stats;
   Plotly.newPlot(
     "feature-importance",
     [
       {
-        x: topFeatures.map((f) => f.feature),
-        y: topFeatures.map((f) => f.diff),
+        x: stats.top_features,
+        y: stats.top_differences,
         type: "bar",
         marker: { color: "#0074D9" },
       },
@@ -76,44 +71,14 @@ function renderFeatureImportance(data) {
   );
 
   // Correlation Heatmap
-  function computeCorrelationMatrix(data, features) {
-    function mean(arr) {
-      return arr.reduce((a, b) => a + b, 0) / arr.length;
-    }
-    function std(arr, m) {
-      return Math.sqrt(
-        arr.reduce((a, b) => a + Math.pow(b - m, 2), 0) / arr.length
-      );
-    }
-    function corr(x, y) {
-      const mx = mean(x),
-        my = mean(y);
-      const sx = std(x, mx),
-        sy = std(y, my);
-      const cov =
-        x.reduce((a, xi, i) => a + (xi - mx) * (y[i] - my), 0) / x.length;
-      return cov / (sx * sy);
-    }
-    let matrix = [];
-    for (let i = 0; i < features.length; i++) {
-      matrix[i] = [];
-      for (let j = 0; j < features.length; j++) {
-        const xi = data.map((row) => row[features[i]]);
-        const xj = data.map((row) => row[features[j]]);
-        matrix[i][j] = corr(xi, xj);
-      }
-    }
-    return matrix;
-  }
-  const heatmapFeatures = [...featureCols, amountCol, classCol];
-  const corrMatrix = computeCorrelationMatrix(data, heatmapFeatures);
+  const correlation = analytics.correlation;
   Plotly.newPlot(
     "correlation-heatmap",
     [
       {
-        z: corrMatrix,
-        x: heatmapFeatures,
-        y: heatmapFeatures,
+        z: correlation.matrix,
+        x: correlation.features,
+        y: correlation.features,
         type: "heatmap",
         colorscale: "RdBu",
         zmin: -1,
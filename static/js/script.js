@@ -17,65 +17,36 @@ document.getElementById("csvFile").addEventListener("change", function (e) {
   
   console.log(`Processing CSV file: ${file.name} (${fileSize} MB)`);
   
-  // Use web worker for large files (> 1MB) to avoid blocking UI
-  const useWorker = file.size > 1024 * 1024;
-  
-  setTimeout(() => {
-    Papa.parse(file, {
-      header: true,
-      dynamicTyping: true,
-      skipEmptyLines: true,
-      worker: useWorker, // Use web worker for large files
-      complete: function (results) {
-        try {
-          const data = results.data;
-          console.log(`CSV parsed successfully: ${data.length} rows`);
-          
-          // Try storing with progressively smaller datasets
-          let stored = false;
-          const maxRowsLevels = [5000, 3000, 1000, 500]; // Try different sizes
-          
-          for (let maxRows of maxRowsLevels) {
-            try {
-              const dataToStore = data.slice(0, maxRows);
-              localStorage.setItem("creditcard_csv_data", JSON.stringify(dataToStore));
-              console.log(`Successfully stored ${dataToStore.length} rows in localStorage`);
-              
-              if (data.length > maxRows) {
-                console.warn(`File has ${data.length} rows. Stored ${maxRows} rows due to storage limits.`);
-              }
-              
-              stored = true;
-              break; // Success! Exit loop
-            } catch (storageError) {
-              console.warn(`Failed to store ${maxRows} rows, trying smaller dataset...`);
-              continue; // Try next smaller size
-            }
-          }
-          
-          if (!stored) {
-            console.error('Failed to store data in localStorage. Storage quota exceeded.');
-            alert('Warning: Unable to save full dataset due to browser storage limits. Overview will still be displayed.');
-          }
-          
-          showSuccessMessage();
-          updateOverview(data); // Use full data for overview
-          overviewProcessing.classList.remove("active");
-        } catch (error) {
-          console.error('Error processing CSV:', error);
-          alert(`Error processing CSV file: ${error.message}\nPlease check the file format.`);
-          overviewProcessing.classList.remove("active");
-          overviewDesc.classList.remove("hide");
-        }
-      },
-      error: function(error) {
-        console.error('CSV parsing error:', error);
-        alert('Error parsing CSV file: ' + error.message);
-        overviewProcessing.classList.remove("active");
-        overviewDesc.classList.remove("hide");
-      }
+  // Aggregates are computed server-side; the browser only keeps the dataset id
+  const formData = new FormData();
+  formData.append("file", file);
+
+  fetch("/analytics", { method: "POST", body: formData })
+    .then((response) =>
+      response.json().then((body) => {
+        if (!response.ok) throw new Error(body.error || response.statusText);
+        return body;
+      })
+    )
+    .then((result) => {
+      console.log(
+        `Dataset ${result.dataset_id} analysed (${result.summary.total} rows${
+          result.cached ? ", cached" : ""
+        })`
+      );
+      localStorage.setItem("creditcard_dataset_id", result.dataset_id);
+      localStorage.removeItem("creditcard_csv_data");
+
+      showSuccessMessage();
+      updateOverview(result.summary);
+      overviewProcessing.classList.remove("active");
+    })
+    .catch((error) => {
+      console.error("Error processing CSV:", error);
+      alert(`Error processing CSV file: ${error.message}\nPlease check the file format.`);
+      overviewProcessing.classList.remove("active");
+      overviewDesc.classList.remove("hide");
     });
-  }, 200);
 });
 
 function toggleSidebar() {
@@ -112,16 +83,13 @@ function showSuccessMessage() {
 }
 
 // Overview metrics
-function updateOverview(data) {
-  const total = data.length;
-  const frauds = data.filter((row) => row["Class"] === 1).length;
-  const legit = total - frauds;
+function updateOverview(summary) {
   overviewMetrics.innerHTML = `
         <ul>
-          <li><strong>Total Transactions:</strong> ${total}</li>
-          <li><strong>Fraudulent Transactions:</strong> ${frauds}</li>
-          <li><strong>Legitimate Transactions:</strong> ${legit}</li>
-          <li><strong>Fraud Rate:</strong> ${((frauds / total) * 100).toFixed(
+          <li><strong>Total Transactions:</strong> ${summary.total}</li>
+          <li><strong>Fraudulent Transactions:</strong> ${summary.fraud}</li>
+          <li><strong>Legitimate Transactions:</strong> ${summary.legit}</li>
+          <li><strong>Fraud Rate:</strong> ${(summary.fraud_rate * 100).toFixed(
             4
           )}%</li>
         </ul>
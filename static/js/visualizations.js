@@ -49,40 +49,45 @@ function showSection(section, btn) {
 }
 
 document.addEventListener("DOMContentLoaded", function () {
-  const stored = localStorage.getItem("creditcard_csv_data");
-  if (stored) {
-    const data = JSON.parse(stored);
-    renderDashboard(data);
-    updateAnalysisSummary(data);
-    drawFraudPie(data);
-    drawFraudBoxPlot(data);
-  } else {
+  const datasetId = localStorage.getItem("creditcard_dataset_id");
+  const noData = () => {
     document.body.innerHTML +=
       '<p style="color:#ff4136;">No data found. Please upload a CSV file on the Dashboard page first.</p>';
+  };
+  if (!datasetId) {
+    noData();
+    return;
   }
+  fetch(`/analytics/${datasetId}`)
+    .then((response) => {
+      if (!response.ok) throw new Error(response.statusText);
+      return response.json();
+    })
+    .then((analytics) => {
+      renderDashboard(analytics);
+      updateAnalysisSummary(analytics.summary);
+      drawFraudPie(analytics.summary);
+      drawFraudBoxPlot(analytics.amount_box);
+    })
+    .catch(noData);
 });
 
-// Analysis summary in Visualizations section with bar plot
-function updateAnalysisSummary(data) {
-  const total = data.length;
-  const frauds = data.filter((row) => row["Class"] === 1);
-  const legit = data.filter((row) => row["Class"] === 0);
-  const fraudCount = frauds.length;
-  const legitCount = legit.length;
-  const fraudRate = ((fraudCount / total) * 100).toFixed(4);
-
-  const avgFraud = frauds.length
-    ? (
-        frauds.map((r) => +r["Amount"]).reduce((a, b) => a + b, 0) /
-        frauds.length
-      ).toFixed(2)
-    : 0;
-  const avgLegit = legit.length
-    ? (
-        legit.map((r) => +r["Amount"]).reduce((a, b) => a + b, 0) / legit.length
-      ).toFixed(2)
-    : 0;
+// Pre-binned histogram -> bar trace (bin centers, bin width)
+function histogramTrace(histogram, key, name, color) {
+  const edges = histogram.edges;
+  return {
+    x: edges.slice(0, -1).map((edge, i) => (edge + edges[i + 1]) / 2),
+    y: histogram[key],
+    width: edges.slice(0, -1).map((edge, i) => edges[i + 1] - edge),
+    type: "bar",
+    name: name,
+    marker: { color: color },
+    opacity: 0.7,
+  };
+}
 
+// Analysis summary in Visualizations section with bar plot
+function updateAnalysisSummary(summary) {
   // Prepare data for the bar plot
   const barLabels = [
     "Total Transactions",
@@ -92,11 +97,11 @@ function updateAnalysisSummary(data) {
     "Avg Legit Amount",
   ];
   const barValues = [
-    total,
-    fraudCount,
-    legitCount,
-    parseFloat(avgFraud),
-    parseFloat(avgLegit),
+    summary.total,
+    summary.fraud,
+    summary.legit,
+    parseFloat(summary.avg_amount_fraud.toFixed(2)),
+    parseFloat(summary.avg_amount_legit.toFixed(2)),
   ];
   const barColors = ["#8884d8", "#ff4136", "#2ecc40", "#ffb347", "#61dafb"];
 
@@ -122,14 +127,12 @@ function updateAnalysisSummary(data) {
 }
 
 // Fraudulent vs. Non-Fraudulent Transactions (Pie Chart)
-function drawFraudPie(data) {
-  const frauds = data.filter((row) => row["Class"] === 1).length;
-  const legit = data.length - frauds;
+function drawFraudPie(summary) {
   Plotly.newPlot(
     "fraud-pie",
     [
       {
-        values: [frauds, legit],
+        values: [summary.fraud, summary.legit],
         labels: ["Fraudulent", "Legitimate"],
         type: "pie",
         marker: { colors: ["#ff4c4c", "#61dafb"] },
@@ -147,36 +150,27 @@ function drawFraudPie(data) {
 }
 
 // Draw Box Plot for Fraudulent vs Non-Fraudulent Transaction Amounts
-function drawFraudBoxPlot(data) {
-  const amountCol = Object.keys(data[0]).find(
-    (c) => c.toLowerCase() === "amount"
-  );
-  const classCol = Object.keys(data[0]).find(
-    (c) => c.toLowerCase() === "class"
-  );
-  const amountsFraud = data
-    .filter((row) => row[classCol] == 1)
-    .map((row) => row[amountCol]);
-  const amountsLegit = data
-    .filter((row) => row[classCol] == 0)
-    .map((row) => row[amountCol]);
+function drawFraudBoxPlot(amountBox) {
+  // Box statistics are precomputed server-side (quartiles and 1.5 IQR fences)
+  const boxTrace = (stats, name, color) => ({
+    type: "box",
+    name: name,
+    x: [name],
+    q1: [stats.q1],
+    median: [stats.median],
+    q3: [stats.q3],
+    lowerfence: [stats.lowerfence],
+    upperfence: [stats.upperfence],
+    mean: [stats.mean],
+    marker: { color: color },
+  });
+  const traces = [];
+  if (amountBox.legit) traces.push(boxTrace(amountBox.legit, "Legitimate", "#61dafb"));
+  if (amountBox.fraud) traces.push(boxTrace(amountBox.fraud, "Fraudulent", "#ff4c4c"));
 
   Plotly.newPlot(
     "fraud-boxplot",
-    [
-      {
-        y: amountsLegit,
-        type: "box",
-        name: "Legitimate",
-        marker: { color: "#61dafb" },
-      },
-      {
-        y: amountsFraud,
-        type: "box",
-        name: "Fraudulent",
-        marker: { color: "#ff4c4c" },
-      },
-    ],
+    traces,
     {
       title: "Transaction Amounts: Fraudulent vs. Non-Fraudulent (Box Plot)",
       yaxis: { title: "Transaction Amount" },
@@ -189,26 +183,16 @@ function drawFraudBoxPlot(data) {
 }
 
 // Render the dashboard with various visualizations
-function renderDashboard(data) {
-  const columns = Object.keys(data[0]);
-  const amountCol = columns.find((c) => c.toLowerCase() === "amount");
-  const classCol = columns.find((c) => c.toLowerCase() === "class");
-  const idCol = columns.find((c) => c.toLowerCase() === "id");
-  const featureCols = columns.filter((c) => /^v\d+$/i.test(c));
+function renderDashboard(analytics) {
+  const summary = analytics.summary;
 
   // 1. Class Distribution
-  const classCounts = data.reduce((acc, row) => {
-    acc[row[classCol]] = (acc[row[classCol]] || 0) + 1;
-    return acc;
-  }, {});
   Plotly.newPlot(
     "class-distribution",
     [
       {
-        x: Object.keys(classCounts).map((cl) =>
-          cl == 1 ? "Fraudulent" : "Non-Fraudulent"
-        ),
-        y: Object.values(classCounts),
+        x: ["Non-Fraudulent", "Fraudulent"],
+        y: [summary.legit, summary.fraud],
         type: "bar",
         marker: { color: ["#2ecc40", "#ff4136"] },
       },
@@ -224,25 +208,11 @@ function renderDashboard(data) {
   );
 
   // 2. Transaction Amount Distribution
-  const amounts = data.map((row) => row[amountCol]);
-  const classes = data.map((row) => row[classCol]);
   Plotly.newPlot(
     "amount-distribution",
     [
-      {
-        x: amounts.filter((_, i) => classes[i] == 0),
-        type: "histogram",
-        name: "Non-Fraudulent",
-        marker: { color: "#2ecc40" },
-        opacity: 0.7,
-      },
-      {
-        x: amounts.filter((_, i) => classes[i] == 1),
-        type: "histogram",
-        name: "Fraudulent",
-        marker: { color: "#ff4136" },
-        opacity: 0.7,
-      },
+      histogramTrace(analytics.amount_histogram, "legit", "Non-Fraudulent", "#2ecc40"),
+      histogramTrace(analytics.amount_histogram, "fraud", "Fraudulent", "#ff4136"),
     ],
     {
       barmode: "overlay",
@@ -256,30 +226,21 @@ function renderDashboard(data) {
   );
 
   // 3. Time-Based Trends
-  let idBuckets = {};
-  data.forEach((row) => {
-    let bucket = Math.floor(row[idCol] / 3600);
-    if (!idBuckets[bucket]) idBuckets[bucket] = { fraud: 0, nonfraud: 0 };
-    if (row[classCol] == 1) idBuckets[bucket].fraud++;
-    else idBuckets[bucket].nonfraud++;
-  });
-  const buckets = Object.keys(idBuckets)
-    .map(Number)
-    .sort((a, b) => a - b);
+  const buckets = analytics.time_buckets;
   Plotly.newPlot(
     "time-trends",
     [
       {
-        x: buckets,
-        y: buckets.map((b) => idBuckets[b].nonfraud),
+        x: buckets.bucket,
+        y: buckets.legit,
         type: "scatter",
         mode: "lines",
         name: "Non-Fraudulent",
         line: { color: "#2ecc40" },
       },
       {
-        x: buckets,
-        y: buckets.map((b) => idBuckets[b].fraud),
+        x: buckets.bucket,
+        y: buckets.fraud,
         type: "scatter",
         mode: "lines",
         name: "Fraudulent",
@@ -297,44 +258,14 @@ function renderDashboard(data) {
   );
 
   // 4. Correlation Heatmap
-  function computeCorrelationMatrix(data, features) {
-    function mean(arr) {
-      return arr.reduce((a, b) => a + b, 0) / arr.length;
-    }
-    function std(arr, m) {
-      return Math.sqrt(
-        arr.reduce((a, b) => a + Math.pow(b - m, 2), 0) / arr.length
-      );
-    }
-    function corr(x, y) {
-      const mx = mean(x),
-        my = mean(y);
-      const sx = std(x, mx),
-        sy = std(y, my);
-      const cov =
-        x.reduce((a, xi, i) => a + (xi - mx) * (y[i] - my), 0) / x.length;
-      return cov / (sx * sy);
-    }
-    let matrix = [];
-    for (let i = 0; i < features.length; i++) {
-      matrix[i] = [];
-      for (let j = 0; j < features.length; j++) {
-        const xi = data.map((row) => row[features[i]]);
-        const xj = data.map((row) => row[features[j]]);
-        matrix[i][j] = corr(xi, xj);
-      }
-    }
-    return matrix;
-  }
-  const heatmapFeatures = [...featureCols, amountCol, classCol];
-  const corrMatrix = computeCorrelationMatrix(data, heatmapFeatures);
+  const correlation = analytics.correlation;
   Plotly.newPlot(
     "correlation-heatmap",
     [
       {
-        z: corrMatrix,
-        x: heatmapFeatures,
-        y: heatmapFeatures,
+        z: correlation.matrix,
+        x: correlation.features,
+        y: correlation.features,
         type: "heatmap",
         colorscale: "RdBu",
         zmin: -1,
@@ -352,23 +283,13 @@ function renderDashboard(data) {
   );
 
   // 5. Top Contributing Features
-  let fraudRows = data.filter((row) => row[classCol] == 1);
-  let nonFraudRows = data.filter((row) => row[classCol] == 0);
-  let featureDiffs = featureCols.map((f) => {
-    let meanFraud =
-      fraudRows.reduce((a, r) => a + r[f], 0) / (fraudRows.length || 1);
-    let meanNonFraud =
-      nonFraudRows.reduce((a, r) => a + r[f], 0) / (nonFraudRows.length || 1);
-    return { feature: f, diff: Math.abs(meanFraud - meanNonFraud) };
-  });
-  featureDiffs.sort((a, b) => b.diff - a.diff);
-  let topFeatures = featureDiffs.slice(0, 10);
+  const stats = analytics.feature_stats;
   Plotly.newPlot(
     "feature-importance",
     [
       {
-        x: topFeatures.map((f) => f.feature),
-        y: topFeatures.map((f) => f.diff),
+        x: stats.top_features,
+        y: stats.top_differences,
         type: "bar",
         marker: { color: "#0074D9" },
       },
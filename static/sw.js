@@ -1,6 +1,6 @@
-const CACHE_NAME = 'fraud-detection-v1.0.0';
-const STATIC_CACHE = 'static-v1.0.0';
-const DYNAMIC_CACHE = 'dynamic-v1.0.0';
+const CACHE_NAME = 'fraud-detection-v1.1.0';
+const STATIC_CACHE = 'static-v1.1.0';
+const DYNAMIC_CACHE = 'dynamic-v1.1.0';
 
 // Assets to cache
 const STATIC_ASSETS = [
@@ -18,7 +18,6 @@ const STATIC_ASSETS = [
   '/static/images/1.svg',
   '/static/images/1.ico',
   'https://cdn.plot.ly/plotly-2.32.0.min.js',
-  'https://cdn.jsdelivr.net/npm/papaparse@5.4.1/papaparse.min.js',
   'https://cdnjs.cloudflare.com/ajax/libs/font-awesome/6.4.0/css/all.min.css'
 ];
 
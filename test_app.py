@@ -0,0 +1,206 @@
+"""
+Test untuk Endpoint Flask
+=========================
+Jalankan dengan: python -m pytest test_app.py
+"""
+
+import sys
+import os
+import io
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+import pytest
+
+# Tambahkan path parent directory
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import app as app_module
+from cascade import CascadeStage
+from transaction_features import FEATURE_NAMES
+
+
+@pytest.fixture(scope='module')
+def client():
+    return app_module.app.test_client()
+
+
+@pytest.fixture(scope='module')
+def rows():
+    return pd.read_csv(os.path.join('dataset', 'test-1.csv'), nrows=20)[list(FEATURE_NAMES)].to_numpy().tolist()
+
+
+@pytest.mark.parametrize('threshold', [[0.7], {'t': 1}, 'x', None, 1.5, -0.1])
+def test_sequential_rejects_invalid_threshold(client, rows, threshold):
+    response = client.post('/predict_sequential', json={'features': rows[0], 'threshold': threshold})
+    assert response.status_code == 400
+    assert 'threshold' in response.get_json()['error']
+
+
+def test_sequential_accepts_numeric_string_threshold(client, rows):
+    response = client.post('/predict_sequential', json={'features': rows[0], 'model1': 'logreg',
+                                                        'model2': 'dt', 'threshold': '0.7'})
+    assert response.status_code == 200
+    assert response.get_json()['threshold'] == 0.7
+
+
+def test_cascade_registry_is_bounded_under_threads():
+    def get(i):
+        return app_module.get_cascade([CascadeStage('logreg', i / 1000, 1 - i / 1000), CascadeStage('dt', 0.5, 0.5)])
+
+    with ThreadPoolExecutor(8) as pool:
+        cascades = list(pool.map(get, range(200)))
+    assert len(app_module._cascades) <= app_module.MAX_CASCADES
+    assert app_module.get_cascade(cascades[-1].stages) is cascades[-1]
+
+
+@pytest.mark.parametrize('body', [
+    [1, 2],
+    'features',
+    {'features': [[0.0] * 30], 'models': [{'a': 1}]},
+    {'features': [[0.0] * 30], 'models': [['x']]},
+    {'features': [[0.0] * 30], 'models': 'logreg'},
+    {'features': [[0.0] * 30], 'model': 5},
+])
+def test_batch_rejects_malformed_body(client, body):
+    response = client.post('/predict_batch', json=body)
+    assert response.status_code == 400
+    assert 'error' in response.get_json()
+
+
+@pytest.mark.parametrize('body', [
+    [1, 2],
+    {'features': [[0.0] * 30], 'models': [{'a': 1}]},
+    {'features': [[0.0] * 30], 'models': [['x']]},
+    {'features': [[0.0] * 30], 'models': ['rf', 'nope']},
+    {'features': [[0.0] * 30], 'strategy': ['stacking']},
+])
+def test_ensemble_n_rejects_malformed_body(client, body):
+    response = client.post('/predict_ensemble_n', json=body)
+    assert response.status_code == 400
+    assert 'error' in response.get_json()
+
+
+SINGLE_ROW_ROUTES = ['/predict', '/predict_weighted', '/predict_sequential', '/predict_ensemble',
+                     '/predict_with_kb', '/predict_cascade']
+
+
+@pytest.mark.parametrize('route', SINGLE_ROW_ROUTES)
+@pytest.mark.parametrize('body', [
+    {'features': [0.0] * 29},
+    {'features': [[0.0] * 31]},
+    {'features': {'V1': 1.0}},
+    {'features': []},
+    {'model': 'xgb'},
+    [0.0] * 30,
+])
+def test_single_row_routes_reject_bad_features(client, route, body):
+    response = client.post(route, json=body)
+    assert response.status_code == 400
+    assert response.is_json and 'error' in response.get_json()
+
+
+@pytest.mark.parametrize('route', SINGLE_ROW_ROUTES)
+def test_single_row_routes_ignore_unhashable_model(client, rows, route):
+    # Unusable names fall back to the route's default model (rf is not shipped)
+    response = client.post(route, json={'features': rows[0], 'model': ['x'], 'model1': 'logreg', 'model2': {'a': 1}})
+    assert response.status_code == 200
+
+
+@pytest.mark.parametrize('card_id', [True, False, 1.5, '', 'x' * 129, ['card']])
+def test_kb_rejects_invalid_card_id(client, rows, card_id):
+    response = client.post('/predict_with_kb', json={'features': rows[0], 'model': 'logreg', 'card_id': card_id})
+    assert response.status_code == 400
+    assert 'card_id' in response.get_json()['error']
+    if isinstance(card_id, bool):
+        # No "True"/"False" velocity windows
+        assert app_module.velocity_store.peek(str(card_id))['velocity_count'] == 0
+
+
+def test_kb_replayed_request_is_not_a_new_transaction(client, rows):
+    body = {'features': rows[0], 'model': 'logreg', 'card_id': 'card-replay'}
+    first = client.post('/predict_with_kb', json=body).get_json()
+    for _ in range(3):
+        replay = client.post('/predict_with_kb', json=body).get_json()
+        assert replay['velocity'] == first['velocity']
+        assert replay['hybrid_decision'] == first['hybrid_decision']
+    assert app_module.velocity_store.peek('card-replay')['velocity_count'] == 1
+
+    # A different transaction, or the same payload under a new idempotency key, counts
+    assert client.post('/predict_with_kb', json=dict(body, features=rows[1])).get_json()['velocity']['velocity_count'] == 1
+    keyed = client.post('/predict_with_kb', json=body, headers={'Idempotency-Key': 'k-1'}).get_json()
+    assert keyed['velocity']['velocity_count'] == 2
+    again = client.post('/predict_with_kb', json=body, headers={'Idempotency-Key': 'k-1'}).get_json()
+    assert again['velocity'] == keyed['velocity']
+    assert client.post('/predict_with_kb', json=body, headers={'Idempotency-Key': 'k' * 129}).status_code == 400
+
+
+
+def test_kb_cache_hits_still_count_fired_rules(client, rows, monkeypatch):
+    monkeypatch.setattr(app_module.metrics, 'enabled', True)
+    monkeypatch.setattr(app_module.metrics, '_counters', {})
+    app_module.kb_cache.clear()
+    body = {'features': rows[2], 'model': 'logreg'}
+    results = [client.post('/predict_with_kb', json=body).get_json()['kb_result'] for _ in range(3)]
+
+    counters = app_module.metrics._counters
+    assert counters[('fraud_kb_evaluations_total', (('mode', 'single'),))] == 1
+    assert counters[('fraud_kb_evaluations_total', (('mode', 'cached'),))] == 2
+    assert results[0]['matched_rules']
+    for rule_id in results[0]['matched_rules']:
+        assert counters[('fraud_rule_fired_total', (('rule', rule_id),))] == 3
+
+def _npy(array, allow_pickle=False):
+    buffer = io.BytesIO()
+    np.save(buffer, array, allow_pickle=allow_pickle)
+    return buffer.getvalue()
+
+
+def test_batch_json_matches_single_row_predictions(client, rows):
+    response = client.post('/predict_batch', json={'features': rows, 'models': ['logreg', 'dt']})
+    assert response.status_code == 200
+    body = response.get_json()
+    assert body['n_rows'] == len(rows)
+    assert set(body['results']) == {'logreg', 'dt'}
+    for model_name, result in body['results'].items():
+        assert len(result['predictions']) == len(result['probabilities']) == len(rows)
+        for i in (0, len(rows) - 1):
+            single = client.post('/predict', json={'features': rows[i], 'model': model_name}).get_json()
+            assert result['predictions'][i] == single['prediction']
+            assert result['probabilities'][i] == pytest.approx(single['probability'])
+
+
+def test_batch_npy_body_matches_json(client, rows):
+    matrix = np.asarray(rows, dtype=np.float64)
+    response = client.post('/predict_batch?model=logreg&models=dt', data=_npy(matrix),
+                           content_type='application/x-npy')
+    assert response.status_code == 200
+    expected = client.post('/predict_batch', json={'features': rows, 'models': ['logreg', 'dt']}).get_json()
+    assert response.get_json() == expected
+
+
+@pytest.mark.parametrize('request_kwargs', [
+    {'json': {'features': [[0.0] * 30], 'models': ['nope']}},
+    {'json': {'features': []}},
+    {'json': {'models': ['logreg']}},
+    {'data': _npy(np.zeros((0, 30))), 'content_type': 'application/x-npy'},
+    {'data': _npy(np.zeros((3, 29))), 'content_type': 'application/x-npy'},
+    {'data': _npy(np.array([{'a': 1}], dtype=object), allow_pickle=True), 'content_type': 'application/x-npy'},
+    {'data': b'not an npy file', 'content_type': 'application/x-npy'},
+])
+def test_batch_rejects_invalid_requests(client, request_kwargs):
+    response = client.post('/predict_batch', **request_kwargs)
+    assert response.status_code == 400
+    assert 'error' in response.get_json()
+
+
+def test_analytics_upload_cap(client, monkeypatch):
+    monkeypatch.setattr(app_module.analytics_cache, 'max_upload_bytes', 100)
+    # Rejected from Content-Length before the body is parsed
+    response = client.post('/analytics', data={'file': (io.BytesIO(b'x' * 200), 'big.csv')})
+    assert response.status_code == 413
+
+    response = client.post('/analytics', data=b'x' * 200, content_type='text/csv')
+    assert response.status_code == 413
+    assert 'error' in response.get_json()
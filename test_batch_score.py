@@ -0,0 +1,44 @@
+"""
+Test untuk Batch Scoring Offline
+================================
+Jalankan dengan: python -m pytest test_batch_score.py
+"""
+
+import sys
+import os
+
+import pandas as pd
+import pytest
+
+# Tambahkan path parent directory
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from batch_score import ChunkScorer, score_file
+
+
+DATASET = 'dataset/test-2.csv'
+MODELS = ['logreg', 'dt']
+
+
+@pytest.fixture(scope='module')
+def sample(tmp_path_factory):
+    path = tmp_path_factory.mktemp('batch') / 'sample.csv'
+    pd.read_csv(DATASET, nrows=1000).to_csv(path, index=False)
+    return path
+
+
+def test_chunked_output_matches_single_pass(sample, tmp_path):
+    output = tmp_path / 'scored.csv'
+    summary = score_file(str(sample), str(output), MODELS, chunksize=128)
+    chunked = pd.read_csv(output)
+
+    expected = ChunkScorer(MODELS).score(pd.read_csv(sample)).reset_index(drop=True)
+    assert summary['rows'] == len(chunked) == 1000
+    assert list(chunked.columns) == list(expected.columns)
+    pd.testing.assert_frame_equal(chunked, expected, check_dtype=False)
+
+
+def test_missing_feature_columns_rejected():
+    frame = pd.read_csv(DATASET, nrows=5).drop(columns=['V3'])
+    with pytest.raises(ValueError, match='V3'):
+        ChunkScorer(MODELS, use_kb=False).score(frame)
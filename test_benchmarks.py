@@ -0,0 +1,68 @@
+"""
+Test untuk Benchmark Latensi Endpoint
+=====================================
+Jalankan dengan: python -m pytest test_benchmarks.py
+"""
+
+import sys
+import os
+import json
+
+import numpy as np
+import pytest
+
+# Tambahkan path parent directory (dan benchmarks/, yang modulnya saling mengimpor)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'benchmarks'))
+
+import bench_endpoints
+from transaction_features import N_FEATURES
+
+
+def test_sample_rows_is_reproducible():
+    rows = bench_endpoints.sample_rows(os.path.join('dataset', 'test-*.csv'), 20, seed=42)
+    assert len(rows) == 20 and all(len(row) == N_FEATURES for row in rows)
+    assert bench_endpoints.sample_rows(os.path.join('dataset', 'test-*.csv'), 20, seed=42) == rows
+    with pytest.raises(FileNotFoundError):
+        bench_endpoints.sample_rows('dataset/missing-*.csv', 5, seed=0)
+
+
+def test_summarize_percentiles():
+    stats = bench_endpoints.summarize([0.001 * i for i in range(1, 101)])
+    assert stats['requests'] == 100
+    assert stats['p50_ms'] == pytest.approx(50.5)
+    assert stats['p99_ms'] == pytest.approx(np.percentile(np.arange(1, 101), 99))
+    assert stats['throughput_rps'] == pytest.approx(100 / 5.05)
+
+
+def test_every_scenario_runs_through_the_test_client(capsys):
+    import app as app_module
+    client = app_module.app.test_client()
+    rows = bench_endpoints.sample_rows(os.path.join('dataset', 'test-1.csv'), 5, seed=0)
+    cases = bench_endpoints.scenarios(['logreg', 'dt'], ['logreg', 'dt'])
+    assert {endpoint for _, endpoint, _, _ in cases} == (
+        set(bench_endpoints.SINGLE_ENDPOINTS) | set(bench_endpoints.PAIR_ENDPOINTS)
+    )
+
+    def send(endpoint, body):
+        return client.post(endpoint, json=body).status_code
+
+    results, endpoints = bench_endpoints.run_scenarios(send, rows, cases, n_requests=3, warmup=1)
+    # A skipped scenario (non-200 first request) would be missing here
+    assert set(results) == {name for name, _, _, _ in cases}
+    assert all(stats['requests'] == 3 for stats in results.values())
+    assert endpoints['/predict']['requests'] == 6
+
+
+def test_compare_flags_regressions(tmp_path, capsys):
+    def report(p50, p95):
+        scenario = {'p50_ms': p50, 'p95_ms': p95}
+        return {'meta': {'commit': 'abc'}, 'targets': {'client': {'scenarios': {'/predict[dt]': scenario}}}}
+
+    baseline = tmp_path / 'baseline.json'
+    baseline.write_text(json.dumps(report(1.0, 2.0)))
+    assert bench_endpoints.compare(report(1.1, 2.3), str(baseline), tolerance=0.2) == []
+    assert bench_endpoints.compare(report(1.5, 2.0), str(baseline), tolerance=0.2) == ['client /predict[dt] p50_ms']
+    # Scenarios missing from the baseline are not compared
+    assert bench_endpoints.compare({'targets': {'gunicorn': report(9, 9)['targets']['client']}},
+                                   str(baseline), tolerance=0.2) == []
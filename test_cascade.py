@@ -0,0 +1,38 @@
+"""
+Test untuk Konfigurasi Kaskade
+==============================
+Jalankan dengan: python -m pytest test_cascade.py
+"""
+
+import sys
+import os
+
+import pytest
+
+# Tambahkan path parent directory
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from cascade import CascadeStage, parse_stages
+from model_registry import MODEL_FILES
+
+
+def test_parse_stages():
+    stages = parse_stages([{'model': 'logreg', 'low': 0.1, 'high': 0.9}, {'model': 'xgb'}], known=MODEL_FILES)
+    assert stages == [CascadeStage('logreg', 0.1, 0.9), CascadeStage('xgb', 0.5, 0.5)]
+
+
+@pytest.mark.parametrize('config', [
+    [],
+    {'model': 'logreg'},
+    ['logreg'],
+    [{'model': ['logreg']}],
+    [{'model': {'name': 'logreg'}}],
+    [{'model': 5}],
+    [{'low': 0.1}],
+    [{'model': 'unknown'}],
+    [{'model': 'logreg', 'low': 'x'}],
+    [{'model': 'logreg', 'low': 0.9, 'high': 0.1}],
+])
+def test_invalid_stages_raise_value_error(config):
+    with pytest.raises(ValueError):
+        parse_stages(config, known=MODEL_FILES)
@@ -0,0 +1,84 @@
+"""
+Test untuk Analitik Dataset
+===========================
+Jalankan dengan: python -m pytest test_dataset_analytics.py
+"""
+
+import sys
+import os
+import io
+
+import numpy as np
+import pandas as pd
+import pytest
+
+# Tambahkan path parent directory
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from dataset_analytics import AnalyticsCache, UploadTooLarge, compute_analytics, read_dataset
+
+
+DATASET = 'dataset/test-2.csv'
+STAT_COLUMNS = ['id'] + [f'V{i}' for i in range(1, 29)] + ['Amount']
+
+
+@pytest.fixture(scope='module')
+def frame():
+    return pd.read_csv(DATASET)
+
+
+@pytest.fixture(scope='module')
+def analytics():
+    return compute_analytics(read_dataset(DATASET))
+
+
+def test_summary_and_histograms_match_pandas(frame, analytics):
+    fraud = frame[frame['Class'] == 1]
+    summary = analytics['summary']
+    assert summary['total'] == len(frame)
+    assert summary['fraud'] == len(fraud)
+    assert summary['avg_amount_fraud'] == pytest.approx(fraud['Amount'].mean())
+
+    histogram = analytics['amount_histogram']
+    assert sum(histogram['legit']) + sum(histogram['fraud']) == len(frame)
+    assert sum(histogram['fraud']) == len(fraud)
+    assert sum(analytics['hourly']['transactions']) == len(frame)
+    assert sum(analytics['time_buckets']['fraud']) == len(fraud)
+
+
+def test_feature_stats_match_pandas(frame, analytics):
+    stats = analytics['feature_stats']
+    assert stats['features'] == STAT_COLUMNS
+    np.testing.assert_allclose(stats['std'], frame[STAT_COLUMNS].std(ddof=0), atol=1e-5)
+    np.testing.assert_allclose(
+        stats['legit_mean'], frame[frame['Class'] == 0][STAT_COLUMNS].mean(), atol=1e-5
+    )
+    np.testing.assert_allclose(
+        stats['corr_with_class'], frame[STAT_COLUMNS].corrwith(frame['Class']), atol=1e-5
+    )
+    columns = analytics['correlation']['features']
+    np.testing.assert_allclose(analytics['correlation']['matrix'], frame[columns].corr(), atol=1e-4)
+
+
+def test_cache_reuses_result_by_content_hash(tmp_path):
+    cache = AnalyticsCache(str(tmp_path))
+    content = open(DATASET, 'rb').read()
+    first = cache.ingest(io.BytesIO(content))
+    second = AnalyticsCache(str(tmp_path)).ingest(io.BytesIO(content))
+    assert not first['cached'] and second['cached']
+    assert first['dataset_id'] == second['dataset_id']
+    assert cache.get(first['dataset_id'])['summary'] == first['analytics']['summary']
+    assert cache.get('../' + first['dataset_id']) is None
+
+
+def test_missing_columns_rejected(tmp_path):
+    with pytest.raises(ValueError, match='Class'):
+        AnalyticsCache(str(tmp_path)).ingest(io.BytesIO(b'id,Amount\n1,2\n'))
+
+
+def test_upload_cap(tmp_path):
+    cache = AnalyticsCache(str(tmp_path), max_upload_bytes=100)
+    with pytest.raises(UploadTooLarge):
+        cache.ingest(io.BytesIO(b'x' * 101))
+    # The partial temporary file is removed
+    assert os.listdir(str(tmp_path)) == []
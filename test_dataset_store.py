@@ -0,0 +1,95 @@
+"""
+Test untuk Cache Dataset Kolumnar
+=================================
+Jalankan dengan: python -m pytest test_dataset_store.py
+"""
+
+import sys
+import os
+import shutil
+
+import numpy as np
+import pandas as pd
+
+# Tambahkan path parent directory
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import dataset_store
+from dataset_store import convert, load_dataset, source_hash
+from transaction_features import FEATURE_NAMES
+
+
+DATASET = 'dataset/test-1.csv'
+
+
+def test_cached_columns_match_csv(tmp_path):
+    dataset = load_dataset(DATASET, str(tmp_path))
+    frame = pd.read_csv(DATASET)
+
+    assert dataset.features.dtype == np.float32
+    assert dataset.labels.dtype == np.int8
+    assert isinstance(dataset.features, np.memmap)
+    np.testing.assert_array_equal(dataset.labels, frame['Class'])
+    np.testing.assert_allclose(dataset.matrix(), frame[list(FEATURE_NAMES)], rtol=1e-6)
+    np.testing.assert_allclose(dataset.matrix(slice(10, 20)), dataset.matrix()[10:20])
+
+
+def test_cache_reused_until_source_changes(tmp_path):
+    source = tmp_path / 'sample.csv'
+    shutil.copy(DATASET, source)
+    cache = str(tmp_path / 'cache')
+
+    first = load_dataset(str(source), cache)
+    features_path = os.path.join(cache, os.listdir(cache)[0], 'features.npy')
+    built_at = os.stat(features_path).st_mtime_ns
+
+    # Same content, new mtime: the hash still matches, so nothing is rebuilt
+    os.utime(source, ns=(built_at + 10**9, built_at + 10**9))
+    assert load_dataset(str(source), cache).schema['source']['sha256'] == first.schema['source']['sha256']
+    assert os.stat(features_path).st_mtime_ns == built_at
+
+    pd.read_csv(DATASET, nrows=100).to_csv(source, index=False)
+    changed = load_dataset(str(source), cache)
+    assert len(changed) == 100
+    assert changed.schema['source']['sha256'] == source_hash(str(source), cache)
+    assert changed.schema['source']['sha256'] != first.schema['source']['sha256']
+
+
+def test_blank_lines_and_quoted_newlines(tmp_path):
+    frame = pd.read_csv(DATASET, nrows=20)
+    frame['note'] = 'plain'
+    frame.loc[3, 'note'] = 'two\nlines'
+    source = tmp_path / 'messy.csv'
+    text = frame.to_csv(index=False)
+    lines = text.split('\n')
+    # A blank line in the middle and blank lines at the end
+    source.write_text('\n'.join(lines[:8] + [''] + lines[8:]) + '\n\n')
+
+    dataset = load_dataset(str(source), str(tmp_path / 'cache'))
+    assert len(dataset) == len(frame) == dataset.schema['rows']
+    np.testing.assert_array_equal(dataset.labels, frame['Class'])
+    np.testing.assert_allclose(dataset.matrix(), frame[list(FEATURE_NAMES)], rtol=1e-6)
+
+
+def test_concurrent_convert_reuses_published_cache(tmp_path, monkeypatch):
+    source = tmp_path / 'sample.csv'
+    pd.read_csv(DATASET, nrows=500).to_csv(source, index=False)
+    cache = str(tmp_path / 'cache')
+    finish_ids = dataset_store._finish_ids
+    published, published_inode = [], []
+
+    def racing_finish_ids(*args, **kwargs):
+        # Another process finishes and publishes while this one is still converting
+        if not published:
+            published.append(None)
+            published[0] = convert(str(source), cache)
+            published_inode.append(os.stat(os.path.join(published[0], 'features.npy')).st_ino)
+        return finish_ids(*args, **kwargs)
+
+    monkeypatch.setattr(dataset_store, '_finish_ids', racing_finish_ids)
+    directory = convert(str(source), cache)
+    assert directory == published[0]
+    # The published files were kept, not deleted and replaced by this conversion
+    assert os.stat(os.path.join(directory, 'features.npy')).st_ino == published_inode[0]
+    assert [entry for entry in os.listdir(cache) if entry.startswith('.tmp-')] == []
+    assert len(load_dataset(str(source), cache)) == 500
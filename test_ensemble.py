@@ -0,0 +1,59 @@
+"""
+Test untuk Ensemble N-Model
+===========================
+Jalankan dengan: python -m pytest test_ensemble.py
+"""
+
+import sys
+import os
+import shutil
+import warnings
+
+import numpy as np
+import pytest
+
+# Tambahkan path parent directory
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from ensemble import EnsembleScorer
+from inference import InferenceCore
+from model_metrics import ModelMetrics
+from model_registry import MODEL_DIR, MODEL_FILES, ModelRegistry
+
+warnings.filterwarnings('ignore', category=UserWarning)
+
+MODELS = ['logreg', 'dt']
+
+
+@pytest.fixture
+def scorer(tmp_path):
+    for name in MODELS:
+        source = os.path.join(MODEL_DIR, MODEL_FILES[name])
+        if not os.path.exists(source):
+            pytest.skip(f'{name} model not available')
+        shutil.copy(source, tmp_path / MODEL_FILES[name])
+    registry = ModelRegistry(str(tmp_path), compiled=(), knn_index=False, fast=())
+    metrics = ModelMetrics(registry, path=str(tmp_path / 'model_metrics.json'))
+    return EnsembleScorer(InferenceCore(registry, max_workers=1), metrics)
+
+
+def test_cache_follows_model_file_version(scorer):
+    weights = scorer.weights(MODELS, 'accuracy_weighted')
+    assert scorer.weights(MODELS, 'accuracy_weighted') is weights
+
+    # Replaced model file: the registry reloads it under a new fingerprint
+    path = scorer.core.registry.path('dt')
+    os.utime(path, ns=(10**9, 10**9))
+    scorer.core.registry.evict('dt')
+    assert scorer.weights(MODELS, 'accuracy_weighted') is not weights
+
+
+def test_stacker_reports_out_of_fold_metrics(scorer):
+    X, _ = scorer.metrics.eval_data()
+    result = scorer.score(MODELS, 'stacking', X[:10])
+    cv = result['stacker_cv']
+    assert cv['folds'] == 5
+    assert 0.0 <= cv['accuracy'] <= 1.0 and 0.0 <= cv['auc'] <= 1.0
+    assert scorer.stacker(MODELS) is scorer.stacker(MODELS)
+    np.testing.assert_allclose(result['probabilities'],
+                               scorer.combine(MODELS, 'stacking', scorer.probability_matrix(MODELS, X[:10])))
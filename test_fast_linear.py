@@ -0,0 +1,89 @@
+"""
+Test untuk Jalur Cepat Model Linear dan SVM
+===========================================
+Jalankan dengan: python -m pytest test_fast_linear.py
+"""
+
+import sys
+import os
+import warnings
+
+import numpy as np
+import pytest
+
+# Tambahkan path parent directory
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from sklearn.linear_model import LogisticRegression
+from sklearn.svm import SVC
+
+from dataset_store import load_dataset
+from fast_linear import FastLogisticRegression, FastSVC, compile_fast
+from model_registry import ModelRegistry
+
+warnings.filterwarnings('ignore', category=UserWarning)
+
+
+@pytest.fixture(scope='module')
+def registry():
+    return ModelRegistry(fast=())
+
+
+@pytest.fixture(scope='module')
+def X():
+    # Includes rows where libsvm's pairwise coupling moves the SVM probability ~1e-3 off the sigmoid
+    return load_dataset(os.path.join('dataset', 'test-2.csv')).matrix()[3500:4500]
+
+
+@pytest.mark.parametrize('name', ['logreg', 'svm'])
+def test_matches_original_model(registry, X, name):
+    if name not in registry.available():
+        pytest.skip(f'{name} model not available')
+    model = registry.get(name)
+    fast = compile_fast(model)
+
+    expected = model.predict_proba(X)
+    np.testing.assert_allclose(fast.predict_proba(X), expected, rtol=0, atol=1e-9)
+    np.testing.assert_allclose(fast.predict_proba(X[:1]), expected[:1], rtol=0, atol=1e-9)
+    np.testing.assert_array_equal(fast.predict(X), model.predict(X))
+    np.testing.assert_allclose(fast.decision_function(X[:500]), model.decision_function(X[:500]), atol=1e-8)
+
+
+@pytest.mark.parametrize('kernel', ['linear', 'poly', 'rbf', 'sigmoid'])
+def test_svc_kernels_and_blocks(kernel):
+    rng = np.random.default_rng(0)
+    X_train = rng.normal(size=(300, 6))
+    y = (X_train[:, 0] + X_train[:, 1] ** 2 + rng.normal(0, 0.5, 300) > 1).astype(int)
+    model = SVC(kernel=kernel, probability=True, random_state=0).fit(X_train, y)
+    # Tiny blocks force several kernel blocks per batch
+    fast = FastSVC(model, block_elements=model.support_vectors_.shape[0] * 7)
+    X_test = rng.normal(size=(100, 6))
+
+    np.testing.assert_allclose(fast.decision_function(X_test), model.decision_function(X_test), atol=1e-8)
+    np.testing.assert_allclose(fast.predict_proba(X_test), model.predict_proba(X_test), atol=1e-9)
+    np.testing.assert_array_equal(fast.predict(X_test), model.predict(X_test))
+
+
+def test_validation_and_registry(X):
+    # V1..V28 are already scaled, so the small fits below converge
+    V = X[:200, 1:29]
+    y = np.random.default_rng(0).integers(0, 3, len(V))
+    multinomial = LogisticRegression(max_iter=500).fit(V, y)
+    np.testing.assert_allclose(compile_fast(multinomial).predict_proba(V[:50]),
+                               multinomial.predict_proba(V[:50]), atol=1e-12)
+
+    V_nan = V[:5].copy()
+    V_nan[0, 3] = np.nan
+    with pytest.raises(ValueError):
+        FastLogisticRegression(LogisticRegression().fit(V, V[:, 1] > 0)).predict_proba(V_nan)
+    with pytest.raises(AttributeError):
+        compile_fast(SVC().fit(V, V[:, 1] > 0)).predict_proba(V[:5])
+    with pytest.raises(ValueError):
+        compile_fast(SVC(kernel='precomputed'))
+
+    registry = ModelRegistry(fast=['all'])
+    if 'logreg' in registry.available():
+        assert isinstance(registry.get('logreg'), FastLogisticRegression)
+    with pytest.raises(ValueError):
+        ModelRegistry(fast=['knn'])
+
@@ -0,0 +1,81 @@
+"""
+Test untuk Inference Core
+=========================
+Jalankan dengan: python -m pytest test_inference.py
+"""
+
+import sys
+import os
+import warnings
+
+import numpy as np
+import pytest
+
+# Tambahkan path parent directory
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from dataset_store import load_dataset
+from inference import InferenceCore, score_model
+from model_registry import ModelRegistry
+from prediction_cache import PredictionCache
+
+warnings.filterwarnings('ignore', category=UserWarning)
+
+MODELS = ['dt', 'logreg', 'xgb']
+
+
+@pytest.fixture(scope='module')
+def registry():
+    registry = ModelRegistry(compiled=(), fast=(), knn_index=False)
+    if not set(MODELS) <= set(registry.available()):
+        pytest.skip('dt, logreg and xgb models not available')
+    return registry
+
+
+@pytest.fixture(scope='module')
+def X():
+    return load_dataset(os.path.join('dataset', 'test-2.csv')).matrix()[:50]
+
+
+def test_score_many_follows_requested_order(registry, X):
+    core = InferenceCore(registry, max_workers=3)
+    for names in (['xgb', 'dt', 'logreg'], ['logreg', 'xgb', 'dt', 'xgb']):
+        results = core.score_many(names, X)
+        assert list(results) == list(dict.fromkeys(names))
+        for name, scores in results.items():
+            expected = score_model(registry.get(name), X)
+            np.testing.assert_array_equal(scores.probabilities, expected.probabilities)
+            np.testing.assert_array_equal(scores.predictions, expected.predictions)
+            assert scores.predictions.tolist() == (expected.probabilities > 0.5).astype(int).tolist()
+
+
+def test_cache_hits_skip_scoring(registry, X):
+    cache = PredictionCache(max_entries=16, ttl=60, max_rows=64)
+    core = InferenceCore(registry, max_workers=2, cache=cache)
+    first = core.score_many(MODELS, X)
+    assert cache.stats()['misses'] == len(MODELS)
+
+    # One model cached by score(), the rest by score_many()
+    assert core.score('dt', X) is first['dt']
+    again = core.score_many(list(reversed(MODELS)), X.copy())
+    assert list(again) == list(reversed(MODELS))
+    assert all(again[name] is first[name] for name in MODELS)
+    assert cache.stats()['hits'] == len(MODELS) + 1
+    # Shared cached arrays cannot be modified by a caller
+    assert not first['xgb'].probabilities.flags.writeable
+
+    # Batches above max_rows bypass the cache
+    big = np.repeat(X, 2, axis=0)
+    core.score_many(MODELS, big)
+    assert cache.stats()['entries'] == len(MODELS)
+
+
+def test_read_only_input(registry, X):
+    frozen = X.copy()
+    frozen.setflags(write=False)
+    core = InferenceCore(registry, max_workers=2, cache=PredictionCache(max_entries=16, ttl=60, max_rows=64))
+    results = core.score_many(MODELS, frozen)
+    expected = InferenceCore(registry, max_workers=1).score_many(MODELS, X)
+    for name in MODELS:
+        np.testing.assert_array_equal(results[name].probabilities, expected[name].probabilities)
+    np.testing.assert_array_equal(core.score('logreg', frozen).predictions, expected['logreg'].predictions)
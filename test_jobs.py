@@ -0,0 +1,119 @@
+"""
+Test untuk Job Scoring Asinkron
+===============================
+Jalankan dengan: python -m pytest test_jobs.py
+"""
+
+import sys
+import os
+import io
+import shutil
+import subprocess
+from concurrent.futures import Future
+
+import pandas as pd
+import pytest
+
+# Tambahkan path parent directory
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import jobs
+from jobs import DONE, FAILED, QUEUED, RUNNING, JobRunner, JobStore, UploadTooLarge, count_rows, run_job
+
+
+DATASET = 'dataset/test-1.csv'
+
+
+def _queue(store, source, **options):
+    job_id = store.create(options.get('models', ['dt']), options.get('use_kb', True),
+                          options.get('chunksize', 1000))
+    shutil.copy(source, store.input_path(job_id))
+    return job_id
+
+
+def test_job_runs_to_completion(tmp_path):
+    store = JobStore(str(tmp_path))
+    job_id = _queue(store, DATASET)
+    assert store.get(job_id)['status'] == QUEUED
+
+    job = run_job(store, job_id)
+    rows = count_rows(DATASET)
+    assert job['status'] == DONE
+    assert job['rows_done'] == job['rows_total'] == rows
+    assert job['progress'] == 1.0
+
+    result = pd.read_csv(store.result_path(job_id))
+    assert len(result) == rows
+    assert int(result['final_prediction'].sum()) == job['flagged']
+
+
+def test_job_is_claimed_once(tmp_path):
+    store = JobStore(str(tmp_path))
+    job_id = _queue(store, DATASET, use_kb=False)
+    assert store.claim(job_id)
+    assert not store.claim(job_id)
+    assert run_job(store, job_id)['rows_done'] == 0
+
+
+def test_invalid_input_marks_job_failed(tmp_path):
+    store = JobStore(str(tmp_path))
+    bad = tmp_path / 'bad.csv'
+    bad.write_text('a,b\n1,2\n')
+    job = run_job(store, _queue(store, str(bad)))
+    assert job['status'] == FAILED
+    assert 'missing feature columns' in job['error']
+
+
+def test_orphaned_jobs_are_recovered(tmp_path, monkeypatch):
+    store = JobStore(str(tmp_path))
+    queued, running, live = (_queue(store, DATASET) for _ in range(3))
+    dead = subprocess.Popen([sys.executable, '-c', 'pass'])
+    dead.wait()
+    store.update(queued, owner=dead.pid)
+    store.update(running, owner=dead.pid, status=RUNNING)
+
+    dispatched = []
+    monkeypatch.setattr(JobRunner, '_dispatch', lambda self, job_id: dispatched.append(job_id))
+    result = JobRunner(store, recover=False).recover()
+    assert result == {'requeued': [queued], 'failed': [running]}
+    assert dispatched == [queued]
+    assert store.get(running)['status'] == FAILED
+    # Jobs of a live process (this one) are left alone
+    assert store.get(live)['status'] == QUEUED
+    assert JobRunner(store, recover=False).recover() == {'requeued': [], 'failed': []}
+
+
+def test_reused_pid_does_not_keep_jobs_alive(tmp_path, monkeypatch):
+    if jobs._process_token(os.getpid()) is None:
+        pytest.skip('process start times need /proc')
+    store = JobStore(str(tmp_path))
+    queued, running, live = (_queue(store, DATASET) for _ in range(3))
+    # Written by a process of an earlier boot/container that had this PID (or PID 1)
+    boot_id, _ = jobs._process_token(os.getpid()).split(':')
+    store.update(queued, owner=os.getpid(), owner_token=f'{boot_id}:1')
+    store.update(running, owner=1, owner_token='previous-boot:1', status=RUNNING)
+
+    dispatched = []
+    monkeypatch.setattr(JobRunner, '_dispatch', lambda self, job_id: dispatched.append(job_id))
+    assert JobRunner(store, recover=False).recover() == {'requeued': [queued], 'failed': [running]}
+    assert dispatched == [queued]
+    assert store.get(live)['status'] == QUEUED
+    # Adopted jobs carry this process's identity, so they are not recovered twice
+    assert JobRunner(store, recover=False).recover() == {'requeued': [], 'failed': []}
+
+
+def test_upload_cap_and_failed_futures(tmp_path):
+    store = JobStore(str(tmp_path))
+    runner = JobRunner(store, max_upload_bytes=100, recover=False)
+    with pytest.raises(UploadTooLarge):
+        runner.submit(['dt'], True, io.BytesIO(b'x' * 200))
+    assert [entry for entry in os.listdir(str(tmp_path)) if not entry.startswith('jobs.sqlite3')] == []
+
+    # The pool failed before run_job could record anything
+    job_id = _queue(store, DATASET)
+    future = Future()
+    future.set_exception(RuntimeError('worker died'))
+    runner._job_finished(job_id, future, None)
+    job = store.get(job_id)
+    assert job['status'] == FAILED
+    assert 'worker died' in job['error']
@@ -0,0 +1,115 @@
+"""
+Test untuk Indeks IVF Model KNN
+===============================
+Jalankan dengan: python -m pytest test_knn_index.py
+"""
+
+import sys
+import os
+import shutil
+import warnings
+
+import numpy as np
+import pytest
+
+# Tambahkan path parent directory
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from dataset_store import load_dataset
+import knn_index
+from knn_index import IVFKNeighborsClassifier, build_index
+from model_registry import ModelRegistry
+
+warnings.filterwarnings('ignore', category=UserWarning)
+
+
+@pytest.fixture(scope='module')
+def registry():
+    registry = ModelRegistry(knn_index=False)
+    if 'knn' not in registry.available():
+        pytest.skip('knn model not available')
+    return registry
+
+
+@pytest.fixture(scope='module')
+def index(registry, tmp_path_factory):
+    cache_root = str(tmp_path_factory.mktemp('knn_index'))
+    return IVFKNeighborsClassifier.open_or_build(registry.get('knn'), registry.path('knn'), cache_root)
+
+
+@pytest.fixture(scope='module')
+def X():
+    return load_dataset(os.path.join('dataset', 'test-2.csv')).matrix()[:1000]
+
+
+def test_exhaustive_probe_matches_exact_knn(registry, index, X):
+    model = registry.get('knn')
+    index.nprobe = index.n_lists
+    try:
+        np.testing.assert_array_equal(index.predict_proba(X), model.predict_proba(X))
+        np.testing.assert_array_equal(index.predict(X[:3]), model.predict(X[:3]))
+        distances, neighbours = index.kneighbors(X[:200])
+        expected_distances, expected_neighbours = model.kneighbors(X[:200])
+        # Training rows are stored as float32 (id values reach ~1e5)
+        np.testing.assert_allclose(distances, expected_distances, rtol=1e-5, atol=1e-2)
+        assert np.mean(neighbours == expected_neighbours) > 0.99
+    finally:
+        index.nprobe = 8
+
+
+def test_index_layout(registry, index):
+    assert isinstance(index.train, np.memmap)
+    assert index.train.dtype == np.float32
+    assert index.offsets[-1] == len(index.rows) == index.meta['n_samples']
+    # Rows are a permutation of the original training set
+    model = registry.get('knn')
+    np.testing.assert_array_equal(np.sort(index.rows), np.arange(len(model._fit_X)))
+    np.testing.assert_allclose(index.train, model._fit_X[index.rows], rtol=1e-6)
+
+
+def test_rebuild_on_source_change_and_registry(registry, tmp_path, monkeypatch):
+    model_dir = tmp_path / 'models'
+    model_dir.mkdir()
+    source = model_dir / 'knn_model.pkl'
+    shutil.copy(registry.path('knn'), source)
+    cache_root = str(tmp_path / 'cache')
+
+    first = IVFKNeighborsClassifier.open_or_build(registry.get('knn'), str(source), cache_root, n_lists=16)
+    again = IVFKNeighborsClassifier.open_or_build(registry.get('knn'), str(source), cache_root, n_lists=16)
+    assert again.directory == first.directory
+    # Same content under a new mtime: the published index is re-stamped, not rebuilt
+    train_mtime = os.stat(os.path.join(first.directory, 'train.npy')).st_mtime_ns
+    os.utime(source, ns=(0, 0))
+    rebuilt = IVFKNeighborsClassifier.open_or_build(registry.get('knn'), str(source), cache_root, n_lists=16)
+    assert rebuilt.directory == first.directory
+    assert rebuilt.meta['source']['mtime_ns'] == 0
+    assert os.stat(os.path.join(first.directory, 'train.npy')).st_mtime_ns == train_mtime
+
+    monkeypatch.setattr('knn_index.KNN_INDEX_DIR', cache_root)
+    monkeypatch.setenv('KNN_NLISTS', '16')
+    wrapped = ModelRegistry(str(model_dir), knn_index=True).get('knn')
+    assert isinstance(wrapped, IVFKNeighborsClassifier)
+    assert wrapped.directory == rebuilt.directory
+
+
+def test_concurrent_build_reuses_published_index(registry, tmp_path, monkeypatch):
+    cache_root = str(tmp_path / 'cache')
+    model = registry.get('knn')
+    kmeans = knn_index.kmeans
+    published, published_inode = [], []
+
+    def racing_kmeans(*args, **kwargs):
+        # Another worker finishes and publishes while this one is still building
+        if not published:
+            published.append(None)
+            published[0] = build_index(model, registry.path('knn'), cache_root, n_lists=8)
+            published_inode.append(os.stat(os.path.join(published[0], 'train.npy')).st_ino)
+        return kmeans(*args, **kwargs)
+
+    monkeypatch.setattr(knn_index, 'kmeans', racing_kmeans)
+    directory = build_index(model, registry.path('knn'), cache_root, n_lists=8)
+    assert directory == published[0]
+    # The published files were kept, not deleted and replaced by this build
+    assert os.stat(os.path.join(directory, 'train.npy')).st_ino == published_inode[0]
+    assert [entry for entry in os.listdir(cache_root) if entry.startswith('.tmp-')] == []
+    assert IVFKNeighborsClassifier(directory).predict(model._fit_X[:5]).shape == (5,)
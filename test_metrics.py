@@ -0,0 +1,69 @@
+"""
+Test untuk Metrik Runtime
+=========================
+Jalankan dengan: python -m pytest test_metrics.py
+"""
+
+import sys
+import os
+
+import numpy as np
+
+# Tambahkan path parent directory
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from metrics import Metrics
+from knowledge_base import create_fraud_detection_system
+
+
+def test_render_prometheus_text():
+    metrics = Metrics(enabled=True, buckets=(0.01, 0.1))
+    metrics.inc('fraud_model_rows_total', 3, model='xgb')
+    metrics.observe('fraud_model_seconds', 0.05, model='xgb')
+    metrics.observe('fraud_model_seconds', 0.5, model='xgb')
+    metrics.add_collector(lambda: [('fraud_velocity_cards', 'gauge', 'Cards', {}, 7)])
+
+    lines = metrics.render().splitlines()
+    assert '# TYPE fraud_model_seconds histogram' in lines
+    assert 'fraud_model_rows_total{model="xgb"} 3' in lines
+    assert [line for line in lines if line.startswith('fraud_model_seconds_bucket')] == [
+        'fraud_model_seconds_bucket{model="xgb",le="0.01"} 0',
+        'fraud_model_seconds_bucket{model="xgb",le="0.1"} 1',
+        'fraud_model_seconds_bucket{model="xgb",le="+Inf"} 2',
+    ]
+    assert 'fraud_model_seconds_count{model="xgb"} 2' in lines
+    assert '# TYPE fraud_velocity_cards gauge' in lines
+    assert 'fraud_velocity_cards 7' in lines
+
+
+def test_disabled_metrics_record_nothing():
+    metrics = Metrics(enabled=False)
+    metrics.inc('fraud_model_rows_total', model='xgb')
+    with metrics.timer('fraud_model_seconds', model='xgb'):
+        pass
+    metrics.stopwatch('fraud_stage_seconds', 'stage').lap('model')
+
+    assert metrics.render() == '\n'
+
+
+def test_rule_fire_counts():
+    metrics = Metrics(enabled=True)
+    system = create_fraud_detection_system(metrics)
+    features = {'Time': 7200, 'Amount': 6000}
+    features.update({f'V{i}': 0.0 for i in range(1, 29)})
+
+    result = system.infer(features, {'prediction': 1, 'probability': 0.9, 'accuracy': 0.95})
+    fired = [rule['rule_id'] for rule in result['rules_fired']]
+    assert fired
+
+    matrix = np.zeros((4, 30))
+    matrix[:, 0] = 7200
+    matrix[:, -1] = 6000
+    system.infer_batch(matrix, np.full(4, 0.9))
+
+    rendered = metrics.render()
+    for rule_id in fired:
+        assert f'fraud_rule_fired_total{{rule="{rule_id}"}} 5' in rendered
+    assert 'fraud_kb_evaluations_total{mode="batch"} 4' in rendered
+    for phase in ('context', 'match', 'actions', 'explain'):
+        assert f'fraud_kb_phase_seconds_count{{phase="{phase}"}} 1' in rendered
@@ -0,0 +1,85 @@
+"""
+Test untuk Tabel Metrik Model
+=============================
+Jalankan dengan: python -m pytest test_model_metrics.py
+"""
+
+import sys
+import os
+import json
+import shutil
+import warnings
+
+import pytest
+
+# Tambahkan path parent directory
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import model_metrics
+from model_metrics import ModelMetrics
+from model_registry import MODEL_FILES, ModelRegistry
+
+warnings.filterwarnings('ignore', category=UserWarning)
+
+
+@pytest.fixture
+def metrics_path(tmp_path):
+    return str(tmp_path / 'model_metrics.json')
+
+
+def test_backends_are_cached_separately(metrics_path):
+    if 'logreg' not in ModelRegistry().available():
+        pytest.skip('logreg model not available')
+    exact = ModelMetrics(ModelRegistry(fast=()), path=metrics_path)
+    fast = ModelMetrics(ModelRegistry(fast=['logreg']), path=metrics_path)
+
+    exact_entry = exact.get('logreg')
+    fast_entry = fast.get('logreg')
+    assert (exact_entry['backend'], fast_entry['backend']) == ('sklearn', 'fast')
+
+    with open(metrics_path, encoding='utf-8') as f:
+        models = json.load(f)['models']
+    assert models['logreg'] == exact_entry
+    assert models['logreg@fast'] == fast_entry
+    # Each registry keeps reading its own backend's entry from the shared artifact
+    reread = ModelMetrics(ModelRegistry(fast=()), path=metrics_path)
+    assert reread.is_fresh('logreg')
+    assert reread.cached()['logreg'] == exact_entry
+    assert ModelMetrics(ModelRegistry(fast=['logreg']), path=metrics_path).cached()['logreg'] == fast_entry
+
+
+def test_recomputed_only_when_model_hash_changes(tmp_path, metrics_path, monkeypatch):
+    source = ModelRegistry()
+    if not {'dt', 'gb'} <= set(source.available()):
+        pytest.skip('dt and gb models not available')
+    path = tmp_path / MODEL_FILES['dt']
+    shutil.copy(source.path('dt'), path)
+    registry = ModelRegistry(str(tmp_path), check_interval=0, compiled=())
+
+    evaluated = []
+    evaluate_model = model_metrics.evaluate_model
+    monkeypatch.setattr(model_metrics, 'evaluate_model',
+                        lambda model, X, y: evaluated.append(model) or evaluate_model(model, X, y))
+
+    metrics = ModelMetrics(registry, path=metrics_path)
+    assert not metrics.is_fresh('dt')
+    first = metrics.get('dt')
+    assert len(evaluated) == 1
+
+    # Read back at boot: fresh, nothing is evaluated; a new mtime alone does not matter
+    os.utime(path, ns=(10**18, 10**18))
+    booted = ModelMetrics(registry, path=metrics_path)
+    assert booted.is_fresh('dt')
+    assert booted.get('dt') == first
+    assert len(evaluated) == 1
+
+    # Different model file contents: stale, recomputed with the new hash
+    shutil.copy(source.path('gb'), path)
+    assert not booted.is_fresh('dt')
+    assert 'dt' not in booted.cached()
+    second = booted.get('dt')
+    assert len(evaluated) == 2
+    assert second['model_sha256'] != first['model_sha256']
+    assert booted.is_fresh('dt')
+    assert booted.get('dt', force=True)['model_sha256'] == second['model_sha256']
+    assert len(evaluated) == 3
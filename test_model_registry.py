@@ -0,0 +1,82 @@
+"""
+Test untuk Registry Model
+=========================
+Jalankan dengan: python -m pytest test_model_registry.py
+"""
+
+import sys
+import os
+import shutil
+import warnings
+
+import pytest
+
+# Tambahkan path parent directory
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from model_registry import MODEL_FILES, ModelRegistry
+
+warnings.filterwarnings('ignore', category=UserWarning)
+
+
+@pytest.fixture(scope='module')
+def available():
+    names = ModelRegistry().available()
+    if len(names) < 3:
+        pytest.skip('needs at least three models')
+    return names
+
+
+def test_preload_respects_cache_size(available):
+    registry = ModelRegistry(max_resident=1, fast=())
+    assert len(registry.preload()) == 1
+    assert registry.max_resident == 1
+    assert registry.preload_skipped == available[1:]
+    assert registry.stats()['preload_skipped'] == available[1:]
+
+
+def test_lru_keeps_at_most_cache_size_models(available, monkeypatch):
+    monkeypatch.setenv('MODEL_CACHE_SIZE', '2')
+    registry = ModelRegistry(fast=())
+    assert registry.max_resident == 2
+    first, second, third = available[:3]
+
+    registry.get(first)
+    registry.get(second)
+    registry.get(first)                     # second is now least recently used
+    registry.get(third)
+    assert registry.loaded() == [first, third]
+    assert registry.stats()['evictions'] == 1
+
+    for name in available:
+        registry.get(name)
+        assert len(registry.loaded()) <= 2
+    # Every load beyond the cap evicted exactly one model
+    assert registry.loads == registry.evictions + len(registry.loaded())
+
+
+def test_changed_model_file_is_reloaded(tmp_path):
+    source = ModelRegistry().path('dt')
+    if not os.path.exists(source):
+        pytest.skip('dt model not available')
+    path = tmp_path / MODEL_FILES['dt']
+    shutil.copy(source, path)
+    registry = ModelRegistry(str(tmp_path), check_interval=0, compiled=())
+
+    model, fingerprint = registry.get_versioned('dt')
+    assert registry.get_versioned('dt') == (model, fingerprint)
+    assert registry.loads == 1
+
+    # Same content under a new mtime still changes the (size, mtime_ns) fingerprint
+    os.utime(path, ns=(fingerprint[1] + 10**9, fingerprint[1] + 10**9))
+    reloaded, new_fingerprint = registry.get_versioned('dt')
+    assert reloaded is not model
+    assert new_fingerprint == (fingerprint[0], fingerprint[1] + 10**9)
+    assert registry.loads == 2 and registry.evictions == 0
+
+    # A removed file keeps the resident model; checks can be disabled
+    os.remove(path)
+    assert registry.get('dt') is reloaded
+    shutil.copy(source, path)
+    registry.check_interval = -1
+    assert registry.get('dt') is reloaded
@@ -0,0 +1,82 @@
+"""
+Test untuk Cache Hasil Prediksi
+===============================
+Jalankan dengan: python -m pytest test_prediction_cache.py
+"""
+
+import sys
+import os
+
+import numpy as np
+
+# Tambahkan path parent directory
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from prediction_cache import PredictionCache, features_digest
+from knowledge_base import FraudKnowledgeBase
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_lru_eviction_and_ttl():
+    clock = FakeClock()
+    cache = PredictionCache(max_entries=2, ttl=10, max_rows=4, clock=clock)
+
+    cache.put('a', 1)
+    cache.put('b', 2)
+    assert cache.get('a') == 1          # 'a' becomes most recently used
+    cache.put('c', 3)                   # evicts 'b'
+    assert cache.get('b') is None
+    assert cache.get('c') == 3
+
+    clock.now = 11
+    assert cache.get('a') is None       # expired
+
+    stats = cache.stats()
+    assert (stats['hits'], stats['misses']) == (2, 2)
+    assert stats['evictions'] == 1 and stats['expirations'] == 1
+
+    assert cache.accepts(np.zeros((4, 30)))
+    assert not cache.accepts(np.zeros((5, 30)))
+    assert not PredictionCache(max_entries=0).accepts(np.zeros((1, 30)))
+
+
+def test_get_or_compute_counts_hits():
+    cache = PredictionCache(max_entries=8, ttl=60)
+    calls = []
+
+    def compute():
+        calls.append(1)
+        return 'result'
+
+    assert cache.get_or_compute('key', compute) == 'result'
+    assert cache.get_or_compute('key', compute) == 'result'
+    assert len(calls) == 1
+    assert cache.stats()['hit_rate'] == 0.5
+
+
+def test_features_digest_is_canonical():
+    row = np.array([[0.0, 1.5, -2.0]])
+
+    assert features_digest(row) == features_digest(row.astype(np.float32))
+    assert features_digest(row) == features_digest(np.array([[-0.0, 1.5, -2.0]]))
+    assert features_digest(row) != features_digest(np.array([[0.0, 1.5, -2.5]]))
+    assert features_digest(row) != features_digest(row.reshape(3, 1))
+
+
+def test_rules_version_changes_with_rules():
+    kb = FraudKnowledgeBase()
+    version = kb.rules_version
+
+    assert FraudKnowledgeBase().rules_version == version
+    kb.add_rule({
+        'id': 'R_TEST', 'name': 'Test', 'condition': 'amount > 1',
+        'action': 'increase_risk', 'weight': 0.1, 'priority': 1, 'description': 'Test'
+    })
+    assert kb.rules_version != version
@@ -0,0 +1,314 @@
+"""
+Test untuk Rule Compiler dan Rule Engine
+========================================
+Jalankan dengan: python -m pytest test_rule_engine.py
+"""
+
+import json
+import sys
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pytest
+
+# Tambahkan path parent directory
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from knowledge_base import (
+    FraudKnowledgeBase, RuleCompilationError, RuleCompiler, create_fraud_detection_system
+)
+
+
+CONTEXT = {
+    'hour': 2, 'amount': 1500.0, 'prob': 0.5, 'extreme_features': 4,
+    'very_extreme_features': 2, 'time_seconds': 7200, 'ml_prediction': 1,
+    'velocity_count': 3, 'velocity_amount': 1.2, 'velocity_micro_count': 2,
+    # Derived facts asserted by the assert_fact rules in fraud_rules.json
+    'night_high_amount': False, 'card_testing': True, 'extreme_anomaly': False
+}
+
+
+def test_rule_network_matches_python_semantics():
+    kb = FraudKnowledgeBase()
+    snapshot = kb.snapshot()
+    context = dict(CONTEXT)
+    fired = set(snapshot.network.match(context))
+    batch_context = {name: np.array([value]) for name, value in CONTEXT.items()}
+    fired_batch = snapshot.network.match_batch(batch_context, 1)[0]
+    # At the fixpoint every rule fires exactly when its condition holds
+    # against the derived facts written back into the context
+    for index, rule in enumerate(snapshot.rules):
+        expected = bool(eval(rule['condition'], {'__builtins__': {}}, dict(context)))
+        assert (index in fired) == expected, rule['id']
+        assert fired_batch[index] == expected, rule['id']
+
+
+def test_default_rules_compile():
+    kb = FraudKnowledgeBase()
+    ruleset = kb._build_ruleset(kb._get_default_rules(), None)
+    assert ruleset.network.n_rules == len(kb._get_default_rules())
+
+
+@pytest.mark.parametrize('condition, expected', [
+    ('1 < amount < 2000', True),
+    ('amount > -5 or prob == 1', True),
+    ('hour not in [1, 2]', False),
+    ('not hour in [0, 1]', True),
+])
+def test_supported_constructs(condition, expected):
+    compiler = RuleCompiler()
+    assert compiler.compile(condition)(CONTEXT) is expected
+    assert compiler.compile_batch(condition)(CONTEXT) == expected
+
+
+@pytest.mark.parametrize('condition', [
+    "__import__('os').system('id')",
+    'amount.real > 1',
+    'amount + 1 > 2',
+    'unknown_variable > 1',
+    'amount in some_list',
+    'amount >',
+])
+def test_unsafe_or_invalid_conditions_are_rejected(condition):
+    with pytest.raises(RuleCompilationError):
+        RuleCompiler().compile(condition)
+
+
+def test_add_rule_rejects_invalid_condition():
+    kb = FraudKnowledgeBase()
+    count = len(kb.get_rules())
+    with pytest.raises(RuleCompilationError):
+        kb.add_rule({'id': 'RX', 'condition': 'open("x")', 'action': 'increase_risk'})
+    assert len(kb.get_rules()) == count
+
+
+def _random_transactions(n_rows, seed=0):
+    rng = np.random.default_rng(seed)
+    features = np.empty((n_rows, 30))
+    features[:, 0] = rng.integers(0, 3 * 86400, n_rows)
+    features[:, 1:29] = rng.normal(scale=3.0, size=(n_rows, 28))
+    features[:, 29] = np.choose(rng.integers(0, 3, n_rows), [
+        rng.uniform(0, 1.5, n_rows), rng.uniform(0, 3000, n_rows), rng.uniform(0, 10000, n_rows)
+    ])
+    probs = rng.uniform(0, 1, n_rows)
+    return features, probs
+
+
+def _features_dict(row):
+    features = {'Time': float(row[0]), 'Amount': float(row[-1])}
+    for i in range(1, 29):
+        features[f'V{i}'] = float(row[i])
+    return features
+
+
+def test_evaluate_batch_matches_scalar_path():
+    system = create_fraud_detection_system()
+    engine = system.rule_engine
+    features, probs = _random_transactions(2000)
+
+    batch = engine.evaluate_batch(features, probs)
+
+    for i, row in enumerate(features):
+        ml_prediction = {'prediction': int(probs[i] > 0.5), 'probability': float(probs[i])}
+        single = engine.evaluate(_features_dict(row), ml_prediction)
+        assert batch['final_risk_score'][i] == single['final_risk_score']
+        assert batch['final_prediction'][i] == single['final_prediction']
+        assert batch['confidence_level'][i] == single['confidence_level']
+        assert batch['rules_fired'][i] == [rule['rule_id'] for rule in single['rules_fired']]
+
+
+def _write_rules(path, rules, mtime_ns):
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(rules, f)
+    os.utime(path, ns=(mtime_ns, mtime_ns))
+
+
+def test_rules_file_hot_reload(tmp_path):
+    rules_file = str(tmp_path / 'fraud_rules.json')
+    rules = FraudKnowledgeBase().get_rules()
+    _write_rules(rules_file, rules, 1_000_000_000)
+    kb = FraudKnowledgeBase(rules_file, check_interval=0)
+    worker = FraudKnowledgeBase(rules_file, check_interval=0)
+    version = kb.rules_version
+    snapshot = kb.snapshot()
+
+    # Edited file: picked up on the next refresh, old snapshot stays intact
+    _write_rules(rules_file, rules[:2], 2_000_000_000)
+    assert kb.refresh().version != version
+    assert len(kb.get_rules()) == 2
+    assert len(snapshot.rules) == snapshot.network.n_rules == len(rules)
+
+    # Invalid file: rejected, the previous rule set stays active
+    _write_rules(rules_file, rules[:1] + [{'id': 'RX', 'condition': 'open("x")'}], 3_000_000_000)
+    with pytest.warns(UserWarning):
+        assert len(kb.refresh().rules) == 2
+    assert kb.last_reload_error
+
+    # Admin replace: validated, written atomically, seen by other workers
+    with pytest.raises(RuleCompilationError):
+        kb.replace_rules(rules + [dict(rules[0])])    # duplicate id
+    ruleset = kb.replace_rules(rules[:3])
+    assert kb.last_reload_error is None
+    with open(rules_file, encoding='utf-8') as f:
+        assert json.load(f) == rules[:3]
+    assert worker.refresh().version == ruleset.version
+
+
+@pytest.mark.parametrize('field, value', [('condition', 5), ('condition', ['amount > 1']), ('id', 7)])
+def test_non_string_fields_are_rejected(tmp_path, field, value):
+    rules_file = str(tmp_path / 'fraud_rules.json')
+    rules = FraudKnowledgeBase().get_rules()
+    _write_rules(rules_file, rules, 1_000_000_000)
+    kb = FraudKnowledgeBase(rules_file, check_interval=0)
+    version = kb.rules_version
+
+    bad_rules = rules[:1] + [dict(rules[1], **{field: value})]
+    with pytest.raises(RuleCompilationError):
+        kb.replace_rules(bad_rules)
+    _write_rules(rules_file, bad_rules, 2_000_000_000)
+    with pytest.warns(UserWarning):
+        assert kb.refresh().version == version
+    assert kb.last_reload_error
+    # The rejected file is not re-read on every check
+    assert kb.refresh().version == version
+    with pytest.raises(RuleCompilationError):
+        RuleCompiler().compile(value)
+
+
+def test_concurrent_evaluation_matches_sequential():
+    system = create_fraud_detection_system()
+    features, probs = _random_transactions(640, seed=1)
+    requests = [
+        (_features_dict(row), {'prediction': int(prob > 0.5), 'probability': float(prob)})
+        for row, prob in zip(features, probs)
+    ]
+    expected = [system.rule_engine.evaluate(*request) for request in requests]
+
+    n_threads = 32
+    barrier = threading.Barrier(n_threads)
+
+    def worker(offset):
+        barrier.wait()
+        # Every thread walks all requests from a different starting point
+        order = [(offset + i) % len(requests) for i in range(len(requests))]
+        return {index: system.infer(*requests[index]) for index in order}
+
+    switch_interval = sys.getswitchinterval()
+    sys.setswitchinterval(1e-6)
+    try:
+        with ThreadPoolExecutor(max_workers=n_threads) as executor:
+            results = list(executor.map(worker, range(0, len(requests), len(requests) // n_threads)))
+    finally:
+        sys.setswitchinterval(switch_interval)
+
+    for per_thread in results:
+        for index, result in per_thread.items():
+            for key, value in expected[index].items():
+                assert result[key] == value, (index, key)
+
+
+def test_rule_network_deduplicates_and_matches_conditions():
+    conditions = [
+        'amount > 5000',
+        '5000 < amount and hour in [23, 0, 1]',
+        'hour in [0, 1, 23] and prob > 0.5',
+        '500 < amount < 2000 and prob > 0.5',
+        'not (amount > 5000) or extreme_features >= 3',
+        'prob > 0.5 and (hour == 2 or very_extreme_features != 0)',
+    ]
+    compiler = RuleCompiler()
+    network = compiler.compile_network(conditions)
+
+    # amount > 5000, hour in [...], prob > 0.5, amount > 500, amount < 2000,
+    # extreme_features >= 3, hour == 2, very_extreme_features != 0
+    assert len(network.predicates) == 8
+    assert len(network.expressions) == 2
+
+    rng = np.random.default_rng(2)
+    n_rows = 500
+    batch_context = {
+        'hour': rng.integers(0, 24, n_rows),
+        'amount': rng.choice([0.3, 499, 500, 501, 1999, 2000, 4999, 5000, 5001], n_rows),
+        'prob': rng.choice([0.1, 0.5, 0.9], n_rows),
+        'extreme_features': rng.integers(0, 6, n_rows),
+        'very_extreme_features': rng.integers(0, 3, n_rows),
+    }
+    fired_batch = network.match_batch(batch_context, n_rows)
+    scalar_conditions = [compiler.compile(condition) for condition in conditions]
+
+    for i in range(n_rows):
+        context = {name: values[i].item() for name, values in batch_context.items()}
+        expected = [rule for rule, condition in enumerate(scalar_conditions) if condition(context)]
+        assert network.match(context) == expected
+        assert list(np.flatnonzero(fired_batch[i])) == expected
+
+
+CHAINED_RULES = [
+    # Listed out of dependency order on purpose: the agenda must still reach the fixpoint
+    {'id': 'C3', 'name': 'Chain', 'condition': 'card_testing and night_activity', 'action': 'assert_fact',
+     'fact': 'testing_at_night', 'description': 'Testing kartu di malam hari'},
+    {'id': 'C1', 'name': 'Micro', 'condition': 'amount < 1 and prob > 0.3', 'action': 'assert_fact',
+     'fact': 'card_testing', 'description': 'Transaksi mikro', 'risk_level': 'MEDIUM',
+     'pattern_description': 'Mikro $ {amount:.2f}'},
+    {'id': 'C2', 'name': 'Night', 'condition': 'hour in [0, 1, 2, 3, 4]', 'action': 'assert_fact',
+     'fact': 'night_activity', 'description': 'Jam malam'},
+    {'id': 'R1', 'name': 'Risk', 'condition': 'testing_at_night', 'action': 'flag_high_risk',
+     'weight': 0.5, 'description': 'Testing kartu malam hari'},
+    {'id': 'R2', 'name': 'Risk', 'condition': 'not card_testing and amount > 5000',
+     'action': 'increase_risk', 'weight': 0.2, 'description': 'Nominal besar'},
+]
+
+
+def test_forward_chaining_derives_facts_to_fixpoint(tmp_path):
+    rules_file = str(tmp_path / 'fraud_rules.json')
+    _write_rules(rules_file, CHAINED_RULES, 1_000_000_000)
+    system = create_fraud_detection_system()
+    system.kb = system.rule_engine.kb = FraudKnowledgeBase(rules_file, check_interval=-1)
+
+    features = _features_dict(np.r_[3600.0, np.zeros(28), 0.5])
+    result = system.rule_engine.evaluate(features, {'prediction': 0, 'probability': 0.4})
+    assert result['derived_facts'] == ['testing_at_night', 'card_testing', 'night_activity']
+    assert [rule['rule_id'] for rule in result['rules_fired']] == ['R1']
+    assert result['final_risk_score'] == 0.7
+    assert result['detected_patterns'] == [
+        {'pattern': 'Micro', 'risk_level': 'MEDIUM', 'description': 'Mikro $ 0.50'}
+    ]
+
+    features, probs = _random_transactions(2000, seed=3)
+    batch = system.rule_engine.evaluate_batch(features, probs)
+    for i, row in enumerate(features):
+        ml_prediction = {'prediction': int(probs[i] > 0.5), 'probability': float(probs[i])}
+        single = system.rule_engine.evaluate(_features_dict(row), ml_prediction)
+        assert batch['final_risk_score'][i] == single['final_risk_score']
+        assert batch['rules_fired'][i] == [rule['rule_id'] for rule in single['rules_fired']]
+        assert {fact for fact, mask in batch['derived_facts'].items() if mask[i]} == set(single['derived_facts'])
+
+
+def test_fact_rules_must_use_derived_facts_positively():
+    kb = FraudKnowledgeBase()
+    rules = CHAINED_RULES[1:3] + [
+        {'id': 'C9', 'name': 'Bad', 'condition': 'not card_testing', 'action': 'assert_fact',
+         'fact': 'clean', 'description': 'Negasi fakta'}
+    ]
+    with pytest.raises(RuleCompilationError):
+        kb._build_ruleset(rules, None)
+    with pytest.raises(RuleCompilationError):
+        kb._build_ruleset([dict(CHAINED_RULES[1], pattern_description='{amount.__class__}')], None)
+
+
+@pytest.mark.parametrize('description', ['Pola {tidak_dikenal}', 'Kurung { tanpa pasangan', '100% {}'])
+def test_plain_description_is_not_formatted(tmp_path, description):
+    rules_file = str(tmp_path / 'fraud_rules.json')
+    rules = [dict(CHAINED_RULES[1], description=description)]
+    del rules[0]['pattern_description']
+    _write_rules(rules_file, rules, 1_000_000_000)
+    system = create_fraud_detection_system()
+    system.kb = system.rule_engine.kb = FraudKnowledgeBase(rules_file, check_interval=-1)
+
+    features = _features_dict(np.r_[3600.0, np.zeros(28), 0.5])
+    result = system.rule_engine.evaluate(features, {'prediction': 0, 'probability': 0.4})
+    assert result['detected_patterns'] == [
+        {'pattern': 'Micro', 'risk_level': 'MEDIUM', 'description': description}
+    ]
@@ -0,0 +1,92 @@
+"""
+Test untuk Kompilasi Model Pohon
+================================
+Jalankan dengan: python -m pytest test_tree_compiler.py
+"""
+
+import sys
+import os
+import warnings
+
+import numpy as np
+import pytest
+
+# Tambahkan path parent directory
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from sklearn.ensemble import RandomForestClassifier
+
+from dataset_store import load_dataset
+from model_registry import ModelRegistry
+from tree_compiler import CompiledTreeModel, FlatTreeEnsemble, compile_model
+
+warnings.filterwarnings('ignore', category=UserWarning)
+
+TREE_MODELS = ['dt', 'gb', 'adaboost', 'xgb']
+
+
+@pytest.fixture(scope='module')
+def registry():
+    return ModelRegistry(compiled=())
+
+
+@pytest.fixture(scope='module')
+def X():
+    return load_dataset(os.path.join('dataset', 'test-2.csv')).matrix()[:3000]
+
+
+@pytest.mark.parametrize('name', TREE_MODELS)
+def test_matches_original_model(registry, X, name):
+    if name not in registry.available():
+        pytest.skip(f'{name} model not available')
+    model = registry.get(name)
+    compiled = compile_model(model)
+
+    expected = model.predict_proba(X)
+    np.testing.assert_allclose(compiled.predict_proba(X), expected, atol=1e-6)
+    np.testing.assert_array_equal(compiled.predict(X), model.predict(X))
+    np.testing.assert_allclose(compiled.predict_proba(X[:1]), expected[:1], atol=1e-6)
+
+
+def test_random_forest_and_missing_values(X):
+    rng = np.random.default_rng(0)
+    y = (X[:, 14] + rng.normal(0, 1, len(X)) > 0).astype(int)
+    X_train = X.copy()
+    X_train[::5, 3] = np.nan
+    forest = RandomForestClassifier(n_estimators=20, random_state=0).fit(X_train, y)
+    compiled = compile_model(forest)
+
+    X_test = X[:500].copy()
+    X_test[::3, 3] = np.nan
+    X_test[::4, 7] = np.nan
+    np.testing.assert_allclose(compiled.predict_proba(X_test), forest.predict_proba(X_test), atol=1e-12)
+
+
+def test_nan_policy_follows_original(registry, X):
+    X_nan = X[:50].copy()
+    X_nan[::2, 5] = np.nan
+    if 'xgb' in registry.available():
+        xgb_model = registry.get('xgb')
+        np.testing.assert_allclose(compile_model(xgb_model).predict_proba(X_nan),
+                                   xgb_model.predict_proba(X_nan), atol=1e-6)
+    if 'gb' in registry.available():
+        with pytest.raises(ValueError):
+            compile_model(registry.get('gb')).predict_proba(X_nan)
+
+
+def test_save_load_and_routing(registry, X, tmp_path):
+    if 'gb' not in registry.available():
+        pytest.skip('gb model not available')
+    model = registry.get('gb')
+    compiled = compile_model(model)
+    path = str(tmp_path / 'gb.npz')
+    compiled.save(path)
+    loaded = FlatTreeEnsemble.load(path)
+    np.testing.assert_array_equal(loaded.predict_proba(X), compiled.predict_proba(X))
+
+    routed = CompiledTreeModel(model, compiled, max_rows=4)
+    assert routed._route(X[:4]) is compiled
+    assert routed._route(X[:5]) is model
+    assert isinstance(ModelRegistry(compiled=['gb']).get('gb'), CompiledTreeModel)
+    with pytest.raises(ValueError):
+        ModelRegistry(compiled=['logreg'])
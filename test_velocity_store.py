@@ -0,0 +1,122 @@
+"""
+Test untuk Velocity Store per Kartu
+===================================
+Jalankan dengan: python -m pytest test_velocity_store.py
+"""
+
+import sys
+import os
+
+import pytest
+
+# Tambahkan path parent directory
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from knowledge_base import create_fraud_detection_system
+from velocity_store import VelocityStore
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_sliding_window_counts_prior_transactions():
+    clock = FakeClock()
+    store = VelocityStore(window_seconds=60, max_events=3, max_cards=2, clock=clock)
+
+    assert store.observe('card-a', 0.2) == {
+        'velocity_count': 0, 'velocity_amount': 0, 'velocity_micro_count': 0
+    }
+    clock.now += 10
+    store.observe('card-a', 100.0)
+    clock.now += 10
+    assert store.observe('card-a', 0.3) == {
+        'velocity_count': 2, 'velocity_amount': 100.2, 'velocity_micro_count': 1
+    }
+
+    # Ring buffer keeps only the last 3 events per card
+    clock.now += 10
+    velocity = store.observe('card-a', 5.0)
+    assert velocity['velocity_count'] == 3
+    assert store.peek('card-a')['velocity_count'] == 3
+    assert store.peek('card-a')['velocity_amount'] == pytest.approx(105.3)
+
+    # Events at least window_seconds old are evicted
+    clock.now = 1079
+    assert store.peek('card-a') == {
+        'velocity_count': 2, 'velocity_amount': 5.3, 'velocity_micro_count': 1
+    }
+    clock.now = 1080
+    assert store.peek('card-a') == {
+        'velocity_count': 1, 'velocity_amount': 5.0, 'velocity_micro_count': 0
+    }
+
+
+def test_card_limit_evicts_least_recently_seen():
+    store = VelocityStore(window_seconds=60, max_events=4, max_cards=2, clock=FakeClock())
+    store.observe('a', 1.0)
+    store.observe('b', 1.0)
+    store.observe('a', 1.0)
+    store.observe('c', 1.0)            # evicts 'b'
+
+    assert store.peek('b')['velocity_count'] == 0
+    assert store.peek('a')['velocity_count'] == 2
+    assert store.stats()['card_evictions'] == 1
+    with pytest.raises(ValueError):
+        store.observe('', 1.0)
+
+
+def test_repeated_micro_transactions_flag_card_testing():
+    system = create_fraud_detection_system()
+    store = VelocityStore(window_seconds=600, clock=FakeClock())
+    features = {'Time': 36000.0, 'Amount': 0.2, **{f'V{i}': 0.0 for i in range(1, 29)}}
+    ml_prediction = {'prediction': 0, 'probability': 0.05}
+
+    results = [
+        system.infer(features, ml_prediction, store.observe('card-1', features['Amount']))
+        for _ in range(3)
+    ]
+
+    assert 'card_testing' not in results[1]['derived_facts']
+    assert 'card_testing' in results[2]['derived_facts']
+    assert 'R11' in [rule['rule_id'] for rule in results[2]['rules_fired']]
+    assert results[2]['final_prediction'] == 1
+    # Stateless requests (no card history) are unaffected
+    assert system.infer(features, ml_prediction)['rules_fired'] == results[0]['rules_fired']
+
+
+def test_replayed_event_is_observed_once():
+    clock = FakeClock()
+    store = VelocityStore(window_seconds=60, max_events=2, clock=clock)
+    store.observe('card-a', 5.0)
+    first = store.observe('card-a', 0.2, event_id='tx-1')
+    clock.now += 5
+    # Retries of tx-1 see the same history and are not recorded again
+    assert store.observe('card-a', 0.2, event_id='tx-1') == first
+    assert store.peek('card-a')['velocity_count'] == 2
+    assert store.observe('card-a', 0.2, event_id='tx-2')['velocity_count'] == 2
+
+    # Once tx-1 left the ring buffer (or the window), the id counts as new again
+    clock.now += 60
+    assert store.observe('card-a', 0.2, event_id='tx-1')['velocity_count'] == 0
+
+
+def test_stats_event_total_follows_expiry_eviction_and_clear():
+    clock = FakeClock()
+    store = VelocityStore(window_seconds=60, max_events=2, max_cards=2, clock=clock)
+    for _ in range(3):
+        store.observe('a', 1.0)        # ring buffer keeps 2
+    store.observe('b', 1.0)
+    assert store.stats()['events'] == 3
+
+    clock.now += 61
+    store.observe('b', 1.0)            # expires b's old event
+    assert store.stats()['events'] == 3
+    store.observe('c', 1.0)            # evicts 'a' with its 2 events
+    assert store.stats()['events'] == 2
+    store.clear()
+    assert store.stats()['events'] == 0
@@ -0,0 +1,83 @@
+"""
+Feature Marshalling untuk Prediksi
+==================================
+Metadata kolom yang dihitung sekali dan konversi input request menjadi array
+NumPy float64 yang contiguous, sehingga jalur prediksi tidak perlu membangun
+pandas DataFrame per request.
+
+Model di-fit dengan DataFrame sehingga menyimpan `feature_names_in_`.
+strip_feature_names() memverifikasi urutan kolom model sama dengan
+FEATURE_NAMES lalu membuang nama tersebut, agar sklearn/XGBoost menerima
+array biasa tanpa validasi nama fitur di setiap panggilan.
+"""
+
+from typing import Any, Dict
+
+import numpy as np
+
+
+FEATURE_NAMES = ('id',) + tuple(f'V{i}' for i in range(1, 29)) + ('Amount',)
+N_FEATURES = len(FEATURE_NAMES)
+
+# Posisi kolom di dalam vektor fitur
+TIME_INDEX = 0          # kolom 'id' dipakai sebagai Time oleh Knowledge Base
+V_SLICE = slice(1, 29)  # V1-V28
+AMOUNT_INDEX = N_FEATURES - 1
+
+
+def to_matrix(values: Any) -> np.ndarray:
+    """
+    Konversi input (list baris, list datar untuk satu transaksi, atau array)
+    menjadi array (n_rows, N_FEATURES) float64 C-contiguous
+
+    Raises:
+        ValueError: bentuk input tidak sesuai
+    """
+    try:
+        matrix = np.asarray(values, dtype=np.float64)
+    except TypeError as e:
+        raise ValueError(f'features must be numeric: {e}') from None
+    if matrix.ndim == 1:
+        matrix = matrix.reshape(1, -1)
+    if matrix.ndim != 2 or matrix.shape[1] != N_FEATURES:
+        raise ValueError(
+            f'features must have shape (n_rows, {N_FEATURES}), got {matrix.shape}'
+        )
+    return np.ascontiguousarray(matrix)
+
+
+def features_dict(row: np.ndarray) -> Dict[str, float]:
+    """Vektor fitur satu transaksi -> dictionary untuk Knowledge Base"""
+    features = {
+        'Time': float(row[TIME_INDEX]),
+        'Amount': float(row[AMOUNT_INDEX])
+    }
+    for i, value in enumerate(row[V_SLICE].tolist(), start=1):
+        features[f'V{i}'] = value
+    return features
+
+
+def strip_feature_names(model: Any) -> Any:
+    """
+    Buang nama fitur yang disimpan model setelah memastikan urutannya sama
+    dengan FEATURE_NAMES
+
+    Raises:
+        ValueError: model dilatih dengan kolom/urutan yang berbeda
+    """
+    booster = model.get_booster() if hasattr(model, 'get_booster') else None
+    if booster is not None:
+        names = booster.feature_names
+    else:
+        names = getattr(model, 'feature_names_in_', None)
+
+    if names is None:
+        return model
+    if tuple(names) != FEATURE_NAMES:
+        raise ValueError(f'Model dilatih dengan kolom berbeda: {list(names)}')
+
+    if booster is not None:
+        booster.feature_names = None
+    else:
+        del model.feature_names_in_
+    return model
@@ -0,0 +1,406 @@
+"""
+Kompilasi Model Pohon ke Array Datar
+====================================
+predict_proba sklearn untuk satu baris pada RandomForest/GradientBoosting/
+AdaBoost didominasi overhead Python: validasi input, dispatch per estimator
+dan backend paralel joblib. Modul ini meratakan pohon-pohon model yang sudah
+dilatih (dt, rf, gb, adaboost dari pickle, xgb dari JSON booster) menjadi
+array NumPy kontigu per node:
+
+- feature, threshold : kolom dan ambang split
+- left               : indeks anak kiri; anak kanan selalu left + 1
+- missing_right      : arah nilai NaN (1 = kanan)
+- value              : kontribusi daun (sudah dikali bobot/learning rate)
+
+FlatTreeEnsemble menelusuri semua pohon untuk semua baris sekaligus, satu
+level per iterasi: node = left[node] + (x tidak lolos ambang). Daun menunjuk
+dirinya sendiri; pasangan (baris, pohon) yang sudah sampai di daun keluar
+dari himpunan aktif sehingga setiap iterasi hanya memproses jalur yang masih
+berjalan.
+
+Semantik split mengikuti model aslinya:
+- sklearn : input di-cast ke float32, ke kiri jika x <= threshold (float64)
+- XGBoost : input float32, ke kiri jika x < threshold (float32), NaN ke
+  arah default node
+- NaN/inf ditolak (ValueError) jika model aslinya juga menolaknya
+
+Skor akhir = base + jumlah nilai daun, lalu fungsi link: identitas untuk
+dt/rf (nilai daun = probabilitas kelas 1 / jumlah pohon), logistik untuk gb,
+xgb dan adaboost (margin / decision function biner).
+
+Untuk ribuan baris sekaligus loop Cython/C model asli tetap lebih cepat
+daripada penelusuran NumPy ini, jadi CompiledTreeModel (dipakai registry
+jika COMPILED_TREES diset) hanya mengarahkan batch kecil ke array datar.
+
+Konfigurasi:
+- COMPILED_TREES_MAX_ROWS: batch sampai ukuran ini memakai array datar (default 32)
+
+Penggunaan (dari root repository):
+    python tree_compiler.py [dt gb adaboost xgb] [--export "ml model/compiled"]
+"""
+
+import argparse
+import os
+import sys
+from collections import deque
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+from scipy.special import expit
+
+
+LINKS = ('identity', 'logistic')
+
+
+class FlatTreeEnsemble:
+    """
+    Prediktor ensemble pohon berbasis array, kompatibel dengan
+    predict/predict_proba sklearn untuk klasifikasi biner
+    """
+
+    ARRAYS = ('feature', 'threshold', 'left', 'missing_right', 'value', 'roots')
+
+    def __init__(self, feature: np.ndarray, threshold: np.ndarray, left: np.ndarray,
+                 missing_right: np.ndarray, value: np.ndarray, roots: np.ndarray,
+                 n_features: int, max_depth: int, base: float = 0.0,
+                 link: str = 'identity', strict: bool = False, allow_nan: bool = True,
+                 allow_inf: bool = True, source: str = ''):
+        if link not in LINKS:
+            raise ValueError(f'Unknown link: {link}')
+        self.feature = np.ascontiguousarray(feature, dtype=np.intp)
+        self.threshold = np.ascontiguousarray(threshold)
+        self.left = np.ascontiguousarray(left, dtype=np.intp)
+        self.missing_right = np.ascontiguousarray(missing_right, dtype=np.intp)
+        self.value = np.ascontiguousarray(value, dtype=np.float64)
+        self.roots = np.ascontiguousarray(roots, dtype=np.intp)
+        self.internal = self.left != np.arange(len(self.left))
+        self.n_features_in_ = int(n_features)
+        self.max_depth = int(max_depth)
+        self.base = float(base)
+        self.link = link
+        self.strict = bool(strict)
+        self.allow_nan = bool(allow_nan)
+        self.allow_inf = bool(allow_inf)
+        self.source = source
+        self.classes_ = np.array([0, 1])
+
+    @property
+    def n_trees(self) -> int:
+        return len(self.roots)
+
+    @property
+    def n_nodes(self) -> int:
+        return len(self.feature)
+
+    def apply(self, X: np.ndarray) -> np.ndarray:
+        """Indeks daun (n_rows, n_trees) untuk setiap baris dan pohon"""
+        X = np.asarray(X)
+        if X.ndim != 2 or X.shape[1] != self.n_features_in_:
+            raise ValueError(f'Expected {self.n_features_in_} features, got shape {X.shape}')
+        n_rows = X.shape[0]
+        # Both libraries split on float32 inputs; compare in the threshold dtype
+        values = np.ascontiguousarray(X, dtype=np.float32)
+        has_missing = bool(np.isnan(values).any())
+        if has_missing and not self.allow_nan:
+            raise ValueError('Input X contains NaN.')
+        if not self.allow_inf and np.isinf(values).any():
+            raise ValueError("Input X contains infinity or a value too large for dtype('float32').")
+        values = values.astype(self.threshold.dtype, copy=False).ravel()
+
+        # One path per (row, tree), flattened row-major; finished paths drop out
+        node = np.tile(self.roots, n_rows)
+        active = np.flatnonzero(self.internal[node])
+        offset = active // self.n_trees * self.n_features_in_
+        current = node[active]
+        while active.size:
+            x = values[offset + self.feature[current]]
+            threshold = self.threshold[current]
+            go_right = x >= threshold if self.strict else x > threshold
+            if has_missing:
+                go_right = np.where(np.isnan(x), self.missing_right[current], go_right)
+            current = self.left[current] + go_right
+            node[active] = current
+            keep = self.internal[current]
+            active, offset, current = active[keep], offset[keep], current[keep]
+        return node.reshape(n_rows, self.n_trees)
+
+    def decision_function(self, X: np.ndarray) -> np.ndarray:
+        """Skor sebelum fungsi link (margin untuk link logistik)"""
+        return self.base + self.value[self.apply(X)].sum(axis=1)
+
+    def predict_proba(self, X: np.ndarray) -> np.ndarray:
+        raw = self.decision_function(X)
+        positive = expit(raw) if self.link == 'logistic' else raw
+        return np.column_stack([1.0 - positive, positive])
+
+    def predict(self, X: np.ndarray) -> np.ndarray:
+        # argmax semantics: a tie at 0.5 is class 0, as in sklearn/XGBoost
+        return (self.predict_proba(X)[:, 1] > 0.5).astype(int)
+
+    def save(self, path: str):
+        """Simpan array dan metadata sebagai .npz (tanpa pickle)"""
+        np.savez(
+            path, **{name: getattr(self, name) for name in self.ARRAYS},
+            meta=np.array([self.n_features_in_, self.max_depth, self.base, self.strict,
+                           self.allow_nan, self.allow_inf], dtype=np.float64),
+            link=np.array(self.link), source=np.array(self.source)
+        )
+
+    @classmethod
+    def load(cls, path: str) -> 'FlatTreeEnsemble':
+        with np.load(path, allow_pickle=False) as data:
+            n_features, max_depth, base, strict, allow_nan, allow_inf = data['meta'].tolist()
+            return cls(*(data[name] for name in cls.ARRAYS), n_features=int(n_features),
+                       max_depth=int(max_depth), base=base, link=str(data['link']),
+                       strict=bool(strict), allow_nan=bool(allow_nan), allow_inf=bool(allow_inf),
+                       source=str(data['source']))
+
+
+class CompiledTreeModel:
+    """
+    Model pohon dengan dua jalur: batch kecil (request online) lewat
+    FlatTreeEnsemble, batch besar lewat model asli yang loop Cython/C-nya
+    lebih cepat untuk ribuan baris
+    """
+
+    def __init__(self, model: Any, compiled: Optional[FlatTreeEnsemble] = None,
+                 max_rows: Optional[int] = None):
+        if max_rows is None:
+            max_rows = int(os.environ.get('COMPILED_TREES_MAX_ROWS', 32))
+        self.model = model
+        self.compiled = compile_model(model) if compiled is None else compiled
+        self.max_rows = max_rows
+        self.classes_ = self.compiled.classes_
+        self.n_features_in_ = self.compiled.n_features_in_
+
+    def _route(self, X: np.ndarray) -> Any:
+        return self.compiled if np.shape(X)[0] <= self.max_rows else self.model
+
+    def predict_proba(self, X: np.ndarray) -> np.ndarray:
+        return self._route(X).predict_proba(X)
+
+    def predict(self, X: np.ndarray) -> np.ndarray:
+        return self._route(X).predict(X)
+
+
+class _Builder:
+    """Mengumpulkan node dari banyak pohon ke array global"""
+
+    def __init__(self, n_features: int, threshold_dtype):
+        self.n_features = n_features
+        self.threshold_dtype = threshold_dtype
+        self.feature: List[int] = []
+        self.threshold: List[float] = []
+        self.left: List[int] = []
+        self.missing_right: List[int] = []
+        self.value: List[float] = []
+        self.roots: List[int] = []
+        self.max_depth = 0
+
+    def add_tree(self, left, right, feature, threshold, missing_left, leaf_value):
+        """
+        Tambah satu pohon dalam penomoran aslinya (daun: left == -1); node
+        diberi nomor ulang BFS agar kedua anak selalu bersebelahan
+        """
+        base = len(self.feature)
+        order = [0]
+        new_id = {0: base}
+        depth = {0: 0}
+        queue = deque([0])
+        while queue:
+            old = queue.popleft()
+            if left[old] != -1:
+                for child in (left[old], right[old]):
+                    new_id[child] = base + len(order)
+                    depth[child] = depth[old] + 1
+                    order.append(child)
+                    queue.append(child)
+
+        for old in order:
+            if left[old] == -1:
+                self.feature.append(0)
+                self.threshold.append(0.0)
+                self.left.append(new_id[old])
+                self.missing_right.append(0)
+                self.value.append(float(leaf_value[old]))
+            else:
+                self.feature.append(int(feature[old]))
+                self.threshold.append(threshold[old])
+                self.left.append(new_id[left[old]])
+                self.missing_right.append(0 if missing_left[old] else 1)
+                self.value.append(0.0)
+        self.roots.append(base)
+        self.max_depth = max(self.max_depth, max(depth.values()))
+
+    def build(self, model: Any, **kwargs) -> FlatTreeEnsemble:
+        if not hasattr(model, 'get_booster'):
+            # sklearn rejects inf always and NaN unless the estimator supports it
+            from sklearn.utils import get_tags
+
+            kwargs.update(allow_nan=get_tags(model).input_tags.allow_nan, allow_inf=False)
+        return FlatTreeEnsemble(
+            np.array(self.feature), np.array(self.threshold, dtype=self.threshold_dtype),
+            np.array(self.left), np.array(self.missing_right), np.array(self.value),
+            np.array(self.roots), n_features=self.n_features, max_depth=self.max_depth,
+            source=type(model).__name__, **kwargs
+        )
+
+
+def _sklearn_tree_arrays(tree) -> Tuple:
+    """(left, right, feature, threshold, missing_left) dari sklearn Tree"""
+    nodes = tree.__getstate__()['nodes']
+    if 'missing_go_to_left' in nodes.dtype.names:
+        missing_left = nodes['missing_go_to_left'].astype(bool)
+    else:
+        missing_left = np.zeros(tree.node_count, dtype=bool)
+    return tree.children_left, tree.children_right, tree.feature, tree.threshold, missing_left
+
+
+def _class_one_fraction(tree) -> np.ndarray:
+    values = tree.value[:, 0, :]
+    return values[:, 1] / values.sum(axis=1)
+
+
+def _check_binary(model: Any):
+    classes = getattr(model, 'classes_', None)
+    if classes is None or list(classes) != [0, 1]:
+        raise ValueError(f'{type(model).__name__}: only binary 0/1 classifiers are supported')
+
+
+def _compile_forest(model: Any, estimators: List[Any], n_features: int) -> FlatTreeEnsemble:
+    """DecisionTree / RandomForest / ExtraTrees: rata-rata probabilitas per pohon"""
+    builder = _Builder(n_features, np.float64)
+    for estimator in estimators:
+        tree = estimator.tree_
+        builder.add_tree(*_sklearn_tree_arrays(tree), _class_one_fraction(tree) / len(estimators))
+    return builder.build(model)
+
+
+def _compile_gradient_boosting(model: Any, n_features: int) -> FlatTreeEnsemble:
+    if model.estimators_.shape[1] != 1:
+        raise ValueError('GradientBoostingClassifier: only binary log-loss models are supported')
+    # The init estimator's raw prediction is constant for the default prior/zero init
+    init = model._raw_predict_init(np.zeros((2, n_features)))
+    if init.shape[1] != 1 or init[0, 0] != init[1, 0]:
+        raise ValueError('GradientBoostingClassifier: init estimator must be constant')
+    builder = _Builder(n_features, np.float64)
+    for estimator in model.estimators_[:, 0]:
+        tree = estimator.tree_
+        builder.add_tree(*_sklearn_tree_arrays(tree), tree.value[:, 0, 0] * model.learning_rate)
+    return builder.build(model, base=float(init[0, 0]), link='logistic')
+
+
+def _compile_adaboost(model: Any, n_features: int) -> FlatTreeEnsemble:
+    """
+    AdaBoost SAMME biner: decision = 2 * sum(w_i * (+1 kelas 1 / -1 kelas 0)) / sum(w)
+    dan predict_proba = softmax([-d, d] / 2) = sigmoid(d)
+    """
+    if getattr(model, 'algorithm', 'SAMME') == 'SAMME.R':
+        raise ValueError('AdaBoostClassifier: SAMME.R is not supported')
+    total = model.estimator_weights_.sum()
+    builder = _Builder(n_features, np.float64)
+    for estimator, weight in zip(model.estimators_, model.estimator_weights_):
+        tree = estimator.tree_
+        # estimator.predict = argmax of leaf counts (a tie picks class 0)
+        votes = np.where(tree.value[:, 0, 1] > tree.value[:, 0, 0], 1.0, -1.0)
+        builder.add_tree(*_sklearn_tree_arrays(tree), votes * 2 * weight / total)
+    return builder.build(model, link='logistic')
+
+
+def _compile_xgboost(model: Any) -> FlatTreeEnsemble:
+    import json
+
+    booster = model.get_booster()
+    config = json.loads(booster.save_raw('json'))['learner']
+    objective = config['objective']['name']
+    if objective != 'binary:logistic':
+        raise ValueError(f'XGBoost: objective {objective} is not supported')
+    booster_model = config['gradient_booster']['model']
+    if config['gradient_booster']['name'] != 'gbtree':
+        raise ValueError('XGBoost: only gbtree boosters are supported')
+
+    n_features = int(config['learner_model_param']['num_feature'])
+    base_score = float(config['learner_model_param']['base_score'])
+    builder = _Builder(n_features, np.float32)
+    for tree in booster_model['trees']:
+        left = np.array(tree['left_children'])
+        conditions = np.array(tree['split_conditions'], dtype=np.float32)
+        # Leaves store their value in split_conditions
+        builder.add_tree(left, np.array(tree['right_children']), np.array(tree['split_indices']),
+                         conditions, np.array(tree['default_left'], dtype=bool), conditions)
+    margin = float(np.log(base_score / (1.0 - base_score)))
+    return builder.build(model, base=margin, link='logistic', strict=True)
+
+
+def compile_model(model: Any) -> FlatTreeEnsemble:
+    """
+    Ratakan model pohon yang sudah dilatih
+
+    Raises:
+        ValueError: tipe atau konfigurasi model tidak didukung
+    """
+    if isinstance(model, FlatTreeEnsemble):
+        return model
+    if isinstance(model, CompiledTreeModel):
+        return model.compiled
+    if hasattr(model, 'get_booster'):
+        return _compile_xgboost(model)
+
+    from sklearn.ensemble import AdaBoostClassifier, GradientBoostingClassifier
+    from sklearn.tree import BaseDecisionTree
+
+    _check_binary(model)
+    n_features = int(model.n_features_in_)
+    if isinstance(model, BaseDecisionTree):
+        return _compile_forest(model, [model], n_features)
+    if isinstance(model, GradientBoostingClassifier):
+        return _compile_gradient_boosting(model, n_features)
+    if isinstance(model, AdaBoostClassifier):
+        if not all(isinstance(e, BaseDecisionTree) for e in model.estimators_):
+            raise ValueError('AdaBoostClassifier: base estimators must be decision trees')
+        return _compile_adaboost(model, n_features)
+    estimators = getattr(model, 'estimators_', None)
+    if estimators is not None and all(isinstance(e, BaseDecisionTree) for e in estimators):
+        return _compile_forest(model, list(estimators), n_features)
+    raise ValueError(f'{type(model).__name__} is not a supported tree model')
+
+
+def compare(original: Any, compiled: FlatTreeEnsemble, X: np.ndarray) -> Dict:
+    """Selisih probabilitas maksimum dan jumlah label berbeda terhadap model asli"""
+    expected = original.predict_proba(X)[:, 1]
+    actual = compiled.predict_proba(X)[:, 1]
+    return {
+        'max_abs_diff': float(np.max(np.abs(expected - actual))),
+        'label_mismatches': int(np.count_nonzero((expected > 0.5) != (actual > 0.5))),
+    }
+
+
+def main():
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+    from model_registry import ModelRegistry
+    from dataset_store import load_dataset
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('models', nargs='*', default=['dt', 'rf', 'gb', 'adaboost', 'xgb'])
+    parser.add_argument('--dataset', default=os.path.join('dataset', 'test-2.csv'))
+    parser.add_argument('--export', help='direktori tujuan file <model>.npz')
+    args = parser.parse_args()
+
+    registry = ModelRegistry(compiled=())
+    X = load_dataset(args.dataset).matrix()
+    for name in args.models:
+        if name not in registry.available():
+            print(f'{name:<10} skipped: {registry.path(name)} not found')
+            continue
+        model = registry.get(name)
+        compiled = compile_model(model)
+        result = compare(model, compiled, X)
+        print(f"{name:<10} {compiled.n_trees:>4} trees {compiled.n_nodes:>7} nodes depth {compiled.max_depth:>3}  "
+              f"max |dp| {result['max_abs_diff']:.2e}  label mismatches {result['label_mismatches']}")
+        if args.export:
+            os.makedirs(args.export, exist_ok=True)
+            compiled.save(os.path.join(args.export, f'{name}.npz'))
+
+
+if __name__ == '__main__':
+    main()
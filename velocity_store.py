@@ -0,0 +1,179 @@
+"""
+Velocity Store per Kartu
+========================
+Pola "Multiple Micro Transactions" dan velocity lain hanya bisa dideteksi
+jika riwayat transaksi sebuah kartu diingat di antara request. Store ini
+menyimpan, untuk setiap card_id, ring buffer (deque berukuran tetap) berisi
+(timestamp, amount) transaksi dalam jendela waktu terakhir, beserta jumlah
+berjalan sehingga setiap observasi O(1) amortized:
+
+- velocity_count: jumlah transaksi sebelumnya dalam jendela
+- velocity_amount: total nominal transaksi sebelumnya dalam jendela
+- velocity_micro_count: jumlah transaksi mikro sebelumnya dalam jendela
+
+Observasi boleh membawa event_id (kunci idempotensi klien atau digest
+payload). Event yang sama yang diulang selama masih ada di jendela (retry,
+antrean offline PWA yang memutar ulang request) tidak dihitung lagi dan
+mendapat velocity yang sama dengan observasi pertamanya.
+
+Event yang lebih tua dari jendela dibuang dari kiri buffer saat kartu
+diobservasi. Memori dibatasi oleh jumlah event per kartu dan jumlah kartu
+(kartu yang paling lama tidak aktif dikeluarkan lebih dulu).
+
+Store ada di memori setiap proses; dengan beberapa worker gunicorn, riwayat
+sebuah kartu hanya lengkap jika request kartu tersebut selalu ke worker yang
+sama (atau jalankan satu worker dengan --threads).
+
+Konfigurasi:
+- VELOCITY_WINDOW_SECONDS: panjang jendela (default 600 = 10 menit)
+- VELOCITY_MAX_EVENTS: event maksimum per kartu (default 32)
+- VELOCITY_MAX_CARDS: kartu maksimum di memori (default 20000)
+"""
+
+import os
+import threading
+import time
+from collections import OrderedDict, deque
+from typing import Callable, Dict, Hashable, Optional
+
+
+VELOCITY_VARIABLES = ('velocity_count', 'velocity_amount', 'velocity_micro_count')
+
+# Context values for a transaction without card history
+EMPTY_VELOCITY = {name: 0 for name in VELOCITY_VARIABLES}
+
+MAX_CARD_ID_LENGTH = 128
+
+
+class _CardWindow:
+    """Ring buffer satu kartu beserta jumlah berjalan dan event_id yang sudah dicatat"""
+    __slots__ = ('events', 'amount', 'micro_count', 'seen')
+
+    def __init__(self, max_events: int):
+        self.events = deque(maxlen=max_events)
+        self.amount = 0.0
+        self.micro_count = 0
+        # event_id -> velocity returned when that event was first observed
+        self.seen = {}
+
+
+class VelocityStore:
+    """
+    Jendela geser per kartu, aman untuk banyak thread
+    """
+
+    def __init__(self, window_seconds: Optional[float] = None, max_events: Optional[int] = None,
+                 max_cards: Optional[int] = None, micro_threshold: float = 0.5,
+                 clock: Callable[[], float] = time.time):
+        if window_seconds is None:
+            window_seconds = float(os.environ.get('VELOCITY_WINDOW_SECONDS', 600))
+        if max_events is None:
+            max_events = int(os.environ.get('VELOCITY_MAX_EVENTS', 32))
+        if max_cards is None:
+            max_cards = int(os.environ.get('VELOCITY_MAX_CARDS', 20000))
+        self.window_seconds = window_seconds
+        self.max_events = max(1, max_events)
+        self.max_cards = max(1, max_cards)
+        self.micro_threshold = micro_threshold
+        self._clock = clock
+        self._cards = OrderedDict()
+        self._lock = threading.Lock()
+        self.card_evictions = 0
+        # Running total of stored events so stats() stays O(1)
+        self._events = 0
+
+    def observe(self, card_id: Hashable, amount: float, timestamp: Optional[float] = None,
+                event_id: Optional[Hashable] = None) -> Dict[str, float]:
+        """
+        Catat satu transaksi dan kembalikan velocity kartu sebelum transaksi ini;
+        event_id yang sudah tercatat di jendela tidak dicatat ulang
+
+        Raises:
+            ValueError: card_id kosong atau terlalu panjang
+        """
+        key = self._key(card_id)
+        now = self._clock() if timestamp is None else timestamp
+        micro = amount < self.micro_threshold
+        with self._lock:
+            window = self._cards.get(key)
+            if window is None:
+                window = self._cards[key] = _CardWindow(self.max_events)
+                while len(self._cards) > self.max_cards:
+                    _, evicted = self._cards.popitem(last=False)
+                    self._events -= len(evicted.events)
+                    self.card_evictions += 1
+            else:
+                self._cards.move_to_end(key)
+                self._expire(window, now)
+                if event_id is not None and event_id in window.seen:
+                    return dict(window.seen[event_id])
+
+            velocity = self._velocity(window)
+
+            if len(window.events) == self.max_events:
+                self._drop_oldest(window)
+            window.events.append((now, amount, event_id))
+            self._events += 1
+            window.amount += amount
+            window.micro_count += micro
+            if event_id is not None:
+                window.seen[event_id] = velocity
+            return dict(velocity)
+
+    def peek(self, card_id: Hashable, timestamp: Optional[float] = None) -> Dict[str, float]:
+        """Velocity kartu saat ini tanpa mencatat transaksi"""
+        key = self._key(card_id)
+        now = self._clock() if timestamp is None else timestamp
+        with self._lock:
+            window = self._cards.get(key)
+            if window is None:
+                return dict(EMPTY_VELOCITY)
+            self._expire(window, now)
+            return self._velocity(window)
+
+    def _key(self, card_id: Hashable) -> str:
+        key = str(card_id)
+        if not key or len(key) > MAX_CARD_ID_LENGTH:
+            raise ValueError(f'card_id must be 1-{MAX_CARD_ID_LENGTH} characters')
+        return key
+
+    def _velocity(self, window: _CardWindow) -> Dict[str, float]:
+        return {
+            'velocity_count': len(window.events),
+            # Running sums pick up float noise from subtractions; it is not meaningful
+            'velocity_amount': round(window.amount, 6),
+            'velocity_micro_count': window.micro_count,
+        }
+
+    def _expire(self, window: _CardWindow, now: float):
+        cutoff = now - self.window_seconds
+        while window.events and window.events[0][0] <= cutoff:
+            self._drop_oldest(window)
+
+    def _drop_oldest(self, window: _CardWindow):
+        _, amount, event_id = window.events.popleft()
+        window.seen.pop(event_id, None)
+        self._events -= 1
+        window.amount -= amount
+        window.micro_count -= amount < self.micro_threshold
+        if not window.events:
+            # Reset running sums so float drift cannot accumulate
+            window.amount = 0.0
+            window.micro_count = 0
+
+    def clear(self):
+        with self._lock:
+            self._cards.clear()
+            self._events = 0
+
+    def stats(self) -> Dict:
+        """Statistik untuk monitoring"""
+        with self._lock:
+            return {
+                'cards': len(self._cards),
+                'max_cards': self.max_cards,
+                'events': self._events,
+                'max_events_per_card': self.max_events,
+                'window_seconds': self.window_seconds,
+                'card_evictions': self.card_evictions,
+            }